@@ -0,0 +1,57 @@
+import io
+import sys
+
+import pytest
+from conftest import report
+
+from pafpy.columnar import ColumnarPafFile, write_columnar
+from pafpy.paffile import PafFile
+
+
+def read_all(fileobj, **kwargs) -> int:
+    with PafFile(fileobj, **kwargs) as paf:
+        return sum(1 for _ in paf)
+
+
+@pytest.mark.parametrize("lazy_tags", [False, True])
+def test_iterate_plain(benchmark, paf_path, lines, lazy_tags):
+    benchmark(read_all, paf_path, lazy_tags=lazy_tags)
+    report(benchmark, len(lines), paf_path.stat().st_size)
+
+
+@pytest.mark.parametrize("read_ahead", [False, True])
+def test_iterate_gzip(benchmark, gzip_path, paf_data, lines, read_ahead):
+    benchmark(read_all, gzip_path, read_ahead=read_ahead)
+    report(benchmark, len(lines), len(paf_data))
+
+
+def test_iterate_stdin(benchmark, monkeypatch, paf_data, lines):
+    def setup():
+        stdin = io.TextIOWrapper(io.BytesIO(paf_data))
+        monkeypatch.setattr(sys, "stdin", stdin)
+        return ("-",), {}
+
+    benchmark.pedantic(read_all, setup=setup, rounds=10)
+    report(benchmark, len(lines), len(paf_data))
+
+
+def test_iter_batches(benchmark, paf_path, lines):
+    def read_batches():
+        with PafFile(paf_path) as paf:
+            return sum(len(batch) for batch in paf.iter_batches())
+
+    benchmark(read_batches)
+    report(benchmark, len(lines), paf_path.stat().st_size)
+
+
+@pytest.mark.parametrize("lazy_tags", [False, True])
+def test_iterate_columnar(benchmark, tmp_path, paf_path, lines, lazy_tags):
+    columnar_path = tmp_path / "bench.pafc"
+    write_columnar(paf_path, columnar_path)
+
+    def read_columnar():
+        with ColumnarPafFile(columnar_path, lazy_tags=lazy_tags) as paf:
+            return sum(1 for _ in paf)
+
+    benchmark(read_columnar)
+    report(benchmark, len(lines), paf_path.stat().st_size)
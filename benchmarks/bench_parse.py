@@ -0,0 +1,48 @@
+import pytest
+from conftest import report
+
+from pafpy.pafrecord import PafRecord
+from pafpy.tag import Tag
+
+TAGS = {
+    "A": "tp:A:P",
+    "i": "NM:i:12345",
+    "f": "de:f:0.0123",
+    "Z": "cg:Z:120M5I3D15M",
+}
+
+
+def test_pafrecord_from_str(benchmark, lines):
+    benchmark(lambda: [PafRecord.from_str(line) for line in lines])
+    report(benchmark, len(lines), sum(map(len, lines)))
+
+
+def test_pafrecord_from_str_lazy_tags(benchmark, lines):
+    benchmark(lambda: [PafRecord.from_str(line, lazy_tags=True) for line in lines])
+    report(benchmark, len(lines), sum(map(len, lines)))
+
+
+def test_pafrecord_from_bytes(benchmark, lines):
+    data = [line.encode() for line in lines]
+    benchmark(lambda: [PafRecord.from_bytes(line) for line in data])
+    report(benchmark, len(data), sum(map(len, data)))
+
+
+@pytest.mark.parametrize("tag_type", sorted(TAGS))
+def test_tag_from_str(benchmark, tag_type):
+    strings = [TAGS[tag_type]] * 10_000
+    benchmark(lambda: [Tag.from_str(string) for string in strings])
+    report(benchmark, len(strings), sum(map(len, strings)))
+
+
+@pytest.mark.parametrize("tag_type", sorted(TAGS))
+def test_tag_from_str_strict(benchmark, tag_type):
+    strings = [TAGS[tag_type]] * 10_000
+    benchmark(lambda: [Tag.from_str(string, strict=True) for string in strings])
+    report(benchmark, len(strings), sum(map(len, strings)))
+
+
+def test_pafrecord_str(benchmark, lines):
+    records = [PafRecord.from_str(line) for line in lines]
+    benchmark(lambda: [str(record) for record in records])
+    report(benchmark, len(records), sum(map(len, lines)))
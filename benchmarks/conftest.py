@@ -0,0 +1,47 @@
+"""Shared fixtures for the benchmarks.
+
+Run the benchmarks with `make bench` - see the Makefile for how results are stored and
+compared between versions.
+"""
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from pafpy.synthetic import generate_records, write_synthetic_paf
+
+NUM_RECORDS = 20_000
+SEED = 42
+
+
+def report(benchmark, records: int, nbytes: int):
+    """Add the throughput of the last run to the stored benchmark results."""
+    if benchmark.stats is None:  # benchmarks are disabled
+        return
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info["records_per_sec"] = records / mean
+    benchmark.extra_info["mb_per_sec"] = nbytes / mean / 1e6
+
+
+@pytest.fixture(scope="session")
+def lines() -> List[str]:
+    return list(map(str, generate_records(NUM_RECORDS, seed=SEED)))
+
+
+@pytest.fixture(scope="session")
+def paf_data(lines) -> bytes:
+    return "".join(f"{line}\n" for line in lines).encode()
+
+
+@pytest.fixture(scope="session")
+def paf_path(tmp_path_factory, paf_data) -> Path:
+    path = tmp_path_factory.mktemp("data") / "bench.paf"
+    path.write_bytes(paf_data)
+    return path
+
+
+@pytest.fixture(scope="session")
+def gzip_path(tmp_path_factory) -> Path:
+    path = tmp_path_factory.mktemp("data") / "bench.paf.gz"
+    write_synthetic_paf(path, NUM_RECORDS, seed=SEED, compression="gzip")
+    return path
@@ -51,4 +51,11 @@ from pafpy.__version__ import __version__  # noqa: F401
 from pafpy.paffile import PafFile  # noqa: F401
 from pafpy.pafrecord import AlignmentType, MalformattedRecord, PafRecord  # noqa: F401
 from pafpy.strand import Strand  # noqa: F401
-from pafpy.tag import InvalidTagFormat, Tag, TagType, UnknownTagTypeChar  # noqa: F401
+from pafpy.tag import (  # noqa: F401
+    InvalidTagFormat,
+    LazyTags,
+    Tag,
+    TagType,
+    UnknownTagTypeChar,
+)
+from pafpy.writer import PafWriter  # noqa: F401
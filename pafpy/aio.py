@@ -0,0 +1,288 @@
+"""This module contains objects for reading PAF files from
+[`asyncio`](https://docs.python.org/3/library/asyncio.html) code.
+
+Iterating over a `pafpy.paffile.PafFile` reads, decompresses, and parses on the calling
+thread, which blocks an event loop for as long as it takes. `pafpy.aio.AsyncPafFile`
+instead does all of this in an executor (a thread pool by default) and hands the
+records to the event loop in batches, reading the next batch while the current one is
+being processed.
+
+```py
+from pafpy.aio import AsyncPafFile
+```
+"""
+import asyncio
+import io
+from concurrent.futures import Executor
+from itertools import islice
+from typing import IO, Any, AsyncIterator, Iterator, List, Optional, Union
+
+from pafpy.paffile import PafFile, PathLike
+from pafpy.stats import ReadStats
+
+DEFAULT_BATCH_SIZE = 1024
+"""The default number of records read from a file in each batch."""
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+"""The default number of bytes read from an `asyncio.StreamReader` for each batch."""
+
+
+class _EndOfChunk(Exception):
+    """Raised by `_ChunkLines` when it runs out of lines before the end of the
+    stream."""
+
+    pass
+
+
+class _ChunkLines(io.IOBase):
+    """The lines of the chunks read from a `StreamReader`, so that a single `PafFile`
+    can parse all of them. Once the lines of a chunk run out, iteration raises
+    `_EndOfChunk` until the next chunk is fed, or `StopIteration` after `end`."""
+
+    def __init__(self):
+        self._lines: Iterator[bytes] = iter(())
+        self._ended = False
+
+    def feed(self, chunk: bytes):
+        self._lines = iter(io.BytesIO(chunk))
+
+    def end(self):
+        self._ended = True
+
+    def readable(self) -> bool:
+        return True
+
+    def __next__(self) -> bytes:
+        line = next(self._lines, None)
+        if line is None:
+            if self._ended:
+                raise StopIteration
+            raise _EndOfChunk
+        return line
+
+
+class AsyncPafFile:
+    """Asynchronous stream access to a PAF file.
+
+    `fileobj` is either anything `pafpy.paffile.PafFile` accepts (a path, `"-"` for
+    stdin, or a file object) or an
+    [`asyncio.StreamReader`](https://docs.python.org/3/library/asyncio-stream.html),
+    such as the `stdout` of a subprocess created with
+    `asyncio.create_subprocess_exec`. A `StreamReader` must provide uncompressed PAF.
+
+    Any other keyword arguments (e.g. `lazy_tags`, `threads`, `where`, or `fields`) are
+    passed on to `pafpy.paffile.PafFile`, and the items returned are the same as those
+    of the corresponding `PafFile`.
+
+    Records are read and parsed on `executor` (default is the event loop's default
+    executor) in batches of `batch_size` records - or, for a `StreamReader`, the records
+    in each chunk of (roughly) `chunk_size` bytes read from it. While a batch is being
+    processed, the next one is read. All batches are parsed by the same `PafFile`, so
+    its `stats` and interned names cover the whole stream.
+
+    `AsyncPafFile` is an asynchronous context manager and iterator. Use
+    `AsyncPafFile.iter_batches` to get the records a batch at a time.
+
+    ## Example
+    ```py
+    import asyncio
+    from pafpy import PafRecord
+    from pafpy.aio import AsyncPafFile
+    from pathlib import Path
+    import tempfile
+
+    async def read_names(path):
+        names = []
+        async with AsyncPafFile(path, batch_size=2) as paf:
+            async for record in paf:
+                names.append(record.qname)
+        return names
+
+    records = [PafRecord(qname=f"read{i}") for i in range(5)]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        path.write_text("\n".join(map(str, records)))
+
+        loop = asyncio.new_event_loop()
+        names = loop.run_until_complete(read_names(path))
+        loop.close()
+
+    assert names == [record.qname for record in records]
+    ```
+
+    ## Errors
+    If `batch_size` or `chunk_size` is less than 1, a `ValueError` is raised.
+    """
+
+    def __init__(
+        self,
+        fileobj: Union[PathLike, IO, asyncio.StreamReader],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        self.batch_size = batch_size
+        """The number of records read from a file in each batch."""
+        self.chunk_size = chunk_size
+        """The number of bytes read from a `StreamReader` for each batch."""
+        self.executor = executor
+        """The executor that records are read and parsed on (`None` for the event
+        loop's default)."""
+        if isinstance(fileobj, asyncio.StreamReader):
+            self._reader: Optional[asyncio.StreamReader] = fileobj
+            self._paf: Optional[PafFile] = None
+            self._chunk_lines = _ChunkLines()
+            self._parser = PafFile(self._chunk_lines, **kwargs)
+        else:
+            self._reader = None
+            self._paf = PafFile(fileobj, **kwargs)
+            self._parser = self._paf
+        self._remainder = b""
+        self._closed = False
+        # the read or parse currently running in the executor
+        self._pending: Optional[asyncio.Future] = None
+
+    async def __aenter__(self) -> "AsyncPafFile":
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iter_records()
+
+    async def _iter_records(self) -> AsyncIterator[Any]:
+        async for batch in self.iter_batches():
+            for record in batch:
+                yield record
+
+    async def _run(self, func, *args) -> Any:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _start(self, func, *args) -> asyncio.Future:
+        """Start running `func` in the executor without waiting for it."""
+        self._pending = asyncio.ensure_future(self._run(func, *args))
+        return self._pending
+
+    async def _wait_pending(self):
+        """Wait for any read or parse left running by an iteration that was stopped
+        early (a running executor job cannot be cancelled). Its result, or error, is
+        discarded."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        if not pending.done():
+            await asyncio.wait([pending])
+        if not pending.cancelled():
+            pending.exception()
+
+    @property
+    def stats(self) -> Optional[ReadStats]:
+        """The statistics collected while reading (`None` if not requested). See
+        `pafpy.paffile.PafFile`'s `stats`."""
+        return self._parser.stats
+
+    @property
+    def closed(self) -> bool:
+        """Is the file closed? A `StreamReader` is always open until `close` is
+        called."""
+        if self._paf is None:
+            return self._closed
+        return self._paf.closed
+
+    async def open(self) -> "AsyncPafFile":
+        """Open the file (in the executor). Returns the `AsyncPafFile`.
+
+        ## Errors
+        If the path does not exist, an `OSError` exception is raised.
+        """
+        if self._paf is not None:
+            await self._run(self._paf.open)
+        return self
+
+    async def close(self):
+        """Close the file. A `StreamReader` is not closed, but no more records are
+        read from it. If an iteration was stopped early, this waits for its pending
+        read to finish first."""
+        self._closed = True
+        await self._wait_pending()
+        await self._run(self._parser.close)
+
+    def _read_batch(self) -> List[Any]:
+        return list(islice(self._paf, self.batch_size))
+
+    def _parse_chunk(self, chunk: bytes, last: bool = False) -> List[Any]:
+        self._chunk_lines.feed(chunk)
+        if last:
+            self._chunk_lines.end()
+        records = []
+        try:
+            for record in self._parser:
+                records.append(record)
+        except _EndOfChunk:
+            pass
+        return records
+
+    async def _read_chunk(self) -> bytes:
+        """Read (about) `chunk_size` bytes from the stream, up to the last complete
+        line. Returns an empty chunk at the end of the stream."""
+        while True:
+            data = await self._reader.read(self.chunk_size)
+            if not data:
+                chunk, self._remainder = self._remainder, b""
+                return chunk
+            data = self._remainder + data
+            end = data.rfind(b"\n") + 1
+            if end:
+                self._remainder = data[end:]
+                return data[:end]
+            self._remainder = data
+
+    async def iter_batches(self) -> AsyncIterator[List[Any]]:
+        """Iterate over the (remaining) records in lists of (at most) `batch_size`
+        records, or the records of each chunk for a `StreamReader`.
+
+        ## Errors
+        - If the file is closed, an `IOError` is raised.
+        - See `pafpy.paffile.PafFile` for errors raised when parsing.
+        """
+        if self._reader is not None:
+            async for batch in self._iter_stream_batches():
+                yield batch
+            return
+
+        pending = self._start(self._read_batch)
+        try:
+            while True:
+                batch = await pending
+                if not batch:
+                    return
+                # read the next batch while this one is being processed
+                pending = self._start(self._read_batch)
+                yield batch
+        finally:
+            # don't leave a read running if the iteration is stopped early
+            await self._wait_pending()
+
+    async def _iter_stream_batches(self) -> AsyncIterator[List[Any]]:
+        if self._closed:
+            raise IOError("AsyncPafFile is closed.")
+        chunk = await self._read_chunk()
+        try:
+            while chunk and not self._closed:
+                parsing = self._start(self._parse_chunk, chunk)
+                # read the next chunk while this one is parsed
+                chunk = await self._read_chunk()
+                batch = await parsing
+                if batch:
+                    yield batch
+            if not self._closed:
+                # let the parser see the end of the stream, e.g. to finish its stats
+                await self._start(self._parse_chunk, b"", True)
+        finally:
+            await self._wait_pending()
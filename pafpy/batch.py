@@ -0,0 +1,230 @@
+"""This module contains objects for working with many PAF records at once in a columnar
+layout.
+
+The main class of interest here is `pafpy.batch.PafBatch`. Rather than creating one
+`pafpy.pafrecord.PafRecord` per line, a `PafBatch` holds one contiguous
+[`array`](https://docs.python.org/3/library/array.html) per field. Batches are usually
+obtained from `pafpy.paffile.PafFile.iter_batches`.
+
+The arrays support the buffer protocol, so if you have [NumPy][numpy] installed, they
+can be viewed as NumPy arrays without copying with `numpy.asarray`.
+
+```py
+from pafpy.batch import PafBatch
+```
+
+[numpy]: https://numpy.org/
+"""
+from array import array
+from typing import AnyStr, Iterable, Iterator, List, Optional
+
+from pafpy.names import CODE_TYPECODE, NameDictionary
+from pafpy.pafrecord import DELIM, MIN_FIELDS, MalformattedRecord, PafRecord
+from pafpy.strand import Strand
+
+INT_COLUMNS = {
+    "qlen": 1,
+    "qstart": 2,
+    "qend": 3,
+    "tlen": 6,
+    "tstart": 7,
+    "tend": 8,
+    "mlen": 9,
+    "blen": 10,
+}
+"""The integer columns of a `PafBatch` and their (0-based) field index in a PAF line."""
+INT_TYPECODE = "q"
+"""The `array` typecode used for the integer columns (signed 64-bit)."""
+MAPQ_TYPECODE = "B"
+"""The `array` typecode used for the mapping quality column (unsigned 8-bit)."""
+STRAND_TYPECODE = "b"
+"""The `array` typecode used for the strand column (signed 8-bit)."""
+STRAND_CODES = {Strand.Forward: 1, Strand.Reverse: -1, Strand.Unmapped: 0}
+"""The integer used to encode each `pafpy.strand.Strand` in `PafBatch.strand`."""
+
+_STRAND_LOOKUP = {}
+for _strand, _code in STRAND_CODES.items():
+    _STRAND_LOOKUP[_strand.value] = _code
+    _STRAND_LOOKUP[_strand.value.encode()] = _code
+_CODE_TO_STRAND = {code: strand for strand, code in STRAND_CODES.items()}
+
+
+def _ratio(numerators: Iterable[int], denominators: Iterable[int]) -> array:
+    return array("d", (n / d if d else 0.0 for n, d in zip(numerators, denominators)))
+
+
+class PafBatch:
+    """A batch of PAF records stored column-wise.
+
+    Each of the integer fields of a `pafpy.pafrecord.PafRecord` (`qlen`, `qstart`,
+    `qend`, `tlen`, `tstart`, `tend`, `mlen`, `blen`) is an `array` with typecode
+    `INT_TYPECODE`. `mapq` is stored as unsigned bytes and `strand` as `1` (forward),
+    `-1` (reverse), or `0` (unmapped) - see `STRAND_CODES`.
+
+    `qname` and `tname` hold integer category codes that index into
+    `PafBatch.qname_categories` and `PafBatch.tname_categories` respectively. When
+    batches come from `pafpy.paffile.PafFile.iter_batches`, all batches from the same
+    call share their categories, so a code means the same name in every batch.
+
+    > *Note: tags are not stored in a `PafBatch`.*
+
+    The derived metrics of `pafpy.pafrecord.PafRecord` are available as methods that
+    compute the metric for every record in the batch at once.
+
+    ## Example
+    ```py
+    from pafpy.batch import PafBatch
+
+    lines = [
+        "read1\t10\t5\t9\t+\tchr1\t100\t50\t54\t3\t4\t60",
+        "read2\t10\t0\t10\t-\tchr1\t100\t10\t20\t10\t10\t0",
+    ]
+    batch = PafBatch.from_lines(lines)
+
+    assert len(batch) == 2
+    assert list(batch.mapq) == [60, 0]
+    assert list(batch.strand) == [1, -1]
+    assert list(batch.tname) == [0, 0]
+    assert batch.tname_categories == ["chr1"]
+    assert list(batch.query_coverage()) == [0.4, 1.0]
+    assert list(batch.blast_identity()) == [0.75, 1.0]
+    ```
+    """
+
+    def __init__(
+        self,
+        qname_categories: Optional[List[str]] = None,
+        tname_categories: Optional[List[str]] = None,
+    ):
+        self.qname = array(CODE_TYPECODE)
+        """Query name category codes. See `PafBatch.qname_categories`."""
+        self.qlen = array(INT_TYPECODE)
+        """Query sequence lengths."""
+        self.qstart = array(INT_TYPECODE)
+        """Query starts."""
+        self.qend = array(INT_TYPECODE)
+        """Query ends."""
+        self.strand = array(STRAND_TYPECODE)
+        """Strands, encoded as per `STRAND_CODES`."""
+        self.tname = array(CODE_TYPECODE)
+        """Target name category codes. See `PafBatch.tname_categories`."""
+        self.tlen = array(INT_TYPECODE)
+        """Target sequence lengths."""
+        self.tstart = array(INT_TYPECODE)
+        """Target starts."""
+        self.tend = array(INT_TYPECODE)
+        """Target ends."""
+        self.mlen = array(INT_TYPECODE)
+        """Number of matching bases."""
+        self.blen = array(INT_TYPECODE)
+        """Alignment block lengths."""
+        self.mapq = array(MAPQ_TYPECODE)
+        """Mapping qualities."""
+        self.qname_categories: List[str] = (
+            qname_categories if qname_categories is not None else []
+        )
+        """The query names that the codes in `PafBatch.qname` refer to."""
+        self.tname_categories: List[str] = (
+            tname_categories if tname_categories is not None else []
+        )
+        """The target names that the codes in `PafBatch.tname` refer to."""
+
+    def __len__(self) -> int:
+        return len(self.mapq)
+
+    def __iter__(self) -> Iterator[PafRecord]:
+        return self.records()
+
+    @staticmethod
+    def from_lines(lines: Iterable[AnyStr]) -> "PafBatch":
+        """Construct a `PafBatch` from PAF lines (`str` or `bytes`).
+
+        ## Errors
+        - If a line has less than the expected number of fields (12), a
+        `pafpy.pafrecord.MalformattedRecord` exception is raised.
+        - If a strand is not one of `+`, `-`, or `*`, a `ValueError` is raised.
+        """
+        return _batch_from_lines(lines, NameDictionary(), NameDictionary())
+
+    def query_names(self) -> List[str]:
+        """The query name of each record."""
+        categories = self.qname_categories
+        return [categories[code] for code in self.qname]
+
+    def target_names(self) -> List[str]:
+        """The target name of each record."""
+        categories = self.tname_categories
+        return [categories[code] for code in self.tname]
+
+    def records(self) -> Iterator[PafRecord]:
+        """Iterate over the batch as `pafpy.pafrecord.PafRecord`s (without tags)."""
+        for row in zip(
+            self.query_names(),
+            self.qlen,
+            self.qstart,
+            self.qend,
+            map(_CODE_TO_STRAND.__getitem__, self.strand),
+            self.target_names(),
+            self.tlen,
+            self.tstart,
+            self.tend,
+            self.mlen,
+            self.blen,
+            self.mapq,
+        ):
+            yield PafRecord(*row)
+
+    def query_aligned_length(self) -> array:
+        """`pafpy.pafrecord.PafRecord.query_aligned_length` for every record."""
+        return array(INT_TYPECODE, (abs(e - s) for s, e in zip(self.qstart, self.qend)))
+
+    def target_aligned_length(self) -> array:
+        """`pafpy.pafrecord.PafRecord.target_aligned_length` for every record."""
+        return array(INT_TYPECODE, (abs(e - s) for s, e in zip(self.tstart, self.tend)))
+
+    def query_coverage(self) -> array:
+        """`pafpy.pafrecord.PafRecord.query_coverage` for every record."""
+        return _ratio(self.query_aligned_length(), self.qlen)
+
+    def target_coverage(self) -> array:
+        """`pafpy.pafrecord.PafRecord.target_coverage` for every record."""
+        return _ratio(self.target_aligned_length(), self.tlen)
+
+    def relative_length(self) -> array:
+        """`pafpy.pafrecord.PafRecord.relative_length` for every record."""
+        return _ratio(self.query_aligned_length(), self.target_aligned_length())
+
+    def blast_identity(self) -> array:
+        """`pafpy.pafrecord.PafRecord.blast_identity` for every record."""
+        return _ratio(self.mlen, self.blen)
+
+
+def _batch_from_lines(
+    lines: Iterable[AnyStr], qnames: NameDictionary, tnames: NameDictionary
+) -> PafBatch:
+    rows = []
+    for line in lines:
+        fields = line.split(DELIM if isinstance(line, str) else b"\t", MIN_FIELDS)
+        if len(fields) < MIN_FIELDS:
+            raise MalformattedRecord(
+                f"Expected {MIN_FIELDS} fields, but got {len(fields)}\n{line!r}"
+            )
+        rows.append(fields[:MIN_FIELDS])
+
+    batch = PafBatch(qnames.names, tnames.names)
+    if not rows:
+        return batch
+
+    columns = list(zip(*rows))
+    batch.qname = qnames.encode(columns[0])
+    batch.tname = tnames.encode(columns[5])
+    for name, index in INT_COLUMNS.items():
+        setattr(batch, name, array(INT_TYPECODE, map(int, columns[index])))
+    batch.mapq = array(MAPQ_TYPECODE, map(int, columns[11]))
+    try:
+        batch.strand = array(
+            STRAND_TYPECODE, map(_STRAND_LOOKUP.__getitem__, columns[4])
+        )
+    except KeyError as err:
+        raise ValueError(f"{err.args[0]!r} is not a valid Strand") from None
+    return batch
@@ -0,0 +1,481 @@
+"""This module contains objects for reading and writing [BGZF][spec] (blocked gzip)
+files.
+
+BGZF files are a series of independently compressed gzip blocks of at most 64 KiB.
+They can be decompressed by any gzip tool (e.g. `gzip -d`, `bgzip -d`), but unlike
+regular gzip files, they support random access through *virtual offsets*. A virtual
+offset packs the (compressed) file offset of a block and the (uncompressed) offset
+within that block into one integer - see `make_virtual_offset`.
+
+`pafpy.paffile.PafFile` uses `BgzfReader` automatically when a file is BGZF-compressed.
+
+```py
+from pafpy.bgzf import BgzfReader, BgzfWriter
+```
+
+[spec]: https://samtools.github.io/hts-specs/SAMv1.pdf
+"""
+import io
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Deque, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+PathLike = Union[str, os.PathLike]
+
+BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+"""The first four bytes of every BGZF block: the gzip magic, deflate compression
+method, and the FEXTRA flag."""
+MAX_BLOCK_SIZE = 0x10000
+"""The maximum size (in bytes) of a compressed block."""
+BLOCK_DATA_SIZE = 0xFF00
+"""The amount of uncompressed data written to each block by `BgzfWriter`."""
+EOF_BLOCK = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+"""The empty block that marks the end of a BGZF file."""
+
+_FIXED_HEADER = struct.Struct("<4sIBBH")
+_SUBFIELD = struct.Struct("<2sH")
+_BLOCK_HEADER = struct.Struct("<4sIBBH2sHH")
+_FOOTER = struct.Struct("<II")
+
+
+class MalformattedBlock(Exception):
+    """An exception indicating that a BGZF block is not in the expected format."""
+
+    pass
+
+
+class Block(NamedTuple):
+    """A single compressed BGZF block."""
+
+    offset: int
+    """The offset of the block in the compressed file."""
+    size: int
+    """The size of the compressed block (including header and footer)."""
+    cdata: bytes
+    """The raw deflate-compressed data."""
+    crc: int
+    """The CRC32 of the uncompressed data."""
+    isize: int
+    """The size of the uncompressed data."""
+
+    def decompress(self) -> bytes:
+        """Decompress the block data, checking its size and CRC32.
+
+        ## Errors
+        If the uncompressed data does not match the size or CRC32 stored in the block,
+        a `MalformattedBlock` exception is raised.
+        """
+        data = zlib.decompress(self.cdata, -zlib.MAX_WBITS)
+        if len(data) != self.isize or zlib.crc32(data) != self.crc:
+            raise MalformattedBlock(
+                f"Block at offset {self.offset} failed size/CRC32 check"
+            )
+        return data
+
+
+def make_virtual_offset(block_offset: int, within_block: int) -> int:
+    """Combine the compressed offset of a block and the offset within the uncompressed
+    block into a virtual offset.
+
+    ## Example
+    ```py
+    from pafpy.bgzf import make_virtual_offset, split_virtual_offset
+
+    voffset = make_virtual_offset(100, 5)
+
+    assert voffset == (100 << 16) | 5
+    assert split_virtual_offset(voffset) == (100, 5)
+    ```
+    """
+    if not 0 <= within_block < MAX_BLOCK_SIZE:
+        raise ValueError(f"Offset within block must be < 65536, got {within_block}")
+    return (block_offset << 16) | within_block
+
+
+def split_virtual_offset(virtual_offset: int) -> Tuple[int, int]:
+    """Split a virtual offset into the compressed offset of its block and the offset
+    within the uncompressed block. The inverse of `make_virtual_offset`."""
+    return virtual_offset >> 16, virtual_offset & 0xFFFF
+
+
+def _block_size_from_extra(extra: bytes) -> Optional[int]:
+    pos = 0
+    while pos + _SUBFIELD.size <= len(extra):
+        subfield_id, length = _SUBFIELD.unpack_from(extra, pos)
+        pos += _SUBFIELD.size
+        if subfield_id == b"BC" and length == 2:
+            return struct.unpack_from("<H", extra, pos)[0] + 1
+        pos += length
+    return None
+
+
+def _read_block_header(fileobj: IO[bytes]) -> Optional[Tuple[int, int, int]]:
+    """Returns the offset, total size, and header size of the block starting at the
+    current position, leaving the position at the end of the header."""
+    offset = fileobj.tell()
+    header = fileobj.read(_FIXED_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _FIXED_HEADER.size or header[:4] != BGZF_MAGIC:
+        raise MalformattedBlock(f"No BGZF block header found at offset {offset}")
+
+    xlen = _FIXED_HEADER.unpack(header)[-1]
+    extra = fileobj.read(xlen)
+    size = _block_size_from_extra(extra)
+    if size is None:
+        raise MalformattedBlock(f"Block at offset {offset} has no BC subfield")
+    return offset, size, _FIXED_HEADER.size + xlen
+
+
+def read_block(fileobj: IO[bytes]) -> Optional[Block]:
+    """Read the block starting at the current position of `fileobj`. Returns `None` at
+    the end of the file.
+
+    ## Errors
+    If the data at the current position is not a valid BGZF block, a
+    `MalformattedBlock` exception is raised.
+    """
+    header = _read_block_header(fileobj)
+    if header is None:
+        return None
+    offset, size, header_size = header
+
+    remaining = size - header_size
+    body = fileobj.read(remaining)
+    if len(body) != remaining or remaining < _FOOTER.size:
+        raise MalformattedBlock(f"Block at offset {offset} is truncated")
+
+    crc, isize = _FOOTER.unpack_from(body, len(body) - _FOOTER.size)
+    return Block(offset, size, body[: -_FOOTER.size], crc, isize)
+
+
+def iter_block_offsets(fileobj: IO[bytes]) -> Iterator[Tuple[int, int]]:
+    """Iterate over the `(offset, size)` of the blocks of a BGZF file, starting at the
+    current position of `fileobj`. Only the block headers are read."""
+    while True:
+        header = _read_block_header(fileobj)
+        if header is None:
+            return
+        offset, size, _ = header
+        fileobj.seek(offset + size)
+        yield offset, size
+
+
+def iter_blocks(fileobj: IO[bytes]) -> Iterator[Block]:
+    """Iterate over the blocks of a BGZF file, starting at the current position of
+    `fileobj`."""
+    while True:
+        block = read_block(fileobj)
+        if block is None:
+            return
+        yield block
+
+
+def compress_block(data: bytes, compresslevel: int = 6) -> bytes:
+    """Compress `data` into one (or, if it does not compress enough to fit, more) BGZF
+    blocks."""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+    cdata = compressor.compress(data) + compressor.flush()
+    size = _BLOCK_HEADER.size + len(cdata) + _FOOTER.size
+    if size > MAX_BLOCK_SIZE:
+        half = len(data) // 2
+        return compress_block(data[:half], compresslevel) + compress_block(
+            data[half:], compresslevel
+        )
+    header = _BLOCK_HEADER.pack(BGZF_MAGIC, 0, 0, 0xFF, 6, b"BC", 2, size - 1)
+    return header + cdata + _FOOTER.pack(zlib.crc32(data), len(data))
+
+
+def _open_binary(fileobj: Union[PathLike, IO], mode: str) -> Tuple[IO, bool]:
+    if isinstance(fileobj, io.IOBase):
+        return fileobj, False
+    return open(fileobj, mode=mode), True
+
+
+class BgzfReader:
+    """Read the uncompressed lines of a BGZF file, with random access through virtual
+    offsets.
+
+    `fileobj` is either a path or a seekable file object opened in binary mode.
+
+    If `threads` is greater than 0, the blocks following the current block are read
+    ahead and decompressed on a pool of `threads` threads while the current block is
+    being consumed. As `zlib` releases the GIL, this decompresses several blocks in
+    parallel.
+
+    The reader supports the subset of the binary file interface used by
+    `pafpy.paffile.PafFile`: iteration, `readline`, `tell`, `seek`, and `close`. The
+    offsets used by `tell` and `seek` are virtual offsets.
+
+    ## Example
+    ```py
+    from pathlib import Path
+    import tempfile
+    from pafpy.bgzf import BgzfReader, BgzfWriter
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.txt.gz")
+        with BgzfWriter(path) as writer:
+            writer.write(b"line1\n")
+            writer.flush()  # ends the current block
+            offset = writer.tell()
+            writer.write(b"line2\n")
+
+        with BgzfReader(path) as reader:
+            assert list(reader) == [b"line1\n", b"line2\n"]
+            reader.seek(offset)
+            assert reader.readline() == b"line2\n"
+    ```
+
+    ## Errors
+    If the file is not BGZF-compressed, a `MalformattedBlock` exception is raised.
+    """
+
+    def __init__(self, fileobj: Union[PathLike, IO], threads: int = 0):
+        self._file, self._owns_file = _open_binary(fileobj, mode="rb")
+        self._closed = False
+        self._executor = ThreadPoolExecutor(threads) if threads > 0 else None
+        self._max_pending = 2 * threads
+        self._pending: Deque[Tuple[Block, Future]] = deque()
+        self._next_raw_offset = 0
+        self._block_offset = 0
+        self._block_data = b""
+        self._next_block_offset: Optional[int] = None
+        self._within = 0
+        self._load_block(0)
+
+    def __iter__(self) -> "BgzfReader":
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def __enter__(self) -> "BgzfReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Is the reader closed?"""
+        return self._closed
+
+    def _check_closed(self):
+        if self._closed:
+            raise ValueError("I/O operation on closed BgzfReader.")
+
+    def _cancel_pending(self):
+        while self._pending:
+            _, future = self._pending.popleft()
+            future.cancel()
+
+    def _fill_pending(self):
+        if self._executor is None:
+            return
+        self._file.seek(self._next_raw_offset)
+        while len(self._pending) < self._max_pending:
+            block = read_block(self._file)
+            if block is None:
+                break
+            self._pending.append((block, self._executor.submit(block.decompress)))
+            self._next_raw_offset = block.offset + block.size
+
+    def _load_block(self, offset: int):
+        if self._pending and self._pending[0][0].offset == offset:
+            block, future = self._pending.popleft()
+            data = future.result()
+        else:
+            self._cancel_pending()
+            self._file.seek(offset)
+            block = read_block(self._file)
+            data = b"" if block is None else block.decompress()
+            self._next_raw_offset = self._file.tell()
+
+        self._block_offset = offset
+        self._block_data = data
+        self._within = 0
+        self._next_block_offset = None if block is None else offset + block.size
+        self._fill_pending()
+
+    def _skip_exhausted_blocks(self):
+        # keeps tell() canonical: a position at the end of a block is reported as the
+        # start of the next (non-empty) block
+        while (
+            self._within >= len(self._block_data)
+            and self._next_block_offset is not None
+        ):
+            self._load_block(self._next_block_offset)
+
+    def readline(self) -> bytes:
+        """Read the next line (including the newline). Returns `b""` at the end of the
+        file.
+
+        ## Errors
+        If the reader is closed, a `ValueError` is raised.
+        """
+        self._check_closed()
+        parts: List[bytes] = []
+        while True:
+            data = self._block_data
+            start = self._within
+            end = data.find(b"\n", start) + 1
+            if end:
+                parts.append(data[start:end])
+                self._within = end
+                break
+            parts.append(data[start:])
+            self._within = len(data)
+            if self._next_block_offset is None:
+                break
+            self._load_block(self._next_block_offset)
+        self._skip_exhausted_blocks()
+        return b"".join(parts)
+
+    def tell(self) -> int:
+        """The virtual offset of the current position."""
+        self._check_closed()
+        return make_virtual_offset(self._block_offset, self._within)
+
+    def seek(self, virtual_offset: int) -> int:
+        """Move to `virtual_offset` and return it.
+
+        ## Errors
+        - If the offset within the block is past the end of the block, a `ValueError`
+        is raised.
+        - If the reader is closed, a `ValueError` is raised.
+        """
+        self._check_closed()
+        block_offset, within = split_virtual_offset(virtual_offset)
+        if block_offset != self._block_offset:
+            self._load_block(block_offset)
+        if within > len(self._block_data):
+            raise ValueError(f"Virtual offset {virtual_offset} is outside its block")
+        self._within = within
+        self._skip_exhausted_blocks()
+        return self.tell()
+
+    def close(self):
+        """Close the reader (and the underlying file if the reader opened it)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._cancel_pending()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._block_data = b""
+        if self._owns_file:
+            self._file.close()
+
+
+class BgzfWriter:
+    """Write data to a BGZF file.
+
+    `fileobj` is either a path or a file object opened in binary mode. Data passed to
+    `BgzfWriter.write` is buffered and compressed into blocks of `BLOCK_DATA_SIZE`
+    bytes. If `threads` is greater than 0, blocks are compressed on a pool of `threads`
+    threads and written in order.
+
+    Closing the writer writes any remaining data and the end-of-file marker block.
+
+    ## Example
+    ```py
+    import gzip
+    from pathlib import Path
+    import tempfile
+    from pafpy.bgzf import BgzfWriter
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.txt.gz")
+        with BgzfWriter(path, threads=2) as writer:
+            writer.write(b"hello\n" * 100_000)
+
+        assert gzip.decompress(path.read_bytes()) == b"hello\n" * 100_000
+    ```
+    """
+
+    def __init__(
+        self, fileobj: Union[PathLike, IO], compresslevel: int = 6, threads: int = 0
+    ):
+        self._file, self._owns_file = _open_binary(fileobj, mode="wb")
+        self._compresslevel = compresslevel
+        self._executor = ThreadPoolExecutor(threads) if threads > 0 else None
+        self._max_pending = 2 * threads
+        self._pending: Deque[Future] = deque()
+        self._buffer = bytearray()
+        self._block_offset = 0
+        self._closed = False
+
+    def __enter__(self) -> "BgzfWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Is the writer closed?"""
+        return self._closed
+
+    def _write_compressed(self, compressed: bytes):
+        self._file.write(compressed)
+        self._block_offset += len(compressed)
+
+    def _drain(self, keep: int = 0):
+        while len(self._pending) > keep:
+            self._write_compressed(self._pending.popleft().result())
+
+    def _emit_block(self, data: bytes):
+        if self._executor is None:
+            self._write_compressed(compress_block(data, self._compresslevel))
+        else:
+            self._pending.append(
+                self._executor.submit(compress_block, data, self._compresslevel)
+            )
+            self._drain(keep=self._max_pending)
+
+    def write(self, data: bytes) -> int:
+        """Write `data` (`bytes`) and return the number of bytes written."""
+        if self._closed:
+            raise ValueError("I/O operation on closed BgzfWriter.")
+        self._buffer += data
+        while len(self._buffer) >= BLOCK_DATA_SIZE:
+            self._emit_block(bytes(self._buffer[:BLOCK_DATA_SIZE]))
+            del self._buffer[:BLOCK_DATA_SIZE]
+        return len(data)
+
+    def flush(self):
+        """Compress any buffered data into a block and write all pending blocks. The
+        next write will start a new block."""
+        if self._buffer:
+            self._emit_block(bytes(self._buffer))
+            self._buffer.clear()
+        self._drain()
+        self._file.flush()
+
+    def tell(self) -> int:
+        """The virtual offset at which the next write will start. This waits for any
+        blocks being compressed in the background to be written."""
+        self._drain()
+        return make_virtual_offset(self._block_offset, len(self._buffer))
+
+    def close(self):
+        """Write any remaining data and the end-of-file marker, then close the writer
+        (and the underlying file if the writer opened it)."""
+        if self._closed:
+            return
+        self.flush()
+        self._write_compressed(EOF_BLOCK)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+        self._closed = True
@@ -0,0 +1,264 @@
+"""This module contains objects for decoding the CIGAR string stored in the `cg` tag of
+PAF records (as output by `minimap2 -c`).
+
+Rather than a list of `(length, operation)` tuples, a decoded CIGAR is held as parallel
+[`array`](https://docs.python.org/3/library/array.html)s of operation codes and
+lengths, along with the offset into the query and target at which each operation
+starts. The operation codes are the same as those used in BAM files - see `OPS`.
+
+The main classes of interest are `pafpy.cigar.Cigar`, for a single record, and
+`pafpy.cigar.CigarBatch`, for decoding the CIGARs of many records in one call.
+
+```py
+from pafpy.cigar import Cigar, CigarBatch
+```
+"""
+import re
+from array import array
+from itertools import accumulate, chain
+from operator import mul
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pafpy.pafrecord import PafRecord
+
+CIGAR_TAG = "cg"
+"""The tag that holds the CIGAR string in a PAF record."""
+OPS = "MIDNSHP=X"
+"""The CIGAR operations. The code of an operation is its index in this string."""
+OP_TYPECODE = "B"
+"""The `array` typecode used for operation codes (unsigned 8-bit)."""
+LENGTH_TYPECODE = "I"
+"""The `array` typecode used for operation lengths (unsigned 32-bit)."""
+OFFSET_TYPECODE = "q"
+"""The `array` typecode used for offsets (signed 64-bit)."""
+CONSUMES_QUERY = (1, 1, 0, 0, 1, 0, 0, 1, 1)
+"""Whether each operation (indexed by code) consumes query bases."""
+CONSUMES_TARGET = (1, 0, 1, 1, 0, 0, 0, 1, 1)
+"""Whether each operation (indexed by code) consumes target bases."""
+
+_OP_SPLIT = re.compile(f"[{re.escape(OPS)}]")
+_NOT_OP = re.compile(f"[^{re.escape(OPS)}]+")
+# int() also accepts signs, whitespace, underscores, and non-ASCII digits
+_VALID_CIGAR = re.compile(f"(?:[0-9]+[{re.escape(OPS)}])*")
+_OP_CODES = bytes.maketrans(OPS.encode(), bytes(range(len(OPS))))
+
+
+class InvalidCigar(Exception):
+    """An exception used to indicate that a CIGAR string is malformed."""
+
+    pass
+
+
+def _decode(string: str) -> Tuple[array, array]:
+    pieces = _OP_SPLIT.split(string)
+    if pieces[-1]:
+        raise InvalidCigar(f"CIGAR string {string!r} does not end with an operation")
+    if _VALID_CIGAR.fullmatch(string) is None:
+        raise InvalidCigar(f"CIGAR string {string!r} is malformed")
+    try:
+        lengths = array(LENGTH_TYPECODE, map(int, pieces[:-1]))
+    except (ValueError, OverflowError):
+        raise InvalidCigar(f"CIGAR string {string!r} is malformed") from None
+    ops = array(OP_TYPECODE, _NOT_OP.sub("", string).encode().translate(_OP_CODES))
+    return ops, lengths
+
+
+def _offsets(ops: array, lengths: array, consumes: Tuple[int, ...]) -> array:
+    """The offset at which each operation starts, followed by the total length."""
+    consumed = map(mul, lengths, map(consumes.__getitem__, ops))
+    return array(OFFSET_TYPECODE, accumulate(chain((0,), consumed)))
+
+
+class Cigar:
+    """A decoded CIGAR string.
+
+    `Cigar.ops` and `Cigar.lengths` hold the code (see `OPS`) and length of each
+    operation. `Cigar.query_offsets[i]` and `Cigar.target_offsets[i]` are the number of
+    query and target bases consumed before operation `i` - i.e. where operation `i`
+    starts, relative to `qstart` and `tstart` of the alignment. They have one more
+    element than there are operations; the last element is the total number of bases
+    consumed.
+
+    > *Note: for records on the reverse strand, the query offsets are relative to the
+    reverse complement of the query - as per the PAF specification.*
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.cigar import Cigar, OPS
+
+    record = PafRecord.from_str(
+        "read1\t20\t0\t18\t+\tchr1\t100\t50\t69\t14\t19\t60\tcg:Z:5M2I6=1X3D2M"
+    )
+    cigar = Cigar.from_record(record)
+
+    assert len(cigar) == 6
+    assert [OPS[code] for code in cigar.ops] == list("MI=XDM")
+    assert list(cigar.lengths) == [5, 2, 6, 1, 3, 2]
+    assert list(cigar.query_offsets) == [0, 5, 7, 13, 14, 14, 16]
+    assert list(cigar.target_offsets) == [0, 5, 5, 11, 12, 15, 17]
+    assert str(cigar) == "5M2I6=1X3D2M"
+    ```
+    """
+
+    __slots__ = ("ops", "lengths", "query_offsets", "target_offsets")
+
+    def __init__(
+        self,
+        ops: Optional[array] = None,
+        lengths: Optional[array] = None,
+        query_offsets: Optional[array] = None,
+        target_offsets: Optional[array] = None,
+    ):
+        self.ops = ops if ops is not None else array(OP_TYPECODE)
+        self.lengths = lengths if lengths is not None else array(LENGTH_TYPECODE)
+        self.query_offsets = (
+            query_offsets
+            if query_offsets is not None
+            else _offsets(self.ops, self.lengths, CONSUMES_QUERY)
+        )
+        self.target_offsets = (
+            target_offsets
+            if target_offsets is not None
+            else _offsets(self.ops, self.lengths, CONSUMES_TARGET)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        """Iterate over the `(length, operation)` pairs."""
+        return zip(self.lengths, map(OPS.__getitem__, self.ops))
+
+    def __str__(self) -> str:
+        return "".join(f"{length}{op}" for length, op in self)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Cigar):
+            return NotImplemented
+        return self.ops == other.ops and self.lengths == other.lengths
+
+    def __repr__(self) -> str:
+        return f"Cigar({str(self)!r})"
+
+    @property
+    def query_length(self) -> int:
+        """The number of query bases consumed by the alignment."""
+        return self.query_offsets[-1]
+
+    @property
+    def target_length(self) -> int:
+        """The number of target bases consumed by the alignment."""
+        return self.target_offsets[-1]
+
+    @staticmethod
+    def from_str(string: str) -> "Cigar":
+        """Decode a CIGAR string.
+
+        ## Errors
+        If `string` is not a valid CIGAR string, an `InvalidCigar` exception is raised.
+        """
+        return Cigar(*_decode(string))
+
+    @staticmethod
+    def from_record(record: PafRecord) -> Optional["Cigar"]:
+        """Decode the CIGAR in the `cg` tag of `record`. Returns `None` if the record
+        has no `cg` tag.
+
+        ## Errors
+        If the tag value is not a valid CIGAR string, an `InvalidCigar` exception is
+        raised.
+        """
+        tag = record.get_tag(CIGAR_TAG)
+        return None if tag is None else Cigar.from_str(tag.value)
+
+
+class CigarBatch:
+    """The decoded CIGARs of many records, concatenated into one set of arrays.
+
+    `CigarBatch.ops`, `CigarBatch.lengths`, `CigarBatch.query_offsets`, and
+    `CigarBatch.target_offsets` hold the operations of all records back-to-back. The
+    offsets are where each operation starts, relative to the start of its own record's
+    alignment (unlike `Cigar`, there is no trailing total). The operations of record
+    `i` are those in the range `CigarBatch.bounds[i]` to `CigarBatch.bounds[i + 1]`.
+    Records without a CIGAR have no operations.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.cigar import CigarBatch
+
+    batch = CigarBatch.from_strings(["3M1I2M", None, "4M2D"])
+
+    assert len(batch) == 3
+    assert list(batch.bounds) == [0, 3, 3, 5]
+    assert list(batch.lengths) == [3, 1, 2, 4, 2]
+    assert list(batch.target_offsets) == [0, 3, 3, 0, 4]
+    assert batch[1] is None
+    assert str(batch[2]) == "4M2D"
+    ```
+    """
+
+    def __init__(self):
+        self.ops = array(OP_TYPECODE)
+        """The code of every operation. See `OPS`."""
+        self.lengths = array(LENGTH_TYPECODE)
+        """The length of every operation."""
+        self.query_offsets = array(OFFSET_TYPECODE)
+        """The query offset at which every operation starts, relative to its record."""
+        self.target_offsets = array(OFFSET_TYPECODE)
+        """The target offset at which every operation starts, relative to its record."""
+        self.bounds = array(OFFSET_TYPECODE, [0])
+        """The index of the first operation of each record, followed by the total
+        number of operations."""
+        self._missing: List[bool] = []
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    def __getitem__(self, i: int) -> Optional[Cigar]:
+        """The `Cigar` of record `i`, or `None` if it has no CIGAR."""
+        if self._missing[i]:
+            return None
+        start, end = self.bounds[i], self.bounds[i + 1]
+        return Cigar(self.ops[start:end], self.lengths[start:end])
+
+    def __iter__(self) -> Iterator[Optional[Cigar]]:
+        return (self[i] for i in range(len(self)))
+
+    @staticmethod
+    def from_strings(strings: Iterable[Optional[str]]) -> "CigarBatch":
+        """Decode many CIGAR strings. `None` can be given for records without one.
+
+        ## Errors
+        If a string is not a valid CIGAR string, an `InvalidCigar` exception is
+        raised.
+        """
+        batch = CigarBatch()
+        for string in strings:
+            batch._missing.append(string is None)
+            if string:
+                ops, lengths = _decode(string)
+                query_offsets = _offsets(ops, lengths, CONSUMES_QUERY)
+                target_offsets = _offsets(ops, lengths, CONSUMES_TARGET)
+                query_offsets.pop()
+                target_offsets.pop()
+                batch.ops.extend(ops)
+                batch.lengths.extend(lengths)
+                batch.query_offsets.extend(query_offsets)
+                batch.target_offsets.extend(target_offsets)
+            batch.bounds.append(len(batch.ops))
+        return batch
+
+    @staticmethod
+    def from_records(records: Iterable[PafRecord]) -> "CigarBatch":
+        """Decode the CIGAR in the `cg` tag of each record.
+
+        ## Errors
+        If a tag value is not a valid CIGAR string, an `InvalidCigar` exception is
+        raised.
+        """
+        tags = (record.get_tag(CIGAR_TAG) for record in records)
+        return CigarBatch.from_strings(
+            None if tag is None else tag.value for tag in tags
+        )
@@ -0,0 +1,503 @@
+"""This module contains a compact binary, columnar format for PAF files that are read
+many times.
+
+Every pass over a PAF file pays for splitting and parsing its text. Converting the file
+once with `pafpy.columnar.write_columnar` stores the records in blocks of fixed-width
+columns instead: the integer fields as 64-bit integers, the names as codes into a
+dictionary of the distinct query and target names (see `pafpy.names.NameDictionary`),
+and the raw tags of each block packed into one buffer. A
+`pafpy.columnar.ColumnarPafFile` memory-maps the file and returns the records as
+`pafpy.pafrecord.PafRecord`s or `pafpy.batch.PafBatch`es, or single columns as
+[`array`](https://docs.python.org/3/library/array.html)s, without parsing any text
+other than the tags.
+
+`pafpy.columnar.open_cached` does this transparently: the first time a PAF file is
+opened, it is converted to a cache file, which later calls reuse for as long as the
+size and modification time of the PAF file are unchanged.
+
+The file starts with `COLUMNAR_MAGIC`, followed by the blocks. Each block holds the
+`tag_offsets` of its records (relative to the start of its tags), the columns
+(in `COLUMN_LAYOUT` order, widest first so every column is aligned), and the tags, and
+is padded to a multiple of 8 bytes. Then come the query and target names (each
+followed by a newline) and a JSON footer describing the blocks, names, and source
+file. The file ends with the (little-endian, 64-bit) offset of the footer and
+`COLUMNAR_MAGIC`. Columns are stored in the byte order of the machine that wrote the
+file, which is recorded in the footer.
+
+```py
+from pafpy.columnar import ColumnarPafFile, open_cached, write_columnar
+```
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pafpy.batch import (
+    _CODE_TO_STRAND,
+    INT_TYPECODE,
+    MAPQ_TYPECODE,
+    STRAND_TYPECODE,
+    PafBatch,
+)
+from pafpy.grouping import Reducer, group_by_query
+from pafpy.names import CODE_TYPECODE, NameDictionary
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import PafRecord, _tags_from_bytes
+from pafpy.store import OFFSET_TYPECODE, RecordStore
+
+PathLike = Union[Path, str, os.PathLike]
+
+COLUMNAR_SUFFIX = ".pafc"
+"""The suffix of columnar files (see `cache_path`)."""
+COLUMNAR_MAGIC = b"PAFPYCOL"
+"""The bytes at the start and end of a columnar file."""
+COLUMNAR_VERSION = 1
+"""The version of the format written by `write_columnar`."""
+DEFAULT_BLOCK_SIZE = 65_536
+"""The default number of records in each block of a columnar file."""
+COLUMN_LAYOUT = (
+    ("tag_offsets", OFFSET_TYPECODE),
+    ("qlen", INT_TYPECODE),
+    ("qstart", INT_TYPECODE),
+    ("qend", INT_TYPECODE),
+    ("tlen", INT_TYPECODE),
+    ("tstart", INT_TYPECODE),
+    ("tend", INT_TYPECODE),
+    ("mlen", INT_TYPECODE),
+    ("blen", INT_TYPECODE),
+    ("qname", CODE_TYPECODE),
+    ("tname", CODE_TYPECODE),
+    ("strand", STRAND_TYPECODE),
+    ("mapq", MAPQ_TYPECODE),
+)
+"""The name and `array` typecode of the columns of each block, in the order they are
+stored. `tag_offsets` has one more value than there are records in the block."""
+COLUMNS = tuple(name for name, _ in COLUMN_LAYOUT if name != "tag_offsets")
+"""The columns that can be read with `ColumnarPafFile.column`."""
+
+_TRAILER = struct.Struct("<Q8s")
+_ALIGNMENT = 8
+
+
+class InvalidColumnarFormat(Exception):
+    """An exception indicating that a file is not in the expected columnar format."""
+
+    pass
+
+
+def _itemsizes() -> Dict[str, int]:
+    return {typecode: array(typecode).itemsize for _, typecode in COLUMN_LAYOUT}
+
+
+def _source_stat(fileobj: Union[PathLike, IO]) -> Optional[Dict[str, Any]]:
+    if isinstance(fileobj, io.IOBase) or str(fileobj) == "-":
+        return None
+    stat = os.stat(fileobj)
+    return {"path": str(fileobj), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _write_padded(fileobj: IO, data: bytes) -> int:
+    """Write `data` followed by enough zeros to align the next write. Returns the
+    offset `data` was written at."""
+    offset = fileobj.tell()
+    fileobj.write(data)
+    fileobj.write(bytes(-len(data) % _ALIGNMENT))
+    return offset
+
+
+def _write_block(fileobj: IO, store: RecordStore) -> List[int]:
+    offset = fileobj.tell()
+    for name, _ in COLUMN_LAYOUT:
+        getattr(store, name).tofile(fileobj)
+    _write_padded(fileobj, bytes(store.tag_data))
+    return [offset, len(store)]
+
+
+def _write_names(fileobj: IO, names: NameDictionary) -> List[int]:
+    data = "".join(f"{name}\n" for name in names).encode()
+    return [_write_padded(fileobj, data), len(data)]
+
+
+def write_columnar(
+    fileobj: Union[PathLike, IO],
+    output: PathLike,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    **kwargs,
+) -> int:
+    """Convert the PAF file `fileobj` (anything `pafpy.paffile.PafFile` accepts) to a
+    columnar file at `output`, with `block_size` records per block. Any other keyword
+    arguments (e.g. `threads`, `read_ahead`, or `where`) are passed on to `PafFile`.
+    Returns the number of records written.
+
+    Only one block of records is held in memory at a time (plus the names).
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.columnar import ColumnarPafFile, write_columnar
+    from pathlib import Path
+    import tempfile
+
+    records = [PafRecord(qname=f"read{i}", tname="chr1", mapq=i) for i in range(5)]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        path.write_text("\n".join(map(str, records)))
+
+        assert write_columnar(path, f"{path}.pafc", block_size=2) == 5
+
+        with ColumnarPafFile(f"{path}.pafc") as paf:
+            assert len(paf) == 5
+            assert list(paf) == records
+            assert list(paf.column("mapq")) == [0, 1, 2, 3, 4]
+            assert paf.tnames.names == ["chr1"]
+    ```
+
+    ## Errors
+    - If `block_size` is less than 1, a `ValueError` is raised.
+    - See `pafpy.store.RecordStore.extend_lines` for errors raised when parsing.
+    """
+    if block_size < 1:
+        raise ValueError(f"block_size must be at least 1, got {block_size}")
+    source = _source_stat(fileobj)
+    qnames = NameDictionary()
+    tnames = NameDictionary()
+    blocks = []
+    with PafFile(fileobj, **kwargs) as paf, open(output, mode="wb") as out:
+        out.write(COLUMNAR_MAGIC)
+        lines = paf.iter_lines()
+        while True:
+            store = RecordStore()
+            # share the name codes across blocks
+            store._qnames = qnames
+            store._tnames = tnames
+            store.extend_lines(islice(lines, block_size))
+            if not len(store):
+                break
+            blocks.append(_write_block(out, store))
+        footer = {
+            "version": COLUMNAR_VERSION,
+            "byteorder": sys.byteorder,
+            "itemsizes": _itemsizes(),
+            "records": sum(size for _, size in blocks),
+            "blocks": blocks,
+            "qnames": _write_names(out, qnames),
+            "tnames": _write_names(out, tnames),
+            "source": source,
+        }
+        footer_offset = out.tell()
+        out.write(json.dumps(footer).encode())
+        out.write(_TRAILER.pack(footer_offset, COLUMNAR_MAGIC))
+    return footer["records"]
+
+
+def _read_footer(path: PathLike) -> Tuple[Dict[str, Any], List[str], List[str]]:
+    with open(path, mode="rb") as fileobj:
+        size = fileobj.seek(0, os.SEEK_END)
+        fileobj.seek(0)
+        magic = fileobj.read(len(COLUMNAR_MAGIC))
+        if magic != COLUMNAR_MAGIC or size < len(magic) + _TRAILER.size:
+            raise InvalidColumnarFormat(f"{path} is not a columnar PAF file.")
+        fileobj.seek(size - _TRAILER.size)
+        footer_offset, magic = _TRAILER.unpack(fileobj.read(_TRAILER.size))
+        if magic != COLUMNAR_MAGIC or footer_offset > size - _TRAILER.size:
+            raise InvalidColumnarFormat(f"{path} is truncated or corrupt.")
+        fileobj.seek(footer_offset)
+        try:
+            footer = json.loads(fileobj.read(size - _TRAILER.size - footer_offset))
+        except ValueError:
+            raise InvalidColumnarFormat(f"{path} has a corrupt footer.") from None
+        if footer.get("version") != COLUMNAR_VERSION:
+            raise InvalidColumnarFormat(
+                f"{path} has format version {footer.get('version')}, but only "
+                f"version {COLUMNAR_VERSION} is supported."
+            )
+        if footer["itemsizes"] != _itemsizes():
+            raise InvalidColumnarFormat(
+                f"{path} was written with column sizes {footer['itemsizes']}, which "
+                f"differ from those of this machine ({_itemsizes()})."
+            )
+        names = []
+        for key in ("qnames", "tnames"):
+            offset, length = footer[key]
+            fileobj.seek(offset)
+            names.append(fileobj.read(length).decode().split("\n")[:-1])
+    return footer, names[0], names[1]
+
+
+def _name_dictionary(names: List[str]) -> NameDictionary:
+    dictionary = NameDictionary()
+    for name in names:
+        dictionary.code(name)
+    return dictionary
+
+
+class ColumnarPafFile:
+    """Read access to a columnar PAF file written by `write_columnar`.
+
+    The file's footer and names are read when the `ColumnarPafFile` is constructed.
+    As with `pafpy.paffile.PafFile`, the file must then be opened - with
+    `ColumnarPafFile.open` or a context manager (`with`) block - before it can be
+    iterated over. The file is memory-mapped, and each block is read from the map as it
+    is needed.
+
+    Iterating returns `pafpy.pafrecord.PafRecord`s, equal to those a `PafFile` would
+    return for the original file. The names of all records are shared `str` objects
+    from `ColumnarPafFile.qnames` and `ColumnarPafFile.tnames`. If `lazy_tags` is
+    `True`, tags are only parsed when they are accessed (see
+    `pafpy.pafrecord.PafRecord.from_str`).
+
+    ## Errors
+    - If `path` does not exist, an `OSError` exception is raised.
+    - If `path` is not a columnar file, or was written on a machine with different
+    column sizes, an `InvalidColumnarFormat` exception is raised.
+    """
+
+    def __init__(self, path: PathLike, lazy_tags: bool = False):
+        self.path = Path(path)
+        """Path to the columnar file."""
+        self.lazy_tags = lazy_tags
+        """Whether tags are parsed lazily for each record."""
+        self._file: Optional[IO] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._records: Optional[Iterator[PafRecord]] = None
+        footer, qnames, tnames = _read_footer(self.path)
+        self._blocks: List[Tuple[int, int]] = [tuple(b) for b in footer["blocks"]]
+        self._swap = footer["byteorder"] != sys.byteorder
+        self._num_records: int = footer["records"]
+        self.source: Optional[Dict[str, Any]] = footer["source"]
+        """The `path`, `size`, and `mtime_ns` (modification time in nanoseconds) of the
+        PAF file the columnar file was written from, when it was written (`None` if it
+        was not written from a path)."""
+        self.qnames = _name_dictionary(qnames)
+        """The query names, indexed by the codes in the `qname` column."""
+        self.tnames = _name_dictionary(tnames)
+        """The target names, indexed by the codes in the `tname` column."""
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self) -> "ColumnarPafFile":
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def __iter__(self) -> "ColumnarPafFile":
+        return self
+
+    def __next__(self) -> PafRecord:
+        self._ensure_open()
+        return next(self._records)
+
+    def _ensure_open(self):
+        if self.closed:
+            raise IOError("Columnar PAF file is closed - cannot read records.")
+
+    @property
+    def closed(self) -> bool:
+        """Is the file closed?"""
+        return self._mmap is None
+
+    def open(self) -> "ColumnarPafFile":
+        """Open (memory-map) the file to allow iterating over the records. Returns the
+        `ColumnarPafFile`. If the file is already open, iteration restarts from the
+        first record."""
+        if self.closed:
+            self._file = open(self.path, mode="rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._records = self._iter_records()
+        return self
+
+    def close(self):
+        """Close the file."""
+        if not self.closed:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+            self._records = None
+
+    def _read_columns(
+        self, offset: int, size: int, names: Iterable[str]
+    ) -> Dict[str, Any]:
+        """Read the columns `names` (and/or `"tags"`) of the block of `size` records
+        at `offset`."""
+        wanted = set(names)
+        columns: Dict[str, Any] = {}
+        position = offset
+        for name, typecode in COLUMN_LAYOUT:
+            column = array(typecode)
+            end = position + column.itemsize * (size + (name == "tag_offsets"))
+            if name in wanted or (name == "tag_offsets" and "tags" in wanted):
+                column.frombytes(self._mmap[position:end])
+                if self._swap:
+                    column.byteswap()
+                columns[name] = column
+            position = end
+        if "tags" in wanted:
+            end = position + columns["tag_offsets"][-1]
+            columns["tags"] = self._mmap[position:end]
+        return columns
+
+    def _iter_records(self) -> Iterator[PafRecord]:
+        qnames = self.qnames.names
+        tnames = self.tnames.names
+        lazy_tags = self.lazy_tags
+        names = [name for name, _ in COLUMN_LAYOUT] + ["tags"]
+        for offset, size in self._blocks:
+            columns = self._read_columns(offset, size, names)
+            tags = columns["tags"]
+            offsets = columns["tag_offsets"]
+            record_tags = (
+                _tags_from_bytes(tags[start:end], lazy_tags) if end > start else None
+                for start, end in zip(offsets, islice(offsets, 1, None))
+            )
+            yield from map(
+                PafRecord,
+                map(qnames.__getitem__, columns["qname"]),
+                columns["qlen"],
+                columns["qstart"],
+                columns["qend"],
+                map(_CODE_TO_STRAND.__getitem__, columns["strand"]),
+                map(tnames.__getitem__, columns["tname"]),
+                columns["tlen"],
+                columns["tstart"],
+                columns["tend"],
+                columns["mlen"],
+                columns["blen"],
+                columns["mapq"],
+                record_tags,
+            )
+
+    def column(self, name: str) -> array:
+        """All values of the column `name` (one of `COLUMNS`), without creating any
+        records. `qname` and `tname` are codes into `ColumnarPafFile.qnames` and
+        `ColumnarPafFile.tnames`, and `strand` is encoded as per
+        `pafpy.batch.STRAND_CODES`.
+
+        ## Errors
+        - If `name` is not one of `COLUMNS`, a `ValueError` is raised.
+        - If the file is closed, an `IOError` is raised.
+        """
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown column {name!r}. Expected one of {COLUMNS}")
+        self._ensure_open()
+        values = array(dict(COLUMN_LAYOUT)[name])
+        for offset, size in self._blocks:
+            values.extend(self._read_columns(offset, size, [name])[name])
+        return values
+
+    def iter_batches(self) -> Iterator[PafBatch]:
+        """Iterate over all of the records in the file as `pafpy.batch.PafBatch`es,
+        one per block of the file. The name codes of all batches refer to the same
+        (shared) categories.
+
+        ## Errors
+        If the file is closed, an `IOError` is raised.
+        """
+        self._ensure_open()
+        for offset, size in self._blocks:
+            batch = PafBatch(self.qnames.names, self.tnames.names)
+            for name, column in self._read_columns(offset, size, COLUMNS).items():
+                setattr(batch, name, column)
+            yield batch
+
+    def group_by_query(
+        self, reducer: Optional[Reducer] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """Iterate over `(qname, records)` for the (remaining) records of each query.
+        See `pafpy.paffile.PafFile.group_by_query`."""
+        groups = group_by_query(self)
+        if reducer is None:
+            return groups
+        return ((qname, reducer(records)) for qname, records in groups)
+
+
+def cache_path(path: PathLike, cache_dir: Optional[PathLike] = None) -> Path:
+    """The path of the columnar cache of the PAF file `path` (see `open_cached`). If
+    `cache_dir` is `None`, this is `path` with `COLUMNAR_SUFFIX` appended; otherwise, it
+    is a file in `cache_dir` named after `path` and a hash of its absolute path."""
+    path = Path(path)
+    if cache_dir is None:
+        return path.with_name(path.name + COLUMNAR_SUFFIX)
+    digest = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"{path.name}.{digest}{COLUMNAR_SUFFIX}"
+
+
+def _is_current(columnar: ColumnarPafFile, path: Path) -> bool:
+    source = columnar.source
+    if source is None:
+        return False
+    stat = path.stat()
+    return source["size"] == stat.st_size and source["mtime_ns"] == stat.st_mtime_ns
+
+
+def open_cached(
+    path: PathLike,
+    cache_dir: Optional[PathLike] = None,
+    lazy_tags: bool = False,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    threads: int = 0,
+) -> ColumnarPafFile:
+    """Open the PAF file at `path` through a columnar cache, converting it (see
+    `write_columnar`) if there is no cache for it yet, or if the size or modification
+    time of `path` have changed since the cache was written. The cache is written to
+    `cache_path(path, cache_dir)`. `threads` is as for `pafpy.paffile.PafFile`.
+
+    The returned `ColumnarPafFile` is open, and yields the same records as a
+    `pafpy.paffile.PafFile` of `path`. The cache is written to a temporary file first,
+    so that an interrupted conversion never leaves an incomplete cache behind.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.columnar import cache_path, open_cached
+    from pathlib import Path
+    import tempfile
+
+    records = [PafRecord(qname=f"read{i}", tname="chr1") for i in range(5)]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        path.write_text("\n".join(map(str, records)))
+
+        with open_cached(path) as paf:  # converts the file
+            assert list(paf) == records
+        assert cache_path(path).exists()
+
+        with open_cached(path) as paf:  # reuses the cache
+            assert list(paf) == records
+    ```
+
+    ## Errors
+    - If `path` does not exist, an `OSError` exception is raised.
+    - See `write_columnar` for errors raised when converting the file.
+    """
+    path = Path(path)
+    cached = cache_path(path, cache_dir)
+    try:
+        columnar = ColumnarPafFile(cached, lazy_tags=lazy_tags)
+        if _is_current(columnar, path):
+            return columnar.open()
+    except (FileNotFoundError, InvalidColumnarFormat):
+        pass
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    temporary = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        write_columnar(path, temporary, block_size=block_size, threads=threads)
+        os.replace(temporary, cached)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+    return ColumnarPafFile(cached, lazy_tags=lazy_tags).open()
@@ -0,0 +1,256 @@
+"""This module contains objects for computing the depth of coverage along each target
+sequence of a PAF file.
+
+The main class of interest is `pafpy.coverage.Coverage`. Rather than incrementing the
+depth of every base covered by each alignment, it records where alignments start and
+end in [difference arrays](https://en.wikipedia.org/wiki/Prefix_sum) - a constant
+amount of work per alignment, regardless of its length. The depths are only computed,
+with a single cumulative sum per target, when they are requested.
+
+```py
+from pafpy.coverage import Coverage
+```
+"""
+import io
+import os
+from array import array
+from itertools import accumulate, groupby, repeat
+from operator import add, mul, truediv
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from pafpy.filters import col, tag
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import PafRecord
+from pafpy.strand import Strand
+
+PathLike = Union[Path, str, os.PathLike]
+Interval = Tuple[str, int, int, Union[int, float]]
+
+COUNT_TYPECODE = "q"
+"""The `array` typecode used for per-base depths and counts (signed 64-bit)."""
+DEPTH_TYPECODE = "d"
+"""The `array` typecode used for the mean depth of bins (double)."""
+
+
+class Coverage:
+    """The depth of coverage along each target sequence, from the target intervals
+    (`tstart` to `tend`) of alignments.
+
+    If `bin_size` is 1 (default), depth is per base. Otherwise, each target is split
+    into bins of `bin_size` bases (the last bin may be shorter) and the depth of a bin
+    is the mean depth of its bases - i.e. the number of aligned bases that fall in the
+    bin divided by its length. Alignments that only partly overlap a bin contribute
+    just the overlapping bases.
+
+    The arrays for a target are sized from its length (`tlen`) when the first
+    alignment to it is added. Depths are returned as
+    [`array`](https://docs.python.org/3/library/array.html)s, which support the buffer
+    protocol, so they can be wrapped without copying by libraries such as NumPy (e.g.
+    `numpy.frombuffer(coverage.depth("chr1"), dtype=numpy.int64)`).
+
+    ## Example
+    ```py
+    from pafpy.coverage import Coverage
+
+    coverage = Coverage()
+    coverage.add("chr1", 10, 2, 6)
+    coverage.add("chr1", 10, 4, 10)
+
+    assert list(coverage.depth("chr1")) == [0, 0, 1, 1, 2, 2, 1, 1, 1, 1]
+
+    binned = Coverage(bin_size=4)
+    binned.add("chr1", 10, 2, 6)
+    binned.add("chr1", 10, 4, 10)
+
+    assert list(binned.depth("chr1")) == [0.5, 1.5, 1.0]
+    assert list(binned.intervals()) == [
+        ("chr1", 0, 4, 0.5),
+        ("chr1", 4, 8, 1.5),
+        ("chr1", 8, 10, 1.0),
+    ]
+    ```
+
+    ## Errors
+    If `bin_size` is less than 1, a `ValueError` is raised.
+    """
+
+    def __init__(self, bin_size: int = 1):
+        if bin_size < 1:
+            raise ValueError(f"bin_size must be at least 1, got {bin_size}")
+        self.bin_size = bin_size
+        """The number of bases in each bin."""
+        self.lengths: Dict[str, int] = {}
+        """The length of each target with coverage, in the order they were first
+        seen."""
+        # the number of bases in each bin covered by alignments that only partly
+        # overlap it, and a difference array of the number of alignments that cover
+        # each bin completely
+        self._partial: Dict[str, array] = {}
+        self._complete: Dict[str, array] = {}
+
+    def __contains__(self, tname: object) -> bool:
+        return tname in self.lengths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lengths)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def _arrays(self, tname: str, tlen: int) -> Tuple[array, array]:
+        length = self.lengths.get(tname)
+        if length is None:
+            num_bins = -(-tlen // self.bin_size)
+            self.lengths[tname] = tlen
+            self._partial[tname] = array(COUNT_TYPECODE, [0]) * num_bins
+            self._complete[tname] = array(COUNT_TYPECODE, [0]) * (num_bins + 1)
+        elif length != tlen:
+            raise ValueError(
+                f"Target {tname} has length {tlen}, but was previously seen with "
+                f"length {length}"
+            )
+        return self._partial[tname], self._complete[tname]
+
+    def add(self, tname: str, tlen: int, tstart: int, tend: int):
+        """Add the alignment of the interval `tstart` to `tend` (0-based, half-open) of
+        the target `tname`, which has length `tlen`.
+
+        ## Errors
+        If the interval is not within the target, or `tlen` differs from the length of
+        previous alignments to `tname`, a `ValueError` is raised.
+        """
+        if not 0 <= tstart <= tend <= tlen:
+            raise ValueError(
+                f"Invalid interval {tname}:{tstart}-{tend} (length {tlen})"
+            )
+        partial, complete = self._arrays(tname, tlen)
+        if tstart == tend:
+            return
+        size = self.bin_size
+        first = tstart // size
+        last = (tend - 1) // size
+        if first == last:
+            partial[first] += tend - tstart
+            return
+        partial[first] += (first + 1) * size - tstart
+        partial[last] += tend - last * size
+        complete[first + 1] += 1
+        complete[last] -= 1
+
+    def update(self, records: Iterable[PafRecord]):
+        """Add the alignments of many records. Unmapped records are skipped.
+
+        ## Errors
+        See `Coverage.add`.
+        """
+        add_interval = self.add
+        for record in records:
+            if record.strand is not Strand.Unmapped:
+                add_interval(record.tname, record.tlen, record.tstart, record.tend)
+
+    def depth(self, tname: str) -> array:
+        """The depth of each base (`bin_size` is 1) or the mean depth of each bin of
+        `tname`. Per-base depths are integers (typecode `COUNT_TYPECODE`); bin depths
+        are floats (typecode `DEPTH_TYPECODE`).
+
+        ## Errors
+        If there is no coverage of `tname`, a `KeyError` is raised.
+        """
+        partial = self._partial[tname]
+        complete = accumulate(self._complete[tname])
+        size = self.bin_size
+        if size == 1:
+            return array(COUNT_TYPECODE, map(add, partial, complete))
+        bases = map(add, partial, map(mul, complete, repeat(size)))
+        depths = array(DEPTH_TYPECODE, map(truediv, bases, repeat(size)))
+        # the last bin is shorter if the length is not a multiple of the bin size, and
+        # it is never covered completely, so only holds partial bases
+        last_size = self.lengths[tname] - (len(depths) - 1) * size
+        if depths and last_size != size:
+            depths[-1] = partial[-1] / last_size
+        return depths
+
+    def to_arrays(self) -> Dict[str, array]:
+        """The depths (see `Coverage.depth`) of every target."""
+        return {tname: self.depth(tname) for tname in self.lengths}
+
+    def intervals(self, tname: Optional[str] = None) -> Iterator[Interval]:
+        """Iterate over `(tname, start, end, depth)` for the runs of consecutive bases
+        (or bins) with the same depth in `tname`, or in every target if `tname` is
+        `None`. Zero-depth runs are included, so the intervals cover each target."""
+        tnames = self.lengths if tname is None else [tname]
+        for name in tnames:
+            length = self.lengths[name]
+            start = 0
+            for depth, run in groupby(self.depth(name)):
+                end = min(start + sum(1 for _ in run) * self.bin_size, length)
+                yield name, start, end, depth
+                start = end
+
+    def write_bedgraph(self, fileobj: Union[PathLike, IO]):
+        """Write the depths (see `Coverage.intervals`) in
+        [bedGraph](https://genome.ucsc.edu/goldenPath/help/bedgraph.html) format.
+        `fileobj` is a path or a file object opened in text mode."""
+        if isinstance(fileobj, io.IOBase):
+            stream, owns_file = fileobj, False
+        else:
+            stream, owns_file = open(fileobj, mode="w"), True
+        try:
+            for tname, start, end, depth in self.intervals():
+                stream.write(f"{tname}\t{start}\t{end}\t{depth:g}\n")
+        finally:
+            if owns_file:
+                stream.close()
+
+    @staticmethod
+    def from_paf(
+        fileobj: Union[PathLike, IO],
+        bin_size: int = 1,
+        min_mapq: int = 0,
+        primary_only: bool = False,
+        **kwargs,
+    ) -> "Coverage":
+        """Compute the coverage of the alignments in a PAF file. `fileobj` is anything
+        `pafpy.paffile.PafFile` accepts, and any other keyword arguments (e.g.
+        `threads`) are passed on to it.
+
+        Only alignments with a mapping quality of at least `min_mapq` are counted. If
+        `primary_only` is `True`, only primary alignments (`tp:A:P`) are counted.
+        Unmapped records are always skipped. The filters are applied to the raw lines
+        (see `pafpy.filters`) and only the target fields of the remaining lines are
+        parsed (see `pafpy.projection`).
+
+        ## Example
+        ```py
+        from pafpy import PafRecord, Strand, Tag
+        from pafpy.coverage import Coverage
+        from pathlib import Path
+        import tempfile
+
+        records = [
+            PafRecord(tname="chr1", tlen=8, tstart=0, tend=6, mapq=60, strand=Strand.Forward, tags={"tp": Tag.from_str("tp:A:P")}),
+            PafRecord(tname="chr1", tlen=8, tstart=2, tend=8, mapq=0, strand=Strand.Forward, tags={"tp": Tag.from_str("tp:A:P")}),
+            PafRecord(tname="chr1", tlen=8, tstart=4, tend=8, mapq=60, strand=Strand.Forward, tags={"tp": Tag.from_str("tp:A:S")}),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+
+            coverage = Coverage.from_paf(path, min_mapq=30, primary_only=True)
+
+        assert list(coverage.depth("chr1")) == [1, 1, 1, 1, 1, 1, 0, 0]
+        ```
+        """
+        where = col("strand") != Strand.Unmapped.value
+        if min_mapq > 0:
+            where = where & (col("mapq") >= min_mapq)
+        if primary_only:
+            where = where & tag("tp").isin({"P", "p"})
+        coverage = Coverage(bin_size=bin_size)
+        fields = ["tname", "tlen", "tstart", "tend"]
+        with PafFile(fileobj, where=where, fields=fields, **kwargs) as paf:
+            add_interval = coverage.add
+            for tname, tlen, tstart, tend in paf:
+                add_interval(tname, tlen, tstart, tend)
+        return coverage
@@ -0,0 +1,250 @@
+"""This module contains declarative conditions for filtering PAF records before they are
+parsed.
+
+Conditions are built from `pafpy.filters.col` (a mandatory field or a derived metric)
+and `pafpy.filters.tag` (the value of a tag) with the comparison operators (`==`,
+`!=`, `<`, `<=`, `>`, `>=`) and `isin`, and combined with `&` (and), `|` (or), and `~`
+(not). A condition is evaluated on the raw, split fields of a line, so only the fields
+it uses are converted and no `pafpy.pafrecord.PafRecord` (or `pafpy.tag.Tag`) is built
+for lines that are thrown away. Conditions are usually passed to
+`pafpy.paffile.PafFile` via `where`.
+
+```py
+from pafpy.filters import col, tag
+
+where = (col("mapq") >= 30) & (tag("tp") == "P") & (col("blast_identity") > 0.9)
+```
+"""
+import operator
+from typing import Any, Callable, Collection, List, Optional
+
+from pafpy.pafrecord import MIN_FIELDS
+from pafpy.strand import Strand
+from pafpy.tag import _find_raw_tag
+
+Fields = List[bytes]
+Getter = Callable[[Fields], Any]
+
+NAME_FIELDS = {"qname": 0, "strand": 4, "tname": 5}
+"""The mandatory fields that are compared as strings, and their (0-based) index."""
+INT_FIELDS = {
+    "qlen": 1,
+    "qstart": 2,
+    "qend": 3,
+    "tlen": 6,
+    "tstart": 7,
+    "tend": 8,
+    "mlen": 9,
+    "blen": 10,
+    "mapq": 11,
+}
+"""The mandatory fields that are compared as integers, and their (0-based) index."""
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def _query_aligned_length(fields: Fields) -> int:
+    return abs(int(fields[3]) - int(fields[2]))
+
+
+def _target_aligned_length(fields: Fields) -> int:
+    return abs(int(fields[8]) - int(fields[7]))
+
+
+DERIVED_FIELDS = {
+    "query_aligned_length": _query_aligned_length,
+    "target_aligned_length": _target_aligned_length,
+    "query_coverage": lambda f: _ratio(_query_aligned_length(f), int(f[1])),
+    "target_coverage": lambda f: _ratio(_target_aligned_length(f), int(f[6])),
+    "relative_length": lambda f: _ratio(
+        _query_aligned_length(f), _target_aligned_length(f)
+    ),
+    "blast_identity": lambda f: _ratio(int(f[9]), int(f[10])),
+}
+"""The derived metrics (see `pafpy.pafrecord.PafRecord`) that can be used with `col`,
+and how they are computed from the raw fields."""
+
+
+def _encode(value: Any) -> Any:
+    """Convert a constant into the form it is compared in - strings as bytes."""
+    if isinstance(value, Strand):
+        value = value.value
+    return value.encode() if isinstance(value, str) else value
+
+
+class Condition:
+    """A condition on the raw fields of a PAF line. Calling it with the fields of a
+    line (split on `b"\t"`, with all tags left in the 13th field) returns whether the
+    line matches.
+
+    Conditions are created by comparing an `Expression` and are combined with `&`,
+    `|`, and `~`. Python's `and`, `or`, `not`, and chained comparisons (e.g.
+    `0 < col("mapq") < 60`) cannot be used with conditions and raise a `TypeError`.
+
+    ## Example
+    ```py
+    from pafpy.filters import col, tag
+
+    line = b"read1\t10\t0\t10\t+\tchr1\t100\t0\t10\t9\t10\t60\ttp:A:P\tNM:i:1"
+    fields = line.split(b"\t", 12)
+
+    assert (col("mapq") >= 30)(fields)
+    assert ((col("tname") == "chr2") | (tag("NM") < 2))(fields)
+    assert not (~col("tname").isin({"chr1", "chr3"}))(fields)
+    ```
+    """
+
+    __slots__ = ("_func", "_description")
+
+    def __init__(self, func: Callable[[Fields], bool], description: str):
+        self._func = func
+        self._description = description
+
+    def __call__(self, fields: Fields) -> bool:
+        return self._func(fields)
+
+    def __repr__(self) -> str:
+        return self._description
+
+    def __bool__(self):
+        raise TypeError(
+            f"The truth value of the condition {self!r} is ambiguous. Combine "
+            "conditions with &, |, and ~ rather than and, or, and not."
+        )
+
+    def __and__(self, other: "Condition") -> "Condition":
+        left, right = self._func, other._func
+        return Condition(
+            lambda fields: left(fields) and right(fields), f"({self!r} & {other!r})"
+        )
+
+    def __or__(self, other: "Condition") -> "Condition":
+        left, right = self._func, other._func
+        return Condition(
+            lambda fields: left(fields) or right(fields), f"({self!r} | {other!r})"
+        )
+
+    def __invert__(self) -> "Condition":
+        func = self._func
+        return Condition(lambda fields: not func(fields), f"~{self!r}")
+
+    def matches(self, line: bytes) -> bool:
+        """Does the (raw) PAF `line` match the condition?"""
+        return self._func(line.rstrip().split(b"\t", MIN_FIELDS))
+
+
+class Expression:
+    """A value taken from the raw fields of a PAF line. Comparing an expression with a
+    constant creates a `Condition`. Use `col` or `tag` to create an expression.
+
+    A `str` constant (or `pafpy.strand.Strand`) is encoded once, when the condition is
+    created, and compared against the raw bytes of the field. A missing tag never
+    matches a comparison.
+    """
+
+    __slots__ = ("_getter", "_name")
+
+    def __init__(self, getter: Getter, name: str):
+        self._getter = getter
+        self._name = name
+
+    def __repr__(self) -> str:
+        return self._name
+
+    def _compare(self, op: Callable[[Any, Any], bool], symbol: str, value: Any):
+        getter = self._getter
+        constant = _encode(value)
+
+        def func(fields: Fields) -> bool:
+            actual = getter(fields)
+            if actual is None:
+                return False
+            try:
+                return op(actual, constant)
+            except TypeError:  # e.g. comparing a string tag with a number
+                return False
+
+        return Condition(func, f"{self!r} {symbol} {value!r}")
+
+    def __eq__(self, value: Any) -> Condition:
+        return self._compare(operator.eq, "==", value)
+
+    def __ne__(self, value: Any) -> Condition:
+        return self._compare(operator.ne, "!=", value)
+
+    def __lt__(self, value: Any) -> Condition:
+        return self._compare(operator.lt, "<", value)
+
+    def __le__(self, value: Any) -> Condition:
+        return self._compare(operator.le, "<=", value)
+
+    def __gt__(self, value: Any) -> Condition:
+        return self._compare(operator.gt, ">", value)
+
+    def __ge__(self, value: Any) -> Condition:
+        return self._compare(operator.ge, ">=", value)
+
+    __hash__ = None
+
+    def isin(self, values: Collection[Any]) -> Condition:
+        """A condition that is `True` if the value is one of `values`."""
+        getter = self._getter
+        constants = frozenset(map(_encode, values))
+        return Condition(
+            lambda fields: getter(fields) in constants, f"{self!r}.isin({values!r})"
+        )
+
+
+def col(name: str) -> Expression:
+    """An expression for the mandatory field `name` (e.g. `"mapq"` or `"tname"` - see
+    `pafpy.pafrecord.PafRecord`), or one of the derived metrics in `DERIVED_FIELDS`
+    (e.g. `"blast_identity"`).
+
+    ## Errors
+    If `name` is not a field or derived metric, a `ValueError` is raised.
+    """
+    if name in NAME_FIELDS:
+        index = NAME_FIELDS[name]
+        return Expression(operator.itemgetter(index), name)
+    if name in INT_FIELDS:
+        index = INT_FIELDS[name]
+        return Expression(lambda fields: int(fields[index]), name)
+    if name in DERIVED_FIELDS:
+        return Expression(DERIVED_FIELDS[name], name)
+    raise ValueError(f"Unknown field {name!r}")
+
+
+def _tag_value(tags: bytes, key: bytes, tab_key: bytes) -> Optional[Any]:
+    raw = _find_raw_tag(tags, key, tab_key)
+    if raw is None:
+        return None
+    tag_type = raw[:1]
+    value = raw[2:]
+    if tag_type == b"i":
+        return int(value)
+    if tag_type == b"f":
+        return float(value)
+    return value
+
+
+def tag(name: str) -> Expression:
+    """An expression for the value of the tag `name` (e.g. `"tp"` or `"NM"`).
+    Integer (`i`) and float (`f`) values are converted to numbers; other values are
+    compared as strings. If a record does not have the tag, any comparison is `False`.
+
+    ## Errors
+    If `name` is not two characters, a `ValueError` is raised.
+    """
+    if len(name) != 2:
+        raise ValueError(f"Tag names are two characters, got {name!r}")
+    key = f"{name}:".encode()
+    tab_key = b"\t" + key
+
+    def getter(fields: Fields) -> Optional[Any]:
+        if len(fields) <= MIN_FIELDS:
+            return None
+        return _tag_value(fields[MIN_FIELDS], key, tab_key)
+
+    return Expression(getter, f"tag({name!r})")
@@ -0,0 +1,106 @@
+"""This module contains functions for processing the alignments of each query together.
+
+Aligners such as minimap2 write all of the alignments for a query next to each other,
+so `pafpy.grouping.group_by_query` can collect them in a single streaming pass, only
+ever holding the alignments of one query in memory. The reducers (`best_by`, `top_k`,
+and `primary_only`) turn each group into the records of interest - e.g. the best hit
+of each query.
+
+```py
+from pafpy.grouping import best_by, group_by_query, primary_only, top_k
+```
+"""
+import heapq
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
+
+from pafpy.pafrecord import PafRecord
+
+Key = Union[str, Callable[[PafRecord], Any]]
+Reducer = Callable[[List[PafRecord]], Any]
+
+
+def group_by_query(
+    records: Iterable[PafRecord],
+) -> Iterator[Tuple[str, List[PafRecord]]]:
+    """Iterate over `(qname, records)` for each run of consecutive records with the same
+    query name.
+
+    Only one group is held in memory at a time. The records for a query must be next to
+    each other (as minimap2 outputs them) - if they are not, the query is returned in
+    more than one group.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.grouping import group_by_query
+
+    records = [PafRecord(qname=name) for name in ("read1", "read1", "read2")]
+    groups = list(group_by_query(records))
+
+    assert [qname for qname, _ in groups] == ["read1", "read2"]
+    assert groups[0][1] == records[:2]
+    ```
+    """
+    for qname, group in groupby(records, key=attrgetter("qname")):
+        yield qname, list(group)
+
+
+def _key_func(key: Key) -> Callable[[PafRecord], Any]:
+    if callable(key):
+        return key
+    attribute = getattr(PafRecord, key, None)
+    if attribute is None:
+        raise ValueError(f"PafRecord has no field or metric {key!r}")
+    if callable(attribute):  # a method, e.g. blast_identity
+        return lambda record: getattr(record, key)()
+    return attrgetter(key)
+
+
+def best_by(key: Key) -> Callable[[List[PafRecord]], PafRecord]:
+    """A reducer that returns the record of a group with the largest `key`. `key` is the
+    name of a field, property, or method of `pafpy.pafrecord.PafRecord` (e.g. `"mlen"`,
+    `"mapq"`, `"query_coverage"`, or `"blast_identity"`), or a function of a record. If
+    several records share the largest value, the first of them is returned.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.grouping import best_by
+
+    group = [PafRecord(mlen=5, blen=10), PafRecord(mlen=8, blen=10)]
+
+    assert best_by("mlen")(group) is group[1]
+    assert best_by("blast_identity")(group) is group[1]
+    ```
+
+    ## Errors
+    If `key` is a name that `PafRecord` does not have, a `ValueError` is raised.
+    """
+    func = _key_func(key)
+    return lambda records: max(records, key=func)
+
+
+def top_k(k: int, key: Key) -> Callable[[List[PafRecord]], List[PafRecord]]:
+    """A reducer that returns (at most) the `k` records of a group with the largest
+    `key` (see `best_by`), in descending order.
+
+    ## Errors
+    - If `k` is less than 1, a `ValueError` is raised.
+    - If `key` is a name that `PafRecord` does not have, a `ValueError` is raised.
+    """
+    if k < 1:
+        raise ValueError(f"k must be at least 1, got {k}")
+    func = _key_func(key)
+    return lambda records: heapq.nlargest(k, records, key=func)
+
+
+def primary_only(records: List[PafRecord]) -> List[PafRecord]:
+    """A reducer that returns the primary alignments of a group. See
+    `pafpy.pafrecord.PafRecord.is_primary`.
+
+    ## Errors
+    If a mapped record has no `tp` tag, a `ValueError` is raised.
+    """
+    return [record for record in records if record.is_primary()]
@@ -0,0 +1,452 @@
+"""This module contains sidecar indices that allow records in a PAF file to be fetched
+without reading the whole file.
+
+There are two indices:
+
+- `pafpy.index.QueryIndex` maps each query name to the offsets of its records. It is
+  usually used via `pafpy.paffile.PafFile.build_query_index` and
+  `pafpy.paffile.PafFile.fetch_query`.
+- `pafpy.index.TargetIndex` is a [tabix][tabix]-like binning index over the target
+  coordinates of each record. It is usually used via
+  `pafpy.paffile.PafFile.build_target_index` and `pafpy.paffile.PafFile.fetch`.
+
+Indices can only be built for uncompressed or [BGZF][bgzf]-compressed (i.e. `bgzip`)
+files, as regular `gzip` files do not support random access. For BGZF files, the
+offsets are virtual offsets (see `pafpy.bgzf`).
+
+> *Note: an index is only valid for the file it was built from. If the file changes,
+the index must be rebuilt.*
+
+```py
+from pafpy.index import QueryIndex, TargetIndex
+```
+
+[bgzf]: https://samtools.github.io/hts-specs/SAMv1.pdf
+[tabix]: https://samtools.github.io/hts-specs/tabix.pdf
+"""
+import os
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from pafpy.bgzf import BgzfReader
+from pafpy.pafrecord import MIN_FIELDS, MalformattedRecord
+from pafpy.utils import is_bgzf, is_compressed
+
+PathLike = Union[Path, str, os.PathLike]
+
+QUERY_INDEX_SUFFIX = ".qidx"
+"""The suffix appended to the path of a PAF file to get the default path of its
+`QueryIndex`."""
+QUERY_INDEX_HEADER = "##pafpy-qidx\tv1"
+POSITION_TYPECODE = "Q"
+"""The `array` typecode used for the positions of the entries in a loaded
+`QueryIndex` (unsigned 64-bit)."""
+TARGET_INDEX_SUFFIX = ".tidx"
+"""The suffix appended to the path of a PAF file to get the default path of its
+`TargetIndex`."""
+TARGET_INDEX_MAGIC = "##pafpy-tidx\tv1"
+MIN_SHIFT = 14
+"""The log2 of the size of the smallest bin (16 kbp) in a `TargetIndex`."""
+DEPTH = 6
+"""The number of levels below the root bin in a `TargetIndex`. With `MIN_SHIFT` this
+covers target sequences of up to 2^32 bp."""
+
+Entry = Tuple[int, int, int]
+
+
+class MissingIndex(Exception):
+    """An exception indicating that a required index file does not exist."""
+
+    pass
+
+
+class InvalidIndexFormat(Exception):
+    """An exception indicating that an index file is not in the expected format."""
+
+    pass
+
+
+def iter_line_offsets(path: PathLike) -> Iterator[Tuple[int, bytes]]:
+    """Iterate over the lines of a PAF file, yielding the offset of each line (see
+    `pafpy.paffile.PafFile.tell`) along with the raw line.
+
+    ## Errors
+    If the file is `gzip`-compressed but not BGZF-compressed, a `ValueError` is raised.
+    """
+    with open(path, mode="rb") as fileobj:
+        file_is_bgzf = is_bgzf(fileobj)
+        if is_compressed(fileobj) and not file_is_bgzf:
+            raise ValueError(
+                f"Cannot index {path} as it is gzip-compressed. Use bgzip instead."
+            )
+
+    stream = BgzfReader(path) if file_is_bgzf else open(path, mode="rb")
+    with stream:
+        while True:
+            offset = stream.tell()
+            line = stream.readline()
+            if not line:
+                return
+            yield offset, line
+
+
+class QueryIndex:
+    """An index mapping each query name (`qname`) in a PAF file to the offsets of its
+    records.
+
+    An index built with `QueryIndex.build` is held in memory. An index read with
+    `QueryIndex.load` only holds a sorted directory of the query names in memory and
+    reads the offsets of a name from disk when they are needed.
+
+    ## Example
+    ```py
+    from pafpy import PafFile, PafRecord
+    from pafpy.index import QueryIndex
+    from pathlib import Path
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        records = [PafRecord(qname=name) for name in ["read1", "read2", "read1"]]
+        path.write_text("\n".join(map(str, records)))
+
+        index = QueryIndex.build(path)
+        index.save(f"{path}.qidx")
+        index = QueryIndex.load(f"{path}.qidx")
+
+        assert len(index) == 2
+        assert index["read1"] == [0, 2 * (len(str(records[0])) + 1)]
+        assert index.get("read3") == []
+    ```
+    """
+
+    def __init__(self, offsets: Optional[Dict[str, List[int]]] = None):
+        self._offsets: Dict[str, List[int]] = offsets if offsets is not None else {}
+        self._names: List[str] = []
+        self._positions = array(POSITION_TYPECODE)
+        self._path: Optional[PathLike] = None
+
+    def __getitem__(self, qname: str) -> List[int]:
+        if self._path is None:
+            return self._offsets[qname]
+
+        i = bisect_left(self._names, qname)
+        if i == len(self._names) or self._names[i] != qname:
+            raise KeyError(qname)
+        with open(self._path, mode="rb") as fileobj:
+            fileobj.seek(self._positions[i])
+            line = fileobj.readline()
+        return list(map(int, line.split(b",")))
+
+    def __contains__(self, qname: object) -> bool:
+        if self._path is None:
+            return qname in self._offsets
+        if not isinstance(qname, str):
+            return False
+        i = bisect_left(self._names, qname)
+        return i < len(self._names) and self._names[i] == qname
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names if self._path is not None else self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._names if self._path is not None else self._offsets)
+
+    def get(self, qname: str) -> List[int]:
+        """The offsets of the records for `qname`, or an empty list if there are
+        none."""
+        try:
+            return self[qname]
+        except KeyError:
+            return []
+
+    @staticmethod
+    def build(path: PathLike) -> "QueryIndex":
+        """Build the index by reading the PAF file at `path` once. Blank lines are
+        skipped.
+
+        ## Errors
+        If the file is `gzip`-compressed but not BGZF-compressed, a `ValueError` is
+        raised.
+        """
+        offsets: Dict[str, List[int]] = {}
+        for offset, line in iter_line_offsets(path):
+            if line.isspace():
+                continue
+            qname = line.split(b"\t", 1)[0].decode()
+            offsets.setdefault(qname, []).append(offset)
+        return QueryIndex(offsets)
+
+    def save(self, path: PathLike):
+        """Write the index to `path`.
+
+        The file starts with a header line holding the byte offset of the name
+        directory. This is followed by one line per query name, in sorted order,
+        holding a comma-separated list of the offsets of its records, and finally the
+        directory, which has one line per query name (in the same order) giving the
+        name and the byte offset of its line of record offsets.
+        """
+        # read everything first in case a loaded index is saved over its own file
+        entries = [(qname, self[qname]) for qname in sorted(self)]
+        with open(path, mode="wb") as fileobj:
+            header = f"{QUERY_INDEX_HEADER}\t"
+            # the directory offset is filled in once the offsets have been written
+            fileobj.write(header.encode() + b"0" * 20 + b"\n")
+            directory = []
+            for qname, offsets in entries:
+                directory.append((qname, fileobj.tell()))
+                fileobj.write((",".join(map(str, offsets)) + "\n").encode())
+            directory_offset = fileobj.tell()
+            for qname, position in directory:
+                fileobj.write(f"{qname}\t{position}\n".encode())
+            fileobj.seek(len(header))
+            fileobj.write(f"{directory_offset:020d}".encode())
+
+    @staticmethod
+    def load(path: PathLike) -> "QueryIndex":
+        """Read the name directory of an index previously written with
+        `QueryIndex.save`. The offsets of a query name are read from `path` when they
+        are needed.
+
+        ## Errors
+        - If `path` does not exist, a `MissingIndex` exception is raised.
+        - If `path` is not a query index, an `InvalidIndexFormat` exception is raised.
+        """
+        try:
+            fileobj = open(path, mode="rb")
+        except FileNotFoundError:
+            raise MissingIndex(f"Query index {path} does not exist.") from None
+
+        index = QueryIndex()
+        with fileobj:
+            header = fileobj.readline().decode().rstrip("\n").split("\t")
+            if "\t".join(header[:2]) != QUERY_INDEX_HEADER or len(header) != 3:
+                raise InvalidIndexFormat(f"{path} is not a query index.")
+            fileobj.seek(int(header[2]))
+            for line in fileobj:
+                qname, position = line.decode().rstrip("\n").split("\t")
+                index._names.append(qname)
+                index._positions.append(int(position))
+        index._path = path
+        return index
+
+
+def reg2bin(
+    start: int, end: int, min_shift: int = MIN_SHIFT, depth: int = DEPTH
+) -> int:
+    """The smallest bin that fully contains the (0-based, half-open) interval
+    `[start, end)`, as per the [CSI][csi] binning scheme.
+
+    [csi]: https://samtools.github.io/hts-specs/CSIv1.pdf
+    """
+    end = max(end, start + 1) - 1
+    shift = min_shift
+    offset = ((1 << depth * 3) - 1) // 7
+    for level in range(depth, 0, -1):
+        if end >> (min_shift + depth * 3) == 0 and start >> shift == end >> shift:
+            return offset + (start >> shift)
+        shift += 3
+        offset -= 1 << (level - 1) * 3
+    return 0
+
+
+def reg2bins(
+    start: int, end: int, min_shift: int = MIN_SHIFT, depth: int = DEPTH
+) -> List[int]:
+    """All bins that may contain intervals overlapping `[start, end)`."""
+    end = max(end, start + 1) - 1
+    limit = (1 << (min_shift + depth * 3)) - 1
+    start, end = min(start, limit), min(end, limit)
+    bins = []
+    shift = min_shift + depth * 3
+    offset = 0
+    for level in range(depth + 1):
+        bins.extend(range(offset + (start >> shift), offset + (end >> shift) + 1))
+        shift -= 3
+        offset += 1 << level * 3
+    return bins
+
+
+class TargetIndex:
+    """A binning index over the target coordinates (`tname`, `tstart`, `tend`) of the
+    records in a PAF file. It finds the records that overlap a region without reading
+    the rest of the file.
+
+    Each record is assigned to the smallest bin (see `reg2bin`) that contains its target
+    interval. The index stores the interval and offset of every record, so only records
+    that actually overlap a query region are read from the PAF file. The file does not
+    need to be sorted.
+
+    An index built with `TargetIndex.build` is held in memory. An index read with
+    `TargetIndex.load` only holds a directory of the bins in memory and reads the
+    entries of the bins needed for a query from disk.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.index import TargetIndex
+    from pathlib import Path
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        records = [
+            PafRecord(tname="chr1", tstart=100, tend=200),
+            PafRecord(tname="chr1", tstart=5000, tend=90000),
+            PafRecord(tname="chr2", tstart=100, tend=200),
+        ]
+        path.write_text("\n".join(map(str, records)))
+
+        TargetIndex.build(path).save(f"{path}.tidx")
+        index = TargetIndex.load(f"{path}.tidx")
+
+        line_length = len(str(records[0])) + 1
+        assert index.overlapping_offsets("chr1", 150, 6000) == [0, line_length]
+        assert index.overlapping_offsets("chr1", 200, 4000) == []
+        assert index.overlapping_offsets("chr3", 0, 4000) == []
+    ```
+    """
+
+    def __init__(
+        self,
+        bins: Optional[Dict[str, Dict[int, List[Entry]]]] = None,
+        min_shift: int = MIN_SHIFT,
+        depth: int = DEPTH,
+    ):
+        self._bins: Dict[str, Dict[int, List[Entry]]] = bins if bins is not None else {}
+        self._directory: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        self._path: Optional[PathLike] = None
+        self.min_shift = min_shift
+        """The log2 of the size of the smallest bin."""
+        self.depth = depth
+        """The number of levels below the root bin."""
+
+    def __contains__(self, tname: object) -> bool:
+        return tname in self._bins or tname in self._directory
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._directory if self._path is not None else self._bins)
+
+    def __len__(self) -> int:
+        return len(self._directory if self._path is not None else self._bins)
+
+    @staticmethod
+    def build(
+        path: PathLike, min_shift: int = MIN_SHIFT, depth: int = DEPTH
+    ) -> "TargetIndex":
+        """Build the index by reading the PAF file at `path` once. Blank lines are
+        skipped.
+
+        ## Errors
+        - If the file is `gzip`-compressed but not BGZF-compressed, a `ValueError` is
+        raised.
+        - If a line has too few fields, a `pafpy.pafrecord.MalformattedRecord`
+        exception is raised.
+        """
+        bins: Dict[str, Dict[int, List[Entry]]] = {}
+        for offset, line in iter_line_offsets(path):
+            if line.isspace():
+                continue
+            fields = line.split(b"\t", 9)
+            if len(fields) < 9:
+                raise MalformattedRecord(
+                    f"Expected {MIN_FIELDS} fields, but got {len(fields)}\n{line!r}"
+                )
+            tname = fields[5].decode()
+            tstart = int(fields[7])
+            tend = int(fields[8])
+            bin_ = reg2bin(tstart, tend, min_shift, depth)
+            bins.setdefault(tname, {}).setdefault(bin_, []).append(
+                (tstart, tend, offset)
+            )
+        return TargetIndex(bins, min_shift=min_shift, depth=depth)
+
+    def _bin_numbers(self, tname: str) -> List[int]:
+        bins = self._directory if self._path is not None else self._bins
+        return sorted(bins[tname])
+
+    def _entries(self, tname: str, bin_: int) -> List[Entry]:
+        if self._path is None:
+            return self._bins.get(tname, {}).get(bin_, [])
+
+        location = self._directory.get(tname, {}).get(bin_)
+        if location is None:
+            return []
+        position, count = location
+        with open(self._path, mode="rb") as fileobj:
+            fileobj.seek(position)
+            lines = [fileobj.readline() for _ in range(count)]
+        return [tuple(map(int, line.split(b"\t"))) for line in lines]
+
+    def overlapping_offsets(self, tname: str, start: int, end: int) -> List[int]:
+        """The offsets, in file order, of the records on target `tname` whose target
+        interval overlaps the (0-based, half-open) region `[start, end)`."""
+        offsets = []
+        for bin_ in reg2bins(start, end, self.min_shift, self.depth):
+            for tstart, tend, offset in self._entries(tname, bin_):
+                if tstart < end and tend > start:
+                    offsets.append(offset)
+        return sorted(offsets)
+
+    def save(self, path: PathLike):
+        """Write the index to `path`.
+
+        The file starts with a header line holding the binning parameters and the byte
+        offset of the bin directory. This is followed by the entries of each bin - one
+        line of `tstart`, `tend`, and record offset per record - and finally the
+        directory, which has one line per bin giving the target name, bin number, and
+        the byte offset and number of its entries.
+        """
+        # read everything first in case a loaded index is saved over its own file
+        targets = [
+            (tname, [(b, self._entries(tname, b)) for b in self._bin_numbers(tname)])
+            for tname in self
+        ]
+        with open(path, mode="wb") as fileobj:
+            header = f"{TARGET_INDEX_MAGIC}\t{self.min_shift}\t{self.depth}\t"
+            # the directory offset is filled in once the entries have been written
+            fileobj.write(header.encode() + b"0" * 20 + b"\n")
+            directory = []
+            for tname, bins in targets:
+                for bin_, entries in bins:
+                    directory.append((tname, bin_, fileobj.tell(), len(entries)))
+                    fileobj.write(
+                        "".join(f"{s}\t{e}\t{o}\n" for s, e, o in entries).encode()
+                    )
+            directory_offset = fileobj.tell()
+            for fields in directory:
+                fileobj.write(("\t".join(map(str, fields)) + "\n").encode())
+            fileobj.seek(len(header))
+            fileobj.write(f"{directory_offset:020d}".encode())
+
+    @staticmethod
+    def load(path: PathLike) -> "TargetIndex":
+        """Read the bin directory of an index previously written with
+        `TargetIndex.save`. The entries are read from `path` when they are needed.
+
+        ## Errors
+        - If `path` does not exist, a `MissingIndex` exception is raised.
+        - If `path` is not a target index, an `InvalidIndexFormat` exception is raised.
+        """
+        try:
+            fileobj = open(path, mode="rb")
+        except FileNotFoundError:
+            raise MissingIndex(f"Target index {path} does not exist.") from None
+
+        with fileobj:
+            header = fileobj.readline().decode().rstrip("\n").split("\t")
+            if "\t".join(header[:2]) != TARGET_INDEX_MAGIC or len(header) != 5:
+                raise InvalidIndexFormat(f"{path} is not a target index.")
+            min_shift, depth, directory_offset = map(int, header[2:])
+            index = TargetIndex(min_shift=min_shift, depth=depth)
+            fileobj.seek(directory_offset)
+            for line in fileobj:
+                tname, bin_, position, count = line.decode().rstrip("\n").split("\t")
+                index._directory.setdefault(tname, {})[int(bin_)] = (
+                    int(position),
+                    int(count),
+                )
+        index._path = path
+        return index
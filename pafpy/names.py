@@ -0,0 +1,122 @@
+"""This module contains a dictionary of the sequence names in a PAF file.
+
+In a whole-genome alignment, the same target name is repeated on millions of lines -
+and in an all-vs-all overlap file, so are the query names. A
+`pafpy.names.NameDictionary` gives each distinct name a small integer code and keeps a
+single `str` for it, so that records (see `pafpy.paffile.PafFile`'s `intern_names`)
+and columnar batches (`pafpy.batch.PafBatch`) can share it rather than holding a copy
+per line.
+
+```py
+from pafpy.names import NameDictionary
+```
+"""
+from array import array
+from typing import AnyStr, Dict, Iterable, Iterator, List, Optional
+
+CODE_TYPECODE = "I"
+"""The `array` typecode used for name codes (unsigned 32-bit)."""
+
+
+class NameDictionary:
+    """Maps names to stable integer codes, in the order the names are first seen, and
+    holds one `str` per name.
+
+    Names can be given as `str` or (UTF-8) `bytes` - e.g. the raw fields of a line.
+    Both forms of a name have the same code.
+
+    ## Example
+    ```py
+    from pafpy.names import NameDictionary
+
+    names = NameDictionary()
+    chr1 = names.intern(b"chr1")
+
+    assert names.intern(b"chr1") is chr1
+    assert names.code(b"chr2") == 1
+    assert names[1] == "chr2"
+    assert names.index("chr1") == 0
+    assert list(names.encode([b"chr2", b"chr1", b"chr3"])) == [1, 0, 2]
+    assert names.code("chr1") == 0
+    assert list(names) == ["chr1", "chr2", "chr3"]
+    ```
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        """The names, indexed by their code."""
+        self._codes: Dict[AnyStr, int] = dict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __getitem__(self, code: int) -> str:
+        return self.names[code]
+
+    def __contains__(self, name: object) -> bool:
+        return self.get(name) is not None
+
+    def __repr__(self) -> str:
+        return f"NameDictionary({len(self)} names)"
+
+    def get(self, name: AnyStr) -> Optional[int]:
+        """The code of `name` (`str` or `bytes`), or `None` if it has not been seen."""
+        code = self._codes.get(name)
+        if code is None and isinstance(name, (str, bytes)):
+            other = name.encode() if isinstance(name, str) else name.decode()
+            code = self._codes.get(other)
+        return code
+
+    def index(self, name: AnyStr) -> int:
+        """The code of `name` (`str` or `bytes`).
+
+        ## Errors
+        If `name` has not been seen, a `KeyError` is raised.
+        """
+        code = self.get(name)
+        if code is None:
+            raise KeyError(name)
+        return code
+
+    def _add(self, token: AnyStr) -> int:
+        if isinstance(token, bytes):
+            name = token.decode()
+            code = self._codes.get(name)
+        else:
+            name = token
+            code = self._codes.get(token.encode())
+        if code is None:
+            code = len(self.names)
+            self.names.append(name)
+        self._codes[token] = code
+        return code
+
+    def code(self, token: AnyStr) -> int:
+        """The code of `token`, adding it to the dictionary if it has not been seen."""
+        code = self._codes.get(token)
+        if code is None:
+            code = self._add(token)
+        return code
+
+    def intern(self, token: AnyStr) -> str:
+        """The (shared) `str` of `token`, adding it to the dictionary if it has not been
+        seen."""
+        code = self._codes.get(token)
+        if code is None:
+            code = self._add(token)
+        return self.names[code]
+
+    def encode(self, tokens: Iterable[AnyStr]) -> array:
+        """The codes of `tokens`, as an `array` of typecode `CODE_TYPECODE`. Unseen
+        tokens are added to the dictionary."""
+        codes = self._codes
+        encoded = array(CODE_TYPECODE)
+        for token in tokens:
+            code = codes.get(token)
+            if code is None:
+                code = self._add(token)
+            encoded.append(code)
+        return encoded
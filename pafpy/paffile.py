@@ -13,14 +13,53 @@ import gzip
 import io
 import os
 import sys
+from itertools import islice
 from pathlib import Path
-from typing import IO, Optional, TextIO, Union
-
-from pafpy.pafrecord import PafRecord
-from pafpy.utils import is_compressed
+from time import perf_counter
+from typing import (
+    IO,
+    Any,
+    AnyStr,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from pafpy.batch import PafBatch, _batch_from_lines
+from pafpy.bgzf import BgzfReader
+from pafpy.filters import Condition
+from pafpy.grouping import Reducer, group_by_query
+from pafpy.index import (
+    QUERY_INDEX_SUFFIX,
+    TARGET_INDEX_SUFFIX,
+    QueryIndex,
+    TargetIndex,
+)
+from pafpy.names import NameDictionary
+from pafpy.pafrecord import MIN_FIELDS, PafRecord, _tags_from_bytes
+from pafpy.parallel import DEFAULT_CHUNK_SIZE, iter_parallel
+from pafpy.projection import Projection
+from pafpy.stats import CountingReader, ReadStats
+from pafpy.store import RecordStore
+from pafpy.streams import MmapLineReader, ReadAheadLineReader
+from pafpy.utils import is_bgzf, is_compressed
 
 PathLike = Union[Path, str, os.PathLike]
 
+INTERNABLE_NAMES = ("qname", "tname")
+"""The fields whose names can be interned (see `PafFile`'s `intern_names`)."""
+
+
+def _split(line: AnyStr) -> List[bytes]:
+    if isinstance(line, str):
+        line = line.encode()
+    return line.rstrip().split(b"\t", MIN_FIELDS)
+
 
 class PafFile:
     """Stream access to a PAF file.
@@ -39,6 +78,57 @@ class PafFile:
     If an already-open `fileobj` is given, the `PafFile` can be iterated without the
     need to open it.
 
+    If `lazy_tags` is `True`, the tags of each record are only parsed when they are
+    accessed. See `pafpy.pafrecord.PafRecord.from_str` for more details.
+
+    If `use_mmap` is `True` and `fileobj` is the path to an uncompressed file, the file
+    is read through a memory map (see `pafpy.streams.MmapLineReader`). This avoids
+    text-mode decoding and buffering, and makes repeated passes over large files on
+    local storage cheaper as the pages are reused from the operating system's cache.
+    It has no effect on compressed files, stdin, or already-open file objects.
+
+    [BGZF][bgzf]-compressed files (e.g. from `bgzip`) are detected automatically and
+    read with `pafpy.bgzf.BgzfReader`, which allows random access via
+    `PafFile.tell` and `PafFile.seek`. `threads` sets the number of threads used to
+    decompress BGZF blocks ahead of the parser (default is 0 - decompress inline).
+
+    If `read_ahead` is `True`, `gzip`-compressed input (including stdin) is decompressed
+    on a background thread that keeps the next chunks of lines ready while the current
+    ones are parsed (see `pafpy.streams.ReadAheadLineReader`). As decompression and
+    parsing then overlap, this can substantially reduce the time taken to read a
+    `gzip` file. `PafFile.tell` and `PafFile.seek` are not supported in this mode.
+
+    If `where` is given, only records matching the condition (see `pafpy.filters`) are
+    returned when iterating, and by `PafFile.iter_batches`, `PafFile.iter_lines`,
+    `PafFile.to_store`, `PafFile.fetch`, and `PafFile.fetch_query`. The condition is
+    checked on the raw fields of each line, so no record is built for lines that do not
+    match. As conditions cannot be sent to worker processes, `PafFile.iter_parallel`
+    does not support `where` - filter with its `func` instead.
+
+    If `fields` and/or `tags` are given, iterating (and `PafFile.fetch` and
+    `PafFile.fetch_query`) returns lightweight named tuples holding only those
+    mandatory fields and tag values, rather than `pafpy.pafrecord.PafRecord`s. Only the
+    requested columns are converted from each line - see
+    `pafpy.projection.Projection`. `PafFile.iter_batches`, `PafFile.to_store`, and
+    `PafFile.iter_parallel` are not affected.
+
+    If `intern_names` contains `"tname"` and/or `"qname"`, those names are interned
+    through a per-file `pafpy.names.NameDictionary` (`PafFile.tnames` and
+    `PafFile.qnames`): every record with the same name shares a single `str`, rather
+    than each holding its own copy, and the dictionary maps names to small integer
+    codes. This saves memory when many records are kept, e.g. for a whole-genome
+    alignment (target names) or an all-vs-all overlap file (both). `PafFile.iter_batches`
+    uses the same dictionaries, so its name codes match. Projected tuples (see
+    `fields`) are not interned.
+
+    If `stats` is `True`, or a `pafpy.stats.ReadStats` to add to, the `PafFile` counts
+    the lines, records, and bytes read while iterating over it and times the reading,
+    parsing, and tag parsing of each line (see `PafFile.stats`). This adds a few timer
+    calls per record, so it is off by default, when it costs a single check per record.
+    Other methods of reading (e.g. `PafFile.iter_batches`) are not measured.
+
+    [bgzf]: https://samtools.github.io/hts-specs/SAMv1.pdf
+
     ## Example
     ```py
     from pafpy import PafFile, PafRecord
@@ -70,7 +160,38 @@ class PafFile:
     `pafpy.pafrecord.PafRecord` objects.
     """
 
-    def __init__(self, fileobj: Union[PathLike, IO]):
+    def __init__(
+        self,
+        fileobj: Union[PathLike, IO],
+        lazy_tags: bool = False,
+        use_mmap: bool = False,
+        threads: int = 0,
+        read_ahead: bool = False,
+        where: Optional[Condition] = None,
+        fields: Optional[Sequence[str]] = None,
+        tags: Optional[Sequence[str]] = None,
+        stats: Union[bool, ReadStats] = False,
+        intern_names: Sequence[str] = (),
+    ):
+        self.lazy_tags = lazy_tags
+        """Whether tags are parsed lazily for each record."""
+        self.use_mmap = use_mmap
+        """Whether uncompressed files are read through a memory map."""
+        self.threads = threads
+        """The number of threads used to decompress BGZF blocks."""
+        self.read_ahead = read_ahead
+        """Whether gzip-compressed input is decompressed on a background thread."""
+        self.where = where
+        """The condition records must match to be returned (`None` for all records)."""
+        self._query_index: Optional[QueryIndex] = None
+        self._target_index: Optional[TargetIndex] = None
+        self.stats: Optional[ReadStats] = (
+            ReadStats() if stats is True else stats if stats else None
+        )
+        """The statistics collected while iterating (`None` if not requested)."""
+        self._counter: Optional[CountingReader] = None
+        # whether the end of the stream has been reported to stats since the last seek
+        self._stats_finished = False
         if isinstance(fileobj, io.IOBase):
             self._stream = fileobj
             self.path = None
@@ -80,6 +201,28 @@ class PafFile:
             self.path = Path(fileobj) if not str(fileobj) == "-" else None
             self._is_stdin = self.path is None
             """Path to the PAF file. If `fileobj` is an open file object, then `path` will be `None` ."""
+        self.projection: Optional[Projection] = (
+            Projection(fields or (), tags or ())
+            if fields is not None or tags is not None
+            else None
+        )
+        """The fields and tags returned for each record (`None` for full records)."""
+        unknown = set(intern_names) - set(INTERNABLE_NAMES)
+        if unknown:
+            raise ValueError(
+                f"Cannot intern {sorted(unknown)}. Expected any of {INTERNABLE_NAMES}"
+            )
+        self.qnames: Optional[NameDictionary] = (
+            NameDictionary() if "qname" in intern_names else None
+        )
+        """The dictionary query names are interned through (`None` if they are not
+        interned)."""
+        self.tnames: Optional[NameDictionary] = (
+            NameDictionary() if "tname" in intern_names else None
+        )
+        """The dictionary target names are interned through (`None` if they are not
+        interned)."""
+        self._interning = bool(intern_names)
 
     def __del__(self):
         self.close()
@@ -94,29 +237,551 @@ class PafFile:
         return self
 
     def __next__(self) -> PafRecord:
+        self._ensure_open()
+        if self.stats is not None:
+            return self._next_with_stats()
+        if self.where is None and not self._interning:
+            line = next(self._stream)
+            if self.projection is not None:
+                if isinstance(line, str):
+                    line = line.encode()
+                return self.projection(line)
+            if isinstance(line, bytes):
+                return PafRecord.from_bytes(line, lazy_tags=self.lazy_tags)
+            return PafRecord.from_str(line, lazy_tags=self.lazy_tags)
+
+        while True:
+            fields = _split(next(self._stream))
+            if self.where is None or self._matches(fields):
+                return self._from_fields(fields)
+
+    def _next_with_stats(self) -> Any:
+        stats = self.stats
+        while True:
+            start = perf_counter()
+            try:
+                line = next(self._stream)
+            except StopIteration:
+                if not self._stats_finished:
+                    self._stats_finished = True
+                    stats._finish(perf_counter())
+                raise
+            read = perf_counter()
+            if isinstance(line, str):
+                line = line.encode()
+            fields = line.rstrip().split(b"\t", MIN_FIELDS)
+            matched = self.where is None or self._matches(fields)
+            tag_time = 0.0
+            if not matched:
+                record = None
+            elif self.projection is not None:
+                record = self.projection.from_fields(fields)
+            elif len(fields) > MIN_FIELDS:
+                tags_start = perf_counter()
+                tags = _tags_from_bytes(fields[MIN_FIELDS], self.lazy_tags)
+                tag_time = perf_counter() - tags_start
+                record = PafRecord._from_mandatory_fields(
+                    fields, tags, *self._names(fields)
+                )
+            else:
+                record = PafRecord._from_mandatory_fields(
+                    fields, None, *self._names(fields)
+                )
+            stats._add(len(line), start, read, perf_counter(), tag_time, matched)
+            if matched:
+                return record
+
+    def _from_fields(self, fields: List[bytes]) -> PafRecord:
+        if self.projection is not None:
+            return self.projection.from_fields(fields)
+        if not self._interning:
+            return PafRecord._from_byte_fields(fields, self.lazy_tags)
+        return PafRecord._from_byte_fields(fields, self.lazy_tags, *self._names(fields))
+
+    def _names(self, fields: List[bytes]) -> Tuple[Optional[str], Optional[str]]:
+        """The interned query and target names of a line (`None` if not interned)."""
+        if len(fields) < MIN_FIELDS:  # let parsing raise an error for the line
+            return None, None
+        qname = None if self.qnames is None else self.qnames.intern(fields[0])
+        tname = None if self.tnames is None else self.tnames.intern(fields[5])
+        return qname, tname
+
+    def _matches(self, fields: List[bytes]) -> bool:
+        # malformed lines are let through so that parsing raises an error for them
+        return len(fields) < MIN_FIELDS or self.where(fields)
+
+    def _line_matches(self, line: AnyStr) -> bool:
+        return self._matches(_split(line))
+
+    def _ensure_open(self):
         if self.closed and self._is_stdin:
             self.open()
         elif self.closed:
             raise IOError("PAF file is closed - cannot get next element.")
-        line = next(self._stream)
-        if isinstance(line, bytes):
-            line = line.decode()
-        return PafRecord.from_str(line)
+
+    def iter_batches(self, batch_size: int = 65_536) -> Iterator[PafBatch]:
+        """Iterate over the (remaining) records in the file in batches of (at most)
+        `batch_size` records. Each batch is a `pafpy.batch.PafBatch`, which stores each
+        field as a contiguous array rather than creating a
+        `pafpy.pafrecord.PafRecord` per line.
+
+        All batches yielded from one call share their name categories, so the name
+        codes in `pafpy.batch.PafBatch.qname` and `pafpy.batch.PafBatch.tname` are
+        consistent across batches.
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i}", mlen=i, blen=10) for i in range(5)]
+            path.write_text("\n".join(map(str, records)))
+
+            with PafFile(path) as paf:
+                batches = list(paf.iter_batches(batch_size=2))
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert list(batches[-1].blast_identity()) == [0.4]
+        assert batches[-1].query_names() == ["read4"]
+        ```
+
+        ## Errors
+        - If `batch_size` is less than 1, a `ValueError` is raised.
+        - See `pafpy.batch.PafBatch.from_lines` for errors raised when parsing.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self._ensure_open()
+        qnames = NameDictionary() if self.qnames is None else self.qnames
+        tnames = NameDictionary() if self.tnames is None else self.tnames
+        while True:
+            lines = list(islice(self._stream, batch_size))
+            if not lines:
+                return
+            if self.where is not None:
+                lines = list(filter(self._line_matches, lines))
+                if not lines:
+                    continue
+            yield _batch_from_lines(lines, qnames, tnames)
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """Iterate over the (remaining) raw lines (`bytes`, as read from the file) of
+        the records in the file, without parsing them. Only lines matching `where` are
+        returned.
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pafpy.filters import col
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(5)]
+            path.write_text("\n".join(map(str, records)))
+
+            with PafFile(path, where=col("mapq") >= 3) as paf:
+                lines = list(paf.iter_lines())
+
+        assert lines == [f"{records[3]}\n".encode(), str(records[4]).encode()]
+        ```
+        """
+        self._ensure_open()
+        for line in self._stream:
+            if isinstance(line, str):
+                line = line.encode()
+            if self.where is None or self._line_matches(line):
+                yield line
+
+    def to_store(self) -> RecordStore:
+        """Read the (remaining) records in the file into a compact
+        `pafpy.store.RecordStore`. This uses a fraction of the memory of a list of
+        `pafpy.pafrecord.PafRecord`s, and the lines are parsed straight into the store.
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(5)]
+            path.write_text("\n".join(map(str, records)))
+
+            with PafFile(path) as paf:
+                store = paf.to_store()
+
+        assert len(store) == 5
+        assert store[3].qname == "read3"
+        assert [record.mapq for record in store] == list(range(5))
+        ```
+
+        ## Errors
+        See `pafpy.store.RecordStore.extend_lines` for errors raised when parsing.
+        """
+        self._ensure_open()
+        if self.where is None:
+            return RecordStore.from_lines(self._stream)
+        return RecordStore.from_lines(filter(self._line_matches, self._stream))
+
+    def group_by_query(
+        self, reducer: Optional[Reducer] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """Iterate over `(qname, records)` for the (remaining) records of each query, in
+        a single streaming pass. Only the records of one query are held in memory at a
+        time, so the records of each query must be next to each other - as minimap2
+        writes them. See `pafpy.grouping.group_by_query`.
+
+        If a `reducer` is given, it is applied to each group and `(qname, result)` is
+        returned instead - see `pafpy.grouping` for the built-in reducers.
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pafpy.grouping import best_by
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i // 3}", mapq=i) for i in range(6)]
+            path.write_text("\n".join(map(str, records)))
+
+            with PafFile(path) as paf:
+                best_hits = list(paf.group_by_query(best_by("mapq")))
+
+        assert best_hits == [("read0", records[2]), ("read1", records[5])]
+        ```
+        """
+        groups = group_by_query(self)
+        if reducer is None:
+            return groups
+        return ((qname, reducer(records)) for qname, records in groups)
+
+    def iter_parallel(
+        self,
+        processes: Optional[int] = None,
+        ordered: bool = True,
+        func: Optional[Callable[[PafRecord], Any]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[Any]:
+        """Iterate over the records in the file, parsing them with multiple processes.
+
+        The file is split into newline-aligned byte ranges of roughly `chunk_size`
+        bytes (compressed bytes for BGZF files), and each range is parsed by one of
+        `processes` worker processes (default is the number of CPUs). If `ordered` is
+        `True`, records are returned in the order they appear in the file; otherwise,
+        each range's records are returned as soon as that range is parsed.
+
+        `func` is an optional function that is called on each record *inside the
+        worker processes*. Its result is returned instead of the record, and records
+        for which it returns `None` are dropped. Use it to filter and/or reduce records
+        before they are sent back to the main process. As it is sent to the workers,
+        `func` must be picklable (e.g. defined at the top level of a module).
+
+        Iteration always covers the whole file, independent of the position of the
+        `PafFile`, and the `PafFile` does not need to be open.
+
+        > *Note: as this uses `multiprocessing`, scripts that call this should guard
+        their entry point with `if __name__ == "__main__":`.*
+
+        ## Example
+        ```py
+        from operator import attrgetter
+        from pathlib import Path
+        import tempfile
+        from pafpy import PafFile, PafRecord
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i}") for i in range(100)]
+            path.write_text("\n".join(map(str, records)))
+
+            paf = PafFile(path)
+            qnames = list(
+                paf.iter_parallel(processes=2, func=attrgetter("qname"), chunk_size=64)
+            )
+
+        assert qnames == [record.qname for record in records]
+        ```
+
+        ## Errors
+        - If the `PafFile` was not created from the path of an uncompressed or
+        BGZF-compressed file, a `ValueError` is raised.
+        - If the `PafFile` has a `where` condition, `fields`/`tags`, or `intern_names`,
+        a `ValueError` is raised, as these are not applied in the worker processes. Use
+        `func` instead.
+        - Errors raised when parsing a record are re-raised in the main process.
+        """
+        unsupported = [
+            option
+            for option, is_set in [
+                ("where", self.where is not None),
+                ("fields/tags", self.projection is not None),
+                ("intern_names", self._interning),
+            ]
+            if is_set
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Parallel iteration does not support {', '.join(unsupported)}. "
+                "Use func to filter or transform records in the workers instead."
+            )
+        self._require_path("Parallel iteration")
+        with open(self.path, mode="rb") as fileobj:
+            file_is_bgzf = is_bgzf(fileobj)
+            if is_compressed(fileobj) and not file_is_bgzf:
+                raise ValueError(
+                    "Parallel iteration is not supported for gzip-compressed files. "
+                    "Use bgzip to compress the file instead."
+                )
+        return iter_parallel(
+            self.path,
+            processes=processes,
+            ordered=ordered,
+            func=func,
+            chunk_size=chunk_size,
+            lazy_tags=self.lazy_tags,
+            bgzf=file_is_bgzf,
+        )
+
+    def tell(self) -> int:
+        """The offset of the next record in the file. For BGZF-compressed files, this
+        is a virtual offset (see `pafpy.bgzf`); for uncompressed files, it is a byte
+        offset. Pass it to `PafFile.seek` to return to that record.
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pafpy.bgzf import BgzfWriter
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with BgzfWriter(path) as writer:
+                for i in range(3):
+                    writer.write(f"{PafRecord(qname=f'read{i}')}\n".encode())
+
+            with PafFile(path) as paf:
+                next(paf)
+                offset = paf.tell()
+                record = next(paf)
+                paf.seek(offset)
+                assert next(paf) == record
+        ```
+
+        ## Errors
+        - If the file is closed, an `IOError` is raised.
+        - If the underlying stream does not support `tell` (e.g. stdin), an `OSError`
+        is raised.
+        """
+        self._ensure_open()
+        return self._stream.tell()
+
+    def seek(self, offset: int):
+        """Move to `offset`, which should be a value returned by `PafFile.tell`.
+
+        ## Errors
+        - If the file is closed, an `IOError` is raised.
+        - If the underlying stream does not support `seek` (e.g. stdin), an `OSError`
+        is raised.
+        """
+        self._ensure_open()
+        self._stream.seek(offset)
+        self._stats_finished = False
+
+    def _require_path(self, action: str) -> Path:
+        if self.path is None:
+            raise ValueError(f"{action} requires a path to a PAF file.")
+        return self.path
+
+    @property
+    def query_index_path(self) -> Optional[Path]:
+        """The default path of the query index for this file (see
+        `PafFile.build_query_index`). `None` if the `PafFile` has no path."""
+        if self.path is None:
+            return None
+        return self.path.with_name(self.path.name + QUERY_INDEX_SUFFIX)
+
+    def build_query_index(self, index_path: Optional[PathLike] = None) -> QueryIndex:
+        """Build a `pafpy.index.QueryIndex` for the file and save it to `index_path`
+        (default is `PafFile.query_index_path`, i.e. the path of the file with a `.qidx`
+        suffix appended). The index is used by `PafFile.fetch_query`.
+
+        The file is read from the start, independent of the position of the `PafFile`.
+
+        ## Errors
+        If the `PafFile` was not created from the path of an uncompressed or
+        BGZF-compressed file, a `ValueError` is raised.
+        """
+        path = self._require_path("Building an index")
+        index = QueryIndex.build(path)
+        index.save(index_path if index_path is not None else self.query_index_path)
+        self._query_index = index
+        return index
+
+    def fetch_query(self, qname: str) -> List[PafRecord]:
+        """Fetch all records for the query `qname`, in the order they appear in the
+        file. Rather than reading through the file, this looks up the offsets of the
+        records in the file's query index, loading it from `PafFile.query_index_path`
+        the first time it is needed, and seeks straight to them.
+
+        > *Note: this changes the position of the `PafFile`.*
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i % 10}", mapq=i) for i in range(100)]
+            path.write_text("\n".join(map(str, records)))
+
+            with PafFile(path) as paf:
+                paf.build_query_index()  # only needs to be done once
+                fetched = paf.fetch_query("read3")
+
+        assert [record.mapq for record in fetched] == list(range(3, 100, 10))
+        ```
+
+        ## Errors
+        - If the index does not exist, a `pafpy.index.MissingIndex` exception is raised.
+        Create it with `PafFile.build_query_index`.
+        - If the file is closed, an `IOError` is raised.
+        """
+        if self._query_index is None:
+            self._require_path("Fetching records")
+            self._query_index = QueryIndex.load(self.query_index_path)
+        return self._read_all_at(self._query_index.get(qname))
+
+    @property
+    def target_index_path(self) -> Optional[Path]:
+        """The default path of the target index for this file (see
+        `PafFile.build_target_index`). `None` if the `PafFile` has no path."""
+        if self.path is None:
+            return None
+        return self.path.with_name(self.path.name + TARGET_INDEX_SUFFIX)
+
+    def build_target_index(self, index_path: Optional[PathLike] = None) -> TargetIndex:
+        """Build a `pafpy.index.TargetIndex` for the file and save it to `index_path`
+        (default is `PafFile.target_index_path`, i.e. the path of the file with a
+        `.tidx` suffix appended). The index is used by `PafFile.fetch`.
+
+        The file does not need to be sorted and is read from the start, independent of
+        the position of the `PafFile`.
+
+        ## Errors
+        If the `PafFile` was not created from the path of an uncompressed or
+        BGZF-compressed file, a `ValueError` is raised.
+        """
+        path = self._require_path("Building an index")
+        index = TargetIndex.build(path)
+        index.save(index_path if index_path is not None else self.target_index_path)
+        self._target_index = index
+        return index
+
+    def fetch(
+        self, tname: str, start: int = 0, end: Optional[int] = None
+    ) -> List[PafRecord]:
+        """Fetch all records aligned to target `tname` whose target interval
+        (`tstart`-`tend`) overlaps the 0-based, half-open region `[start, end)`, in the
+        order they appear in the file. If `end` is `None`, the region extends to the end
+        of the target.
+
+        The records are found with the file's target index, which is loaded from
+        `PafFile.target_index_path` the first time it is needed, so only the
+        overlapping records are read.
+
+        > *Note: this changes the position of the `PafFile`.*
+
+        ## Example
+        ```py
+        from pafpy import PafFile, PafRecord
+        from pathlib import Path
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [
+                PafRecord(qname=f"r{i}", tname="chr1", tstart=i * 100, tend=i * 100 + 500)
+                for i in range(100)
+            ]
+            path.write_text("\n".join(map(str, records)))
+
+            with PafFile(path) as paf:
+                paf.build_target_index()  # only needs to be done once
+                fetched = paf.fetch("chr1", 2000, 3000)
+
+        assert [record.qname for record in fetched] == [f"r{i}" for i in range(16, 30)]
+        ```
+
+        ## Errors
+        - If `start` is negative or `end` is less than `start`, a `ValueError` is
+        raised.
+        - If the index does not exist, a `pafpy.index.MissingIndex` exception is raised.
+        Create it with `PafFile.build_target_index`.
+        - If the file is closed, an `IOError` is raised.
+        """
+        if end is None:
+            end = 1 << 62
+        if start < 0 or end < start:
+            raise ValueError(f"Invalid region {tname}:{start}-{end}")
+        if self._target_index is None:
+            self._require_path("Fetching records")
+            self._target_index = TargetIndex.load(self.target_index_path)
+        offsets = self._target_index.overlapping_offsets(tname, start, end)
+        return self._read_all_at(offsets)
+
+    def _read_all_at(self, offsets: List[int]) -> List[PafRecord]:
+        records = []
+        for offset in offsets:
+            self.seek(offset)
+            fields = _split(next(self._stream))
+            if self.where is None or self._matches(fields):
+                records.append(self._from_fields(fields))
+        return records
+
+    def _gunzip(self, stream: IO) -> IO:
+        return ReadAheadLineReader(stream) if self.read_ahead else stream
+
+    def _count(self, source: Union[Path, IO]) -> Union[Path, IO]:
+        """Wrap the compressed `source` to count the bytes read from it, if collecting
+        statistics."""
+        if self.stats is None:
+            return source
+        if isinstance(source, Path):
+            self._counter = CountingReader(open(source, mode="rb"), self.stats)
+        else:
+            self._counter = CountingReader(source, self.stats, owns_file=False)
+        return self._counter
 
     def _open(self) -> IO:
         if self.path is not None:
             with open(self.path, mode="rb") as fileobj:
                 file_is_compressed = is_compressed(fileobj)
-
-            if file_is_compressed:
-                return gzip.open(self.path)
+                file_is_bgzf = is_bgzf(fileobj)
+
+            if file_is_bgzf:
+                return BgzfReader(self._count(self.path), threads=self.threads)
+            elif file_is_compressed:
+                return self._gunzip(gzip.open(self._count(self.path)))
+            elif self.use_mmap:
+                return MmapLineReader(self.path)
             else:
-                return open(self.path)
+                return open(self.path, mode="rb")
         elif self._is_stdin:
             return (
                 sys.stdin.buffer
                 if not is_compressed(sys.stdin.buffer)
-                else gzip.open(sys.stdin.buffer)
+                else self._gunzip(gzip.open(self._count(sys.stdin.buffer)))
             )
         else:
             return self._stream
@@ -142,15 +807,22 @@ class PafFile:
         ```
 
         > *Note: If the file is already open, the file position will be reset to the
-        beginning.*
+        beginning. Streams that cannot seek (e.g. with `read_ahead`) are reopened.*
 
         ## Errors
         - If `path` does not exist, an `OSError` exception is raised.
         """
+        self._stats_finished = False
         if not self.closed:
-            self._stream.seek(0)
-        else:
-            self._stream = self._open()
+            try:
+                self._stream.seek(0)
+                return self
+            except io.UnsupportedOperation:
+                # e.g. read-ahead streams - start again from a fresh stream instead
+                if self.path is None:
+                    raise
+                self.close()
+        self._stream = self._open()
         return self
 
     @property
@@ -167,3 +839,6 @@ class PafFile:
                 pass
             finally:
                 self._stream = None
+                if self._counter is not None:
+                    self._counter.close()
+                    self._counter = None
@@ -12,16 +12,29 @@ from pafpy import PafRecord
 ```
 """
 from enum import Enum
-from typing import Dict, NamedTuple, Optional
+from typing import Dict, List, NamedTuple, Optional, Union
 
 from pafpy.strand import Strand
-from pafpy.tag import Tag
+from pafpy.tag import LazyTags, Tag
 
 Tags = Dict[str, Tag]
 
 DELIM = "\t"
 MIN_FIELDS = 12
 
+_STRANDS_FROM_BYTES = {strand.value.encode(): strand for strand in Strand}
+
+
+def _tags_from_bytes(tags: bytes, lazy_tags: bool) -> Union[Tags, LazyTags]:
+    """Parse the (tab-separated) tags section of a line."""
+    if lazy_tags:
+        return LazyTags(tags.split(b"\t"))
+    parsed = dict()
+    for tag_str in tags.decode().split(DELIM):
+        tag = Tag.from_str(tag_str)
+        parsed[tag.tag] = tag
+    return parsed
+
 
 class MalformattedRecord(Exception):
     """An exception indicating that a `PafRecord` is not in the expected format."""
@@ -106,33 +119,36 @@ class PafRecord(NamedTuple):
     """Alignment block length. Number of bases, including gaps, in the mapping."""
     mapq: int = 255
     """Mapping quality (0-255; 255 for missing)."""
-    tags: Optional[Tags] = None
+    tags: Optional[Union[Tags, LazyTags]] = None
     """[SAM-like optional fields (tags)](https://samtools.github.io/hts-specs/SAMtags.pdf). 
-    It is recommended to use `PafRecord.get_tag` to retrieve individual tags."""
+    It is recommended to use `PafRecord.get_tag` to retrieve individual tags. If the
+    record was constructed with `lazy_tags=True`, this is a `pafpy.tag.LazyTags`."""
 
     def __str__(self) -> str:
-        tag_str = "" if self.tags is None else DELIM.join(map(str, self.tags.values()))
-        fields = [
-            self.qname,
-            self.qlen,
-            self.qstart,
-            self.qend,
-            self.strand,
-            self.tname,
-            self.tlen,
-            self.tstart,
-            self.tend,
-            self.mlen,
-            self.blen,
-            self.mapq,
-            tag_str,
-        ]
-        return DELIM.join(map(str, fields)).rstrip()
+        line = (
+            f"{self.qname}{DELIM}{self.qlen}{DELIM}{self.qstart}{DELIM}{self.qend}"
+            f"{DELIM}{self.strand}{DELIM}{self.tname}{DELIM}{self.tlen}{DELIM}"
+            f"{self.tstart}{DELIM}{self.tend}{DELIM}{self.mlen}{DELIM}{self.blen}"
+            f"{DELIM}{self.mapq}"
+        )
+        tags = self.tags
+        if not tags:
+            return line
+        elif isinstance(tags, LazyTags):
+            tag_str = DELIM.join(tags.raw_values())
+        else:
+            tag_str = DELIM.join(map(str, tags.values()))
+        return f"{line}{DELIM}{tag_str}".rstrip()
 
     @staticmethod
-    def from_str(line: str) -> "PafRecord":
+    def from_str(line: str, lazy_tags: bool = False) -> "PafRecord":
         """Construct a `PafRecord` from a string.
 
+        If `lazy_tags` is `True`, the SAM-like tags are not parsed up front. Instead,
+        `PafRecord.tags` will be a `pafpy.tag.LazyTags`, which only parses a tag when it
+        is first accessed (e.g. via `PafRecord.get_tag` or `PafRecord.is_primary`).
+        This is much faster when you only need a few (or none) of the tags.
+
         > *Note: If there are duplicate SAM-like tags, only the last one will be
         retained.*
 
@@ -145,23 +161,36 @@ class PafRecord(NamedTuple):
 
         assert record.qname == "query_name"
         assert record.mapq == 60
+
+        # only parse the tp tag when it is needed
+        line += "\ttp:A:P\tcg:Z:12M"
+        record = PafRecord.from_str(line, lazy_tags=True)
+
+        assert record.is_primary()
         ```
 
         ## Errors
         - If there are less than the expected number of fields (12), this function will
         raise a `MalformattedRecord` exception.
         - If there is an invalid tag, an `pafpy.tag.InvalidTagFormat` exception will
-        be raised.
+        be raised. When `lazy_tags` is `True`, this will only happen when the invalid
+        tag is accessed.
         """
         fields = line.rstrip().split(DELIM)
         if len(fields) < MIN_FIELDS:
             raise MalformattedRecord(
                 f"Expected {MIN_FIELDS} fields, but got {len(fields)}\n{line}"
             )
-        tags: Tags = dict()
-        for tag_str in fields[12:]:
-            tag = Tag.from_str(tag_str)
-            tags[tag.tag] = tag
+        tags: Union[Tags, LazyTags, None]
+        if len(fields) == MIN_FIELDS:
+            tags = None
+        elif lazy_tags:
+            tags = LazyTags(fields[MIN_FIELDS:])
+        else:
+            tags = dict()
+            for tag_str in fields[MIN_FIELDS:]:
+                tag = Tag.from_str(tag_str)
+                tags[tag.tag] = tag
 
         return PafRecord(
             qname=fields[0],
@@ -176,7 +205,93 @@ class PafRecord(NamedTuple):
             mlen=int(fields[9]),
             blen=int(fields[10]),
             mapq=int(fields[11]),
-            tags=tags or None,
+            tags=tags,
+        )
+
+    @staticmethod
+    def from_bytes(line: bytes, lazy_tags: bool = False) -> "PafRecord":
+        """Construct a `PafRecord` from a line of bytes - as read from a file opened in
+        binary mode - without first decoding the whole line.
+
+        The fields are split on `b"\t"` and the numeric fields are converted from bytes
+        directly. Only the names are decoded to `str`. The tags are decoded in one go,
+        unless `lazy_tags` is `True`, in which case each tag is only decoded (and
+        parsed) when it is accessed. The result is the same as
+        `PafRecord.from_str(line.decode())`.
+
+        ## Example
+        ```py
+        from pafpy import PafRecord
+
+        line = b"qname\t123\t65\t123\t+\ttname\t4378\t2555\t2556\t1139\t1228\t60\n"
+        record = PafRecord.from_bytes(line)
+
+        assert record == PafRecord.from_str(line.decode())
+        assert record.qname == "qname"
+        assert record.mapq == 60
+        ```
+
+        ## Errors
+        - If there are less than the expected number of fields (12), this function will
+        raise a `MalformattedRecord` exception.
+        - If the strand is not one of `+`, `-`, or `*`, a `ValueError` is raised.
+        - If there is an invalid tag, an `pafpy.tag.InvalidTagFormat` exception will
+        be raised. When `lazy_tags` is `True`, this will only happen when the invalid
+        tag is accessed.
+        """
+        return PafRecord._from_byte_fields(
+            line.rstrip().split(b"\t", MIN_FIELDS), lazy_tags
+        )
+
+    @staticmethod
+    def _from_byte_fields(
+        fields: List[bytes],
+        lazy_tags: bool,
+        qname: Optional[str] = None,
+        tname: Optional[str] = None,
+    ) -> "PafRecord":
+        """Construct a `PafRecord` from a line split with `line.split(b"\t", 12)`. If
+        `qname` or `tname` is given, it is used instead of decoding the field."""
+        tags = (
+            _tags_from_bytes(fields[MIN_FIELDS], lazy_tags)
+            if len(fields) > MIN_FIELDS
+            else None
+        )
+        return PafRecord._from_mandatory_fields(fields, tags, qname, tname)
+
+    @staticmethod
+    def _from_mandatory_fields(
+        fields: List[bytes],
+        tags: Union[Tags, LazyTags, None],
+        qname: Optional[str] = None,
+        tname: Optional[str] = None,
+    ) -> "PafRecord":
+        """Construct a `PafRecord` from the mandatory fields of a split line and its
+        already-parsed tags."""
+        if len(fields) < MIN_FIELDS:
+            line = b"\t".join(fields)
+            raise MalformattedRecord(
+                f"Expected {MIN_FIELDS} fields, but got {len(fields)}\n{line!r}"
+            )
+        try:
+            strand = _STRANDS_FROM_BYTES[fields[4]]
+        except KeyError:
+            raise ValueError(f"{fields[4].decode()!r} is not a valid Strand") from None
+
+        return PafRecord(
+            fields[0].decode() if qname is None else qname,
+            int(fields[1]),
+            int(fields[2]),
+            int(fields[3]),
+            strand,
+            fields[5].decode() if tname is None else tname,
+            int(fields[6]),
+            int(fields[7]),
+            int(fields[8]),
+            int(fields[9]),
+            int(fields[10]),
+            int(fields[11]),
+            tags,
         )
 
     @property
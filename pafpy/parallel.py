@@ -0,0 +1,215 @@
+"""This module contains functions for parsing a single PAF file with multiple processes.
+
+The main entry point is `pafpy.paffile.PafFile.iter_parallel`. The functions here split
+a file into newline-aligned byte ranges (or, for BGZF-compressed files, ranges of whole
+blocks) and parse each range in a worker process.
+
+```py
+from pafpy.parallel import newline_aligned_ranges
+```
+"""
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Deque, Iterator, List, Optional, Tuple, Union
+
+from pafpy.bgzf import (
+    BgzfReader,
+    iter_block_offsets,
+    make_virtual_offset,
+    read_block,
+    split_virtual_offset,
+)
+from pafpy.pafrecord import PafRecord
+
+PathLike = Union[str, os.PathLike]
+RecordFunc = Callable[[PafRecord], Any]
+ByteRange = Tuple[int, int]
+BlockRange = Tuple[int, int, int]
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+"""The default (approximate) number of bytes parsed by each task."""
+
+
+def newline_aligned_ranges(
+    path: PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[ByteRange]:
+    """Split an uncompressed file into `(start, end)` byte ranges of roughly
+    `chunk_size` bytes. Every range starts at the beginning of a line and ends just
+    after a newline (or at the end of the file), so no line is split between ranges.
+
+    ## Example
+    ```py
+    from pathlib import Path
+    import tempfile
+    from pafpy.parallel import newline_aligned_ranges
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.txt")
+        path.write_bytes(b"aaa\nbbb\nccc\n")
+        ranges = newline_aligned_ranges(path, chunk_size=5)
+
+    assert ranges == [(0, 8), (8, 12)]
+    ```
+
+    ## Errors
+    If `chunk_size` is less than 1, a `ValueError` is raised.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    size = os.path.getsize(path)
+    ranges: List[ByteRange] = []
+    start = 0
+    with open(path, mode="rb") as fileobj:
+        while start < size:
+            fileobj.seek(start + chunk_size - 1)
+            fileobj.readline()
+            end = min(fileobj.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(
+    path: PathLike,
+    byte_range: ByteRange,
+    lazy_tags: bool = False,
+    func: Optional[RecordFunc] = None,
+) -> List[Any]:
+    """Parse the lines within `byte_range` of an uncompressed file into
+    `pafpy.pafrecord.PafRecord`s.
+
+    If `func` is given, it is applied to each record and its result is kept instead of
+    the record - unless the result is `None`, in which case it is dropped. This allows
+    `func` to act as a map, a filter, or both.
+    """
+    start, end = byte_range
+    with open(path, mode="rb") as fileobj:
+        fileobj.seek(start)
+        data = fileobj.read(end - start)
+
+    lines = data.split(b"\n")
+    if not lines[-1]:
+        lines.pop()
+    return _parse_lines(lines, lazy_tags, func)
+
+
+def block_aligned_ranges(path: PathLike, chunk_size: int) -> List[BlockRange]:
+    """Split a BGZF file into ranges of whole blocks spanning roughly `chunk_size`
+    compressed bytes. Each range is a tuple of the offset of its first block, the
+    offset just after its last block, and the offset of the block preceding the range
+    (`-1` for the first range).
+
+    ## Errors
+    If `chunk_size` is less than 1, a `ValueError` is raised.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    ranges: List[BlockRange] = []
+    start = end = 0
+    previous = last = -1
+    with open(path, mode="rb") as fileobj:
+        for offset, size in iter_block_offsets(fileobj):
+            end = offset + size
+            last = offset
+            if end - start >= chunk_size:
+                ranges.append((start, end, previous))
+                start = end
+                previous = last
+    if end > start:
+        ranges.append((start, end, previous))
+    return ranges
+
+
+def parse_bgzf_range(
+    path: PathLike,
+    block_range: BlockRange,
+    lazy_tags: bool = False,
+    func: Optional[RecordFunc] = None,
+) -> List[Any]:
+    """Parse the lines that start within `block_range` (see `block_aligned_ranges`) of
+    a BGZF file. A line that starts in the last block of the range is read to its end,
+    even if that is in a later block. See `parse_range` for a description of `func`.
+    """
+    start, end, previous = block_range
+    line_continues = False
+    if previous >= 0:
+        with open(path, mode="rb") as fileobj:
+            fileobj.seek(previous)
+            data = read_block(fileobj).decompress()
+        line_continues = bool(data) and not data.endswith(b"\n")
+
+    lines = []
+    with BgzfReader(path) as reader:
+        reader.seek(make_virtual_offset(start, 0))
+        if line_continues:  # the line belongs to the previous range
+            reader.readline()
+        while split_virtual_offset(reader.tell())[0] < end:
+            line = reader.readline()
+            if not line:
+                break
+            lines.append(line)
+    return _parse_lines(lines, lazy_tags, func)
+
+
+def _parse_lines(
+    lines: List[bytes], lazy_tags: bool, func: Optional[RecordFunc]
+) -> List[Any]:
+    results = []
+    for line in lines:
+        record = PafRecord.from_bytes(line, lazy_tags=lazy_tags)
+        result = record if func is None else func(record)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def iter_parallel(
+    path: PathLike,
+    processes: Optional[int] = None,
+    ordered: bool = True,
+    func: Optional[RecordFunc] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    lazy_tags: bool = False,
+    bgzf: bool = False,
+) -> Iterator[Any]:
+    """Parse an uncompressed (or, if `bgzf` is `True`, BGZF-compressed) PAF file with a
+    pool of `processes` worker processes. See `pafpy.paffile.PafFile.iter_parallel`
+    for details."""
+    processes = processes or os.cpu_count() or 1
+    if bgzf:
+        parse = parse_bgzf_range
+        ranges = block_aligned_ranges(path, chunk_size=chunk_size)
+    else:
+        parse = parse_range
+        ranges = newline_aligned_ranges(path, chunk_size=chunk_size)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # bound the number of in-flight tasks so that memory use does not grow with
+        # the file size when the consumer is slower than the workers
+        max_pending = 2 * processes
+        tasks = iter(ranges)
+        pending: Deque[Future] = deque()
+
+        def submit_next() -> bool:
+            byte_range = next(tasks, None)
+            if byte_range is None:
+                return False
+            pending.append(executor.submit(parse, path, byte_range, lazy_tags, func))
+            return True
+
+        while len(pending) < max_pending and submit_next():
+            pass
+
+        try:
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                submit_next()
+                yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,162 @@
+"""This module contains objects for parsing only some of the fields of PAF records.
+
+A `pafpy.projection.Projection` names the mandatory fields and tags that are needed.
+Only those are converted from each line - the other fields are never converted to
+`int`, no `pafpy.strand.Strand` is looked up unless `strand` is requested, and no
+`pafpy.tag.Tag` is built - and the result is a lightweight named tuple holding just
+the requested values. Projections are usually used via `pafpy.paffile.PafFile`'s
+`fields` and `tags` arguments.
+
+```py
+from pafpy.projection import Projection
+```
+"""
+from collections import namedtuple
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from pafpy.pafrecord import (
+    _STRANDS_FROM_BYTES,
+    MIN_FIELDS,
+    MalformattedRecord,
+    PafRecord,
+)
+from pafpy.tag import _TAG_CHARS, _TAG_FIRST_CHARS, _find_raw_tag
+
+FIELD_NAMES = PafRecord._fields[:MIN_FIELDS]
+"""The names of the mandatory fields, in the order they appear in a PAF line."""
+
+_NAME_FIELDS = {"qname", "tname"}
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode()
+
+
+def _strand(raw: bytes):
+    try:
+        return _STRANDS_FROM_BYTES[raw]
+    except KeyError:
+        raise ValueError(f"{raw.decode()!r} is not a valid Strand") from None
+
+
+def _field_converter(name: str) -> Callable[[bytes], Any]:
+    if name in _NAME_FIELDS:
+        return _decode
+    if name == "strand":
+        return _strand
+    return int
+
+
+def _tag_converter(key: bytes, tab_key: bytes) -> Callable[[bytes], Any]:
+    def convert(tags: bytes) -> Optional[Any]:
+        raw = _find_raw_tag(tags, key, tab_key)
+        if raw is None:
+            return None
+        tag_type = raw[:1]
+        if tag_type == b"i":
+            return int(raw[2:])
+        if tag_type == b"f":
+            return float(raw[2:])
+        return raw[2:].decode()
+
+    return convert
+
+
+class Projection:
+    """Parse only the mandatory `fields` (e.g. `"qname"` or `"mapq"` - see
+    `FIELD_NAMES`) and the values of the `tags` (e.g. `"NM"`) of a PAF line.
+
+    Calling a projection with a PAF line gives a named tuple with one element per
+    requested field and tag, in the order they were requested. Fields have the same
+    types as in a `pafpy.pafrecord.PafRecord`. For tags, only the value is kept - an
+    `int` for type `i`, a `float` for type `f`, and a `str` otherwise - or `None` if the
+    record does not have the tag.
+
+    Every line must have all of the mandatory fields, as for a `PafRecord`. If neither
+    the tags nor `mapq` are requested, the tags are not split off from `mapq`.
+
+    ## Example
+    ```py
+    from pafpy.projection import Projection
+
+    projection = Projection(fields=["qname", "mapq"], tags=["NM", "cg"])
+    line = b"read1\t10\t0\t10\t+\tchr1\t100\t0\t10\t9\t10\t60\tNM:i:1\ttp:A:P"
+    result = projection(line)
+
+    assert result.qname == "read1"
+    assert result.mapq == 60
+    assert result.NM == 1
+    assert result.cg is None
+    assert tuple(result) == ("read1", 60, 1, None)
+    ```
+
+    ## Errors
+    - If a field is not one of `FIELD_NAMES`, a tag is not a valid two-character tag
+    name, or a name is requested more than once, a `ValueError` is raised.
+    - If no fields or tags are requested, a `ValueError` is raised.
+    """
+
+    def __init__(self, fields: Sequence[str] = (), tags: Sequence[str] = ()):
+        fields = list(fields)
+        tags = list(tags)
+        for name in fields:
+            if name not in FIELD_NAMES:
+                raise ValueError(
+                    f"Unknown field {name!r}. Expected one of {FIELD_NAMES}"
+                )
+        for name in tags:
+            if (
+                len(name) != 2
+                or name[0] not in _TAG_FIRST_CHARS
+                or name[1] not in _TAG_CHARS
+            ):
+                raise ValueError(f"{name!r} is not a valid tag name")
+        if len(set(fields + tags)) != len(fields + tags):
+            raise ValueError("Each field and tag can only be requested once")
+        if not fields and not tags:
+            raise ValueError("At least one field or tag must be requested")
+
+        self.fields: Tuple[str, ...] = tuple(fields)
+        """The requested mandatory fields."""
+        self.tags: Tuple[str, ...] = tuple(tags)
+        """The requested tags."""
+        self.record_type = namedtuple("ProjectedRecord", fields + tags)
+        """The named tuple type returned by the projection."""
+
+        indices = [FIELD_NAMES.index(name) for name in fields]
+        self._field_converters = [
+            (index, _field_converter(name)) for index, name in zip(indices, fields)
+        ]
+        self._tag_converters = [
+            _tag_converter(f"{name}:".encode(), f"\t{name}:".encode()) for name in tags
+        ]
+        # the last mandatory field only needs splitting from the tags if either is used
+        last_field = MIN_FIELDS - 1
+        self.maxsplit: int = MIN_FIELDS if tags or last_field in indices else last_field
+        """The `maxsplit` used when splitting a line on tabs."""
+
+    def __call__(self, line: bytes) -> tuple:
+        return self.from_fields(line.rstrip().split(b"\t", self.maxsplit))
+
+    def __repr__(self) -> str:
+        return f"Projection(fields={list(self.fields)!r}, tags={list(self.tags)!r})"
+
+    def from_fields(self, fields: List[bytes]) -> tuple:
+        """Project a line that has already been split with
+        `line.split(b"\\t", maxsplit)`, where `maxsplit` is at least
+        `Projection.maxsplit`.
+
+        ## Errors
+        If the line has fewer than the expected number of fields (12), a
+        `pafpy.pafrecord.MalformattedRecord` exception is raised.
+        """
+        if len(fields) < MIN_FIELDS:
+            line = b"\t".join(fields)
+            raise MalformattedRecord(
+                f"Expected {MIN_FIELDS} fields, but got {len(fields)}\n{line!r}"
+            )
+        values = [convert(fields[index]) for index, convert in self._field_converters]
+        if self._tag_converters:
+            tags = fields[MIN_FIELDS] if len(fields) > MIN_FIELDS else b""
+            values.extend(convert(tags) for convert in self._tag_converters)
+        return self.record_type._make(values)
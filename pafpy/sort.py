@@ -0,0 +1,304 @@
+"""This module contains functions for sorting PAF files that are too large to sort in
+memory.
+
+The lines of the input are read into memory until (approximately) `memory_limit`
+bytes are held, sorted, and written to a temporary file. The sorted runs are then
+merged (see [`heapq.merge`](https://docs.python.org/3/library/heapq.html#heapq.merge))
+into the final order. Lines are sorted on their raw fields - no
+`pafpy.pafrecord.PafRecord` is created until the sorted records are returned.
+
+Files that are already sorted (e.g. the outputs of sharded alignment jobs) can be
+combined into one sorted stream with `pafpy.sort.merge_paf_files`, in the same way as
+the sorted runs.
+
+```py
+from pafpy.sort import iter_sorted, merge_paf_files, sort_paf
+```
+"""
+import heapq
+import os
+import sys
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+from pafpy.writer import PafWriter
+
+PathLike = Union[Path, str, os.PathLike]
+SortKey = Tuple[bytes, int]
+
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+"""The default (approximate) number of bytes of lines held in memory while sorting."""
+MERGE_FAN_IN = 128
+"""The maximum number of sorted runs that are merged at once. If there are more runs,
+they are merged in several passes so as not to run out of file handles."""
+# the approximate memory used by a line (and its sort key) beyond its own bytes
+_LINE_OVERHEAD = 160
+
+
+def _target_key(line: bytes) -> SortKey:
+    fields = line.split(b"\t", 8)
+    if len(fields) < 9:
+        raise MalformattedRecord(f"Too few fields to sort by target\n{line!r}")
+    return fields[5], int(fields[7])
+
+
+def _query_key(line: bytes) -> SortKey:
+    fields = line.split(b"\t", 3)
+    if len(fields) < 4:
+        raise MalformattedRecord(f"Too few fields to sort by query\n{line!r}")
+    return fields[0], int(fields[2])
+
+
+SORT_KEYS = {"target": _target_key, "query": _query_key}
+"""The orders records can be sorted in: `"target"` sorts by `(tname, tstart)` and
+`"query"` by `(qname, qstart)`. Names are compared by their (UTF-8) bytes."""
+
+
+def _check_order(by: str) -> Callable[[bytes], SortKey]:
+    if by not in SORT_KEYS:
+        raise ValueError(
+            f"Unknown sort order {by!r}. Expected one of {list(SORT_KEYS)}"
+        )
+    return SORT_KEYS[by]
+
+
+def _lines(paf: PafFile) -> Iterator[bytes]:
+    for line in paf.iter_lines():
+        line = line.rstrip()
+        if line:
+            yield line + b"\n"
+
+
+def _write_run(lines: List[bytes], directory: str, number: int) -> str:
+    path = os.path.join(directory, f"run{number:06}.paf")
+    with open(path, mode="wb") as fileobj:
+        fileobj.writelines(lines)
+    return path
+
+
+def _merge(
+    fileobjs: Iterable[Union[PathLike, IO]], key: Callable[[bytes], SortKey]
+) -> Iterator[bytes]:
+    with ExitStack() as stack:
+        pafs = [stack.enter_context(PafFile(fileobj)) for fileobj in fileobjs]
+        yield from heapq.merge(*map(_lines, pafs), key=key)
+
+
+def _merge_runs(
+    paths: List[str], key: Callable[[bytes], SortKey], directory: str
+) -> Iterator[bytes]:
+    number = len(paths)
+    while len(paths) > MERGE_FAN_IN:
+        # merge one level at a time, so each line is rewritten once per level. The
+        # groups stay in the order of the input, so lines with equal keys do too
+        merged = []
+        for start in range(0, len(paths), MERGE_FAN_IN):
+            end = start + MERGE_FAN_IN
+            merged.append(_write_merged(paths[start:end], key, directory, number))
+            number += 1
+        paths = merged
+    return _merge(paths, key)
+
+
+def _write_merged(
+    paths: List[str], key: Callable[[bytes], SortKey], directory: str, number: int
+) -> str:
+    path = os.path.join(directory, f"run{number:06}.paf")
+    with open(path, mode="wb") as fileobj:
+        fileobj.writelines(_merge(paths, key))
+    for run in paths:
+        os.remove(run)
+    return path
+
+
+def iter_sorted_lines(
+    fileobj: Union[PathLike, IO],
+    by: str = "target",
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    tmpdir: Optional[PathLike] = None,
+) -> Iterator[bytes]:
+    """Iterate over the raw lines (`bytes`, ending in a newline) of the PAF file
+    `fileobj`, sorted `by` `"target"` or `"query"` (see `SORT_KEYS`). `fileobj` is
+    anything `pafpy.paffile.PafFile` accepts.
+
+    Lines with equal keys stay in the order of the input. If the lines do not fit in
+    `memory_limit` bytes, sorted runs are written to a temporary directory (within
+    `tmpdir`, if given), which is removed once the iterator is exhausted or closed.
+
+    ## Errors
+    - If `by` is not one of `SORT_KEYS`, a `ValueError` is raised.
+    - If a line has too few fields, a `pafpy.pafrecord.MalformattedRecord` exception is
+    raised.
+    """
+    return _iter_sorted_lines(fileobj, _check_order(by), memory_limit, tmpdir)
+
+
+def _iter_sorted_lines(
+    fileobj: Union[PathLike, IO],
+    key: Callable[[bytes], SortKey],
+    memory_limit: int,
+    tmpdir: Optional[PathLike],
+) -> Iterator[bytes]:
+    with PafFile(fileobj) as paf, tempfile.TemporaryDirectory(dir=tmpdir) as directory:
+        runs: List[str] = []
+        lines: List[bytes] = []
+        size = 0
+        for line in _lines(paf):
+            lines.append(line)
+            size += sys.getsizeof(line) + _LINE_OVERHEAD
+            if size >= memory_limit:
+                lines.sort(key=key)
+                runs.append(_write_run(lines, directory, len(runs)))
+                lines = []
+                size = 0
+        lines.sort(key=key)
+        if not runs:
+            yield from lines
+            return
+        if lines:
+            runs.append(_write_run(lines, directory, len(runs)))
+        del lines
+        yield from _merge_runs(runs, key, directory)
+
+
+def iter_merged_lines(
+    fileobjs: Iterable[Union[PathLike, IO]], by: str = "target"
+) -> Iterator[bytes]:
+    """Iterate over the raw lines (`bytes`, ending in a newline) of several PAF files
+    that are each sorted `by` `"target"` or `"query"` (see `SORT_KEYS`), in one
+    combined order. See `merge_paf_files`.
+
+    ## Errors
+    - If `by` is not one of `SORT_KEYS`, a `ValueError` is raised.
+    - If a line has too few fields, a `pafpy.pafrecord.MalformattedRecord` exception is
+    raised.
+    """
+    return _merge(list(fileobjs), _check_order(by))
+
+
+def merge_paf_files(
+    fileobjs: Iterable[Union[PathLike, IO]],
+    key: Union[str, Callable[[PafRecord], Any]] = "target",
+    lazy_tags: bool = False,
+) -> Iterator[PafRecord]:
+    """Iterate over the records of several PAF files, each of which is already sorted,
+    in one combined order. Each of `fileobjs` is anything `pafpy.paffile.PafFile`
+    accepts (e.g. paths to the outputs of `sort_paf`, compressed or not).
+
+    `key` is `"target"` or `"query"` (see `SORT_KEYS`) or a function of a
+    `pafpy.pafrecord.PafRecord` that the files are sorted by. With `"target"` or
+    `"query"`, the lines are merged on their raw fields and only parsed once they are
+    returned.
+
+    All of the files are open at once, but only the next line (and a read buffer) of
+    each is held in memory. Records with equal keys are returned in the order the files
+    are given. The files are closed once the iterator is exhausted or closed.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.sort import merge_paf_files
+    from pathlib import Path
+    import tempfile
+
+    records = [PafRecord(tname="chr1", tstart=i) for i in range(6)]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        paths = [Path(f"{tmpdirname}/shard{i}.paf") for i in range(2)]
+        paths[0].write_text("\n".join(map(str, records[0::2])))
+        paths[1].write_text("\n".join(map(str, records[1::2])))
+
+        merged = list(merge_paf_files(paths))
+        merged_by_tstart = list(merge_paf_files(paths, key=lambda r: r.tstart))
+
+    assert merged == records
+    assert merged_by_tstart == records
+    ```
+
+    ## Errors
+    - If `key` is a string other than those in `SORT_KEYS`, a `ValueError` is raised.
+    - See `pafpy.paffile.PafFile` for errors raised when parsing.
+    """
+    fileobjs = list(fileobjs)
+    if isinstance(key, str):
+        lines = iter_merged_lines(fileobjs, by=key)
+        return (PafRecord.from_bytes(line, lazy_tags=lazy_tags) for line in lines)
+    return _merge_records(fileobjs, key, lazy_tags)
+
+
+def _merge_records(
+    fileobjs: List[Union[PathLike, IO]],
+    key: Callable[[PafRecord], Any],
+    lazy_tags: bool,
+) -> Iterator[PafRecord]:
+    with ExitStack() as stack:
+        pafs = [
+            stack.enter_context(PafFile(fileobj, lazy_tags=lazy_tags))
+            for fileobj in fileobjs
+        ]
+        yield from heapq.merge(*pafs, key=key)
+
+
+def iter_sorted(
+    fileobj: Union[PathLike, IO],
+    by: str = "target",
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    tmpdir: Optional[PathLike] = None,
+    lazy_tags: bool = False,
+) -> Iterator[PafRecord]:
+    """Iterate over the records of the PAF file `fileobj`, sorted `by` `"target"` or
+    `"query"`. See `iter_sorted_lines` for the other arguments.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.sort import iter_sorted
+    from pathlib import Path
+    import tempfile
+
+    records = [
+        PafRecord(qname="read1", tname="chr2", tstart=5),
+        PafRecord(qname="read2", tname="chr1", tstart=9),
+        PafRecord(qname="read3", tname="chr1", tstart=3),
+    ]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        path.write_text("\n".join(map(str, records)))
+
+        by_target = list(iter_sorted(path, memory_limit=1))
+        by_query = list(iter_sorted(path, by="query"))
+
+    assert by_target == [records[2], records[1], records[0]]
+    assert by_query == records
+    ```
+
+    ## Errors
+    See `iter_sorted_lines`.
+    """
+    lines = iter_sorted_lines(fileobj, by, memory_limit, tmpdir)
+    return (PafRecord.from_bytes(line, lazy_tags=lazy_tags) for line in lines)
+
+
+def sort_paf(
+    fileobj: Union[PathLike, IO],
+    output: Union[PathLike, IO],
+    by: str = "target",
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    tmpdir: Optional[PathLike] = None,
+    compression: Optional[str] = None,
+    threads: int = 0,
+):
+    """Sort the PAF file `fileobj` `by` `"target"` or `"query"` and write it to
+    `output`. The lines are copied as they are. `output`, `compression`, and
+    `threads` are as for `pafpy.writer.PafWriter`. See `iter_sorted_lines` for the
+    other arguments.
+
+    ## Errors
+    See `iter_sorted_lines` and `pafpy.writer.PafWriter`.
+    """
+    lines = iter_sorted_lines(fileobj, by, memory_limit, tmpdir)
+    with PafWriter(output, compression=compression, threads=threads) as writer:
+        writer.write_lines(lines)
@@ -0,0 +1,231 @@
+"""This module contains objects for measuring how fast a PAF file is read.
+
+Pass `stats=True` (or a `pafpy.stats.ReadStats`) to `pafpy.paffile.PafFile` and, as
+its records are iterated, it counts the lines, records, and bytes read and times each
+stage of the hot path: reading (and decompressing) lines, building records, and
+parsing tags. When statistics are not requested, the only cost is one check per
+record.
+
+```py
+from pafpy.stats import ReadStats
+```
+"""
+import io
+from typing import IO, Any, Callable, Dict, Optional
+
+DEFAULT_INTERVAL = 100_000
+"""The default number of lines between calls to the callback of a `ReadStats`."""
+
+_MB = 1_000_000
+
+
+class ReadStats:
+    """Counts and timings for reading the records of a PAF file.
+
+    The time taken to iterate over a `pafpy.paffile.PafFile` is split into:
+
+    - `read_time` - getting the next line from the file, including any decompression
+    (with `read_ahead` or BGZF `threads`, this is just the time spent waiting for the
+    background threads).
+    - `parse_time` - splitting the line, checking any `where` condition, and building the
+    record (or projected tuple) from the mandatory fields.
+    - `tag_time` - parsing the tags of the record (with `lazy_tags`, this is only the
+    time taken to set them aside).
+
+    `elapsed` is the wall-clock time from the first line being read to the last, so it
+    also includes the time spent by the caller on each record. The rates
+    (`lines_per_sec`, `records_per_sec`, and `mb_per_sec`) are relative to it.
+
+    If a `callback` is given, it is called with the `ReadStats` every `interval` lines
+    and once the end of the file is reached - e.g. to log progress.
+
+    A `ReadStats` can be shared by several `PafFile`s to accumulate their totals.
+
+    ## Example
+    ```py
+    from pafpy import PafFile, PafRecord
+    from pathlib import Path
+    import tempfile
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf")
+        records = [PafRecord(qname=f"read{i}") for i in range(5)]
+        path.write_text("\n".join(map(str, records)))
+
+        with PafFile(path, stats=True) as paf:
+            paf.stats.callback = lambda stats: reports.append(stats.lines)
+            paf.stats.interval = 2
+            assert list(paf) == records
+        size = path.stat().st_size
+
+    assert paf.stats.records == 5
+    assert paf.stats.bytes_read == size
+    assert reports == [2, 4, 5]
+    assert paf.stats.records_per_sec > 0
+    ```
+
+    ## Errors
+    If `interval` is less than 1, a `ValueError` is raised.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[["ReadStats"], Any]] = None,
+        interval: int = DEFAULT_INTERVAL,
+    ):
+        if interval < 1:
+            raise ValueError(f"interval must be at least 1, got {interval}")
+        self.callback = callback
+        """Called with the `ReadStats` every `interval` lines and at the end of the
+        file (`None` for no calls)."""
+        self.interval = interval
+        """The number of lines between calls to `callback`."""
+        self.reset()
+
+    def reset(self):
+        """Set all of the counts and timings back to zero."""
+        self.lines = 0
+        """The number of lines read."""
+        self.records = 0
+        """The number of records returned (lines that matched any `where`
+        condition)."""
+        self.bytes_read = 0
+        """The number of (decompressed) bytes of the lines read."""
+        self.compressed_bytes_read = 0
+        """The number of bytes read from compressed input (0 if the input is not
+        compressed, or is an already-open file object)."""
+        self.read_time = 0.0
+        """Seconds spent reading and decompressing lines."""
+        self.parse_time = 0.0
+        """Seconds spent splitting lines and building records, excluding tags."""
+        self.tag_time = 0.0
+        """Seconds spent parsing tags."""
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+        # the number of lines at the last call to the callback
+        self._reported: Optional[int] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Wall-clock seconds from the start of reading the first line to the end of
+        parsing the last."""
+        if self._start is None:
+            return 0.0
+        return self._end - self._start
+
+    def _rate(self, count: float) -> float:
+        elapsed = self.elapsed
+        return count / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def lines_per_sec(self) -> float:
+        """Lines read per second of `elapsed` time."""
+        return self._rate(self.lines)
+
+    @property
+    def records_per_sec(self) -> float:
+        """Records returned per second of `elapsed` time."""
+        return self._rate(self.records)
+
+    @property
+    def mb_per_sec(self) -> float:
+        """Megabytes (10<sup>6</sup> bytes) of decompressed lines read per second of
+        `elapsed` time."""
+        return self._rate(self.bytes_read / _MB)
+
+    def as_dict(self) -> Dict[str, float]:
+        """The counts, timings, and rates as a `dict` - e.g. for logging as JSON."""
+        return {
+            "lines": self.lines,
+            "records": self.records,
+            "bytes_read": self.bytes_read,
+            "compressed_bytes_read": self.compressed_bytes_read,
+            "read_time": self.read_time,
+            "parse_time": self.parse_time,
+            "tag_time": self.tag_time,
+            "elapsed": self.elapsed,
+            "lines_per_sec": self.lines_per_sec,
+            "records_per_sec": self.records_per_sec,
+            "mb_per_sec": self.mb_per_sec,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"ReadStats(lines={self.lines}, records={self.records}, "
+            f"bytes_read={self.bytes_read}, "
+            f"compressed_bytes_read={self.compressed_bytes_read}, "
+            f"read_time={self.read_time:.3f}, parse_time={self.parse_time:.3f}, "
+            f"tag_time={self.tag_time:.3f}, elapsed={self.elapsed:.3f})"
+        )
+
+    def _add(
+        self,
+        nbytes: int,
+        start: float,
+        read: float,
+        end: float,
+        tag_time: float,
+        matched: bool,
+    ):
+        """Add a line of `nbytes` bytes, read from `start` to `read` and parsed from
+        `read` to `end`, of which `tag_time` was spent parsing tags."""
+        if self._start is None:
+            self._start = start
+        self._end = end
+        self.lines += 1
+        self.records += matched
+        self.bytes_read += nbytes
+        self.read_time += read - start
+        self.parse_time += end - read - tag_time
+        self.tag_time += tag_time
+        if self.callback is not None and self.lines % self.interval == 0:
+            self._report()
+
+    def _report(self):
+        self._reported = self.lines
+        self.callback(self)
+
+    def _finish(self, end: float):
+        """Record reaching the end of a file at `end`. The callback is only called if
+        it has not already been called for the current number of lines."""
+        if self._start is not None:
+            self._end = end
+        if self.callback is not None and self._reported != self.lines:
+            self._report()
+
+
+class CountingReader(io.IOBase):
+    """A binary file object that reads from `fileobj` and adds the number of bytes
+    read to the `compressed_bytes_read` of a `ReadStats`. `fileobj` is only closed with
+    the reader if `owns_file` is `True`."""
+
+    def __init__(self, fileobj: IO, stats: ReadStats, owns_file: bool = True):
+        self._file = fileobj
+        self._stats = stats
+        self._owns_file = owns_file
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._file.seekable()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._stats.compressed_bytes_read += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
@@ -0,0 +1,372 @@
+"""This module contains a compact in-memory store for large numbers of PAF records.
+
+A `pafpy.pafrecord.PafRecord` is a tuple of Python objects with a `dict` of `Tag`s, which
+costs around a kilobyte per record. `pafpy.store.RecordStore` instead packs the fields
+of all records into [`array`](https://docs.python.org/3/library/array.html)s, stores
+each distinct query and target name once, and keeps the (unparsed) tags of all records
+in a single shared buffer. Records are accessed through lightweight
+`pafpy.store.CompactRecord` views that offer the same accessors as a `PafRecord`.
+
+```py
+from pafpy.store import RecordStore
+```
+"""
+from array import array
+from typing import AnyStr, Iterable, Iterator, List, Optional
+
+from pafpy.batch import (
+    _CODE_TO_STRAND,
+    _STRAND_LOOKUP,
+    INT_COLUMNS,
+    INT_TYPECODE,
+    MAPQ_TYPECODE,
+    STRAND_CODES,
+    STRAND_TYPECODE,
+)
+from pafpy.names import CODE_TYPECODE, NameDictionary
+from pafpy.pafrecord import MIN_FIELDS, MalformattedRecord, PafRecord
+from pafpy.strand import Strand
+from pafpy.tag import LazyTags
+
+OFFSET_TYPECODE = "Q"
+"""The `array` typecode used for the offsets into the tag buffer (unsigned 64-bit)."""
+
+
+class CompactRecord:
+    """A read-only view of a single record in a `RecordStore`.
+
+    It has the same fields (`qname`, `qlen`, ..., `mapq`, `tags`) and methods
+    (`query_coverage`, `blast_identity`, `get_tag`, `is_primary`, etc.) as a
+    `pafpy.pafrecord.PafRecord`, but only holds a reference to its store and its index
+    within it. The fields are read from the store on access. `tags` is a
+    `pafpy.tag.LazyTags` built from the shared tag buffer, so tags are only parsed when
+    they are accessed.
+
+    Use `CompactRecord.to_record` to get a `PafRecord`.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "RecordStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __str__(self) -> str:
+        return str(self.to_record())
+
+    def __repr__(self) -> str:
+        return f"CompactRecord({str(self)!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactRecord):
+            return self.to_record() == other.to_record()
+        if isinstance(other, PafRecord):
+            return self.to_record() == other
+        return NotImplemented
+
+    @property
+    def qname(self) -> str:
+        """Query sequence name."""
+        return self._store._qnames.names[self._store.qname[self._index]]
+
+    @property
+    def qlen(self) -> int:
+        """Query sequence length."""
+        return self._store.qlen[self._index]
+
+    @property
+    def qstart(self) -> int:
+        """Query start (0-based; BED-like; closed)."""
+        return self._store.qstart[self._index]
+
+    @property
+    def qend(self) -> int:
+        """Query end (0-based; BED-like; open)."""
+        return self._store.qend[self._index]
+
+    @property
+    def strand(self) -> Strand:
+        """Relative strand: "+" or "-"; "*" for unmapped."""
+        return _CODE_TO_STRAND[self._store.strand[self._index]]
+
+    @property
+    def tname(self) -> str:
+        """Target sequence name."""
+        return self._store._tnames.names[self._store.tname[self._index]]
+
+    @property
+    def tlen(self) -> int:
+        """Target sequence length."""
+        return self._store.tlen[self._index]
+
+    @property
+    def tstart(self) -> int:
+        """Target start on original strand (0-based)."""
+        return self._store.tstart[self._index]
+
+    @property
+    def tend(self) -> int:
+        """Target end on original strand (0-based)."""
+        return self._store.tend[self._index]
+
+    @property
+    def mlen(self) -> int:
+        """Number of matching bases in the mapping."""
+        return self._store.mlen[self._index]
+
+    @property
+    def blen(self) -> int:
+        """Alignment block length. Number of bases, including gaps, in the mapping."""
+        return self._store.blen[self._index]
+
+    @property
+    def mapq(self) -> int:
+        """Mapping quality (0-255; 255 for missing)."""
+        return self._store.mapq[self._index]
+
+    @property
+    def tags(self) -> Optional[LazyTags]:
+        """The tags of the record, or `None` if it has none."""
+        offsets = self._store.tag_offsets
+        start, end = offsets[self._index], offsets[self._index + 1]
+        if start == end:
+            return None
+        return LazyTags(bytes(self._store.tag_data[start:end]).split(b"\t"))
+
+    query_aligned_length = PafRecord.query_aligned_length
+    query_coverage = PafRecord.query_coverage
+    target_coverage = PafRecord.target_coverage
+    target_aligned_length = PafRecord.target_aligned_length
+    relative_length = PafRecord.relative_length
+    blast_identity = PafRecord.blast_identity
+    is_unmapped = PafRecord.is_unmapped
+    is_primary = PafRecord.is_primary
+    is_secondary = PafRecord.is_secondary
+    is_inversion = PafRecord.is_inversion
+    get_tag = PafRecord.get_tag
+
+    def to_record(self) -> PafRecord:
+        """Convert the view into a `pafpy.pafrecord.PafRecord` (with lazily-parsed
+        tags)."""
+        return PafRecord(
+            self.qname,
+            self.qlen,
+            self.qstart,
+            self.qend,
+            self.strand,
+            self.tname,
+            self.tlen,
+            self.tstart,
+            self.tend,
+            self.mlen,
+            self.blen,
+            self.mapq,
+            self.tags,
+        )
+
+
+class RecordStore:
+    """A compact, append-only store of PAF records.
+
+    The integer fields are stored in one `array` per field (as in a
+    `pafpy.batch.PafBatch`), names are stored once and referenced by integer codes, and
+    the raw tags of all records are kept back-to-back in `RecordStore.tag_data`, with
+    `RecordStore.tag_offsets` marking where the tags of each record start and end.
+
+    Indexing or iterating over the store gives `CompactRecord` views.
+
+    ## Example
+    ```py
+    from pafpy import PafRecord
+    from pafpy.store import RecordStore
+
+    lines = [
+        "read1\t10\t5\t9\t+\tchr1\t100\t50\t54\t3\t4\t60\ttp:A:P\tNM:i:1",
+        "read2\t10\t0\t10\t-\tchr1\t100\t10\t20\t10\t10\t0\ttp:A:S",
+    ]
+    store = RecordStore.from_lines(lines)
+    store.append(PafRecord(qname="read3"))
+
+    assert len(store) == 3
+    record = store[0]
+    assert record.qname == "read1"
+    assert record.query_coverage == 0.4
+    assert record.blast_identity() == 0.75
+    assert record.get_tag("NM").value == 1
+    assert record.is_primary()
+    assert not store[1].is_primary()
+    assert store[2].tags is None
+    assert record.to_record() == PafRecord.from_str(lines[0])
+    ```
+    """
+
+    def __init__(self):
+        self.qname = array(CODE_TYPECODE)
+        """Query name codes."""
+        self.qlen = array(INT_TYPECODE)
+        """Query sequence lengths."""
+        self.qstart = array(INT_TYPECODE)
+        """Query starts."""
+        self.qend = array(INT_TYPECODE)
+        """Query ends."""
+        self.strand = array(STRAND_TYPECODE)
+        """Strands, encoded as per `pafpy.batch.STRAND_CODES`."""
+        self.tname = array(CODE_TYPECODE)
+        """Target name codes."""
+        self.tlen = array(INT_TYPECODE)
+        """Target sequence lengths."""
+        self.tstart = array(INT_TYPECODE)
+        """Target starts."""
+        self.tend = array(INT_TYPECODE)
+        """Target ends."""
+        self.mlen = array(INT_TYPECODE)
+        """Number of matching bases."""
+        self.blen = array(INT_TYPECODE)
+        """Alignment block lengths."""
+        self.mapq = array(MAPQ_TYPECODE)
+        """Mapping qualities."""
+        self.tag_data = bytearray()
+        """The tab-separated raw tags of all records."""
+        self.tag_offsets = array(OFFSET_TYPECODE, [0])
+        """The offset into `RecordStore.tag_data` at which the tags of each record
+        start, followed by the total length of `RecordStore.tag_data`."""
+        self._qnames = NameDictionary()
+        self._tnames = NameDictionary()
+
+    def __len__(self) -> int:
+        return len(self.mapq)
+
+    def __getitem__(self, index: int) -> CompactRecord:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RecordStore index out of range")
+        return CompactRecord(self, index)
+
+    def __iter__(self) -> Iterator[CompactRecord]:
+        return (CompactRecord(self, index) for index in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the columns, tags, and names of the store
+        (excluding the overhead of the Python objects holding them)."""
+        columns = self._columns() + [self.tag_offsets]
+        names = self._qnames.names + self._tnames.names
+        return (
+            sum(column.itemsize * len(column) for column in columns)
+            + len(self.tag_data)
+            + sum(map(len, names))
+        )
+
+    def _columns(self) -> List[array]:
+        columns = [self.qname, self.tname, self.strand, self.mapq]
+        columns.extend(getattr(self, name) for name in INT_COLUMNS)
+        return columns
+
+    def _truncate(self, size: int):
+        """Drop everything after the first `size` records - e.g. the columns already
+        appended for a record that turned out to be invalid."""
+        for column in self._columns():
+            del column[size:]
+        tags_end = self.tag_offsets[size]
+        del self.tag_data[tags_end:]
+        offsets_end = size + 1
+        del self.tag_offsets[offsets_end:]
+
+    def _append_tags(self, tags: bytes):
+        self.tag_data += tags
+        self.tag_offsets.append(len(self.tag_data))
+
+    def append(self, record: PafRecord):
+        """Add a record to the store. If any of its fields cannot be stored, the store
+        is left unchanged."""
+        size = len(self)
+        try:
+            self._append_record(record)
+        except BaseException:
+            self._truncate(size)
+            raise
+
+    def _append_record(self, record: PafRecord):
+        # names are keyed as bytes to share codes with those from extend_lines
+        self.qname.append(self._qnames.code(record.qname.encode()))
+        self.qlen.append(record.qlen)
+        self.qstart.append(record.qstart)
+        self.qend.append(record.qend)
+        self.strand.append(STRAND_CODES[record.strand])
+        self.tname.append(self._tnames.code(record.tname.encode()))
+        self.tlen.append(record.tlen)
+        self.tstart.append(record.tstart)
+        self.tend.append(record.tend)
+        self.mlen.append(record.mlen)
+        self.blen.append(record.blen)
+        self.mapq.append(record.mapq)
+        tags = record.tags
+        if not tags:
+            self._append_tags(b"")
+        elif isinstance(tags, LazyTags):
+            self._append_tags("\t".join(tags.raw_values()).encode())
+        else:
+            self._append_tags("\t".join(map(str, tags.values())).encode())
+
+    def extend(self, records: Iterable[PafRecord]):
+        """Add many records to the store."""
+        for record in records:
+            self.append(record)
+
+    def extend_lines(self, lines: Iterable[AnyStr]):
+        """Add records from PAF lines (`str` or `bytes`) without creating a
+        `pafpy.pafrecord.PafRecord` for each line.
+
+        ## Errors
+        - If a line has less than the expected number of fields (12), a
+        `pafpy.pafrecord.MalformattedRecord` exception is raised.
+        - If a strand is not one of `+`, `-`, or `*`, a `ValueError` is raised.
+        - If a field is not a valid integer (or is out of range), a `ValueError` (or
+        `OverflowError`) is raised.
+
+        Records from the lines before an invalid line are kept; nothing from the invalid
+        line is.
+        """
+        for line in lines:
+            if isinstance(line, str):
+                line = line.encode()
+            fields = line.rstrip().split(b"\t", MIN_FIELDS)
+            if len(fields) < MIN_FIELDS:
+                raise MalformattedRecord(
+                    f"Expected {MIN_FIELDS} fields, but got {len(fields)}\n{line!r}"
+                )
+            try:
+                strand = _STRAND_LOOKUP[fields[4]]
+            except KeyError:
+                raise ValueError(f"{fields[4]!r} is not a valid Strand") from None
+            size = len(self)
+            try:
+                self._append_fields(fields, strand)
+            except BaseException:
+                self._truncate(size)
+                raise
+
+    def _append_fields(self, fields: List[bytes], strand: int):
+        self.qname.append(self._qnames.code(fields[0]))
+        self.qlen.append(int(fields[1]))
+        self.qstart.append(int(fields[2]))
+        self.qend.append(int(fields[3]))
+        self.strand.append(strand)
+        self.tname.append(self._tnames.code(fields[5]))
+        self.tlen.append(int(fields[6]))
+        self.tstart.append(int(fields[7]))
+        self.tend.append(int(fields[8]))
+        self.mlen.append(int(fields[9]))
+        self.blen.append(int(fields[10]))
+        self.mapq.append(int(fields[11]))
+        self._append_tags(fields[MIN_FIELDS] if len(fields) > MIN_FIELDS else b"")
+
+    @staticmethod
+    def from_lines(lines: Iterable[AnyStr]) -> "RecordStore":
+        """Construct a `RecordStore` from PAF lines (`str` or `bytes`). See
+        `RecordStore.extend_lines`."""
+        store = RecordStore()
+        store.extend_lines(lines)
+        return store
@@ -0,0 +1,292 @@
+"""This module contains low-level stream objects used by `pafpy.paffile.PafFile` to read
+the lines of a PAF file. They are unlikely to be of use to anyone else.
+
+```py
+from pafpy.streams import MmapLineReader, ReadAheadLineReader
+```
+"""
+import io
+import mmap
+import os
+import queue
+import threading
+from typing import IO, List, Optional, Union
+
+PathLike = Union[str, os.PathLike]
+
+NEWLINE = b"\n"
+DEFAULT_READ_AHEAD_CHUNK_SIZE = 1024 * 1024
+"""The default number of (decompressed) bytes read by the background thread of a
+`ReadAheadLineReader` at a time."""
+DEFAULT_READ_AHEAD_CHUNKS = 2
+"""The default number of chunks a `ReadAheadLineReader` holds ready for the consumer."""
+
+_EOF = object()
+# how long close() waits for the producer before leaving it to close the stream
+_CLOSE_WAIT = 0.5
+
+
+class MmapLineReader:
+    """Read the lines of an uncompressed file through a memory map.
+
+    Lines are found by scanning for newlines directly in the mapped buffer and are
+    returned as `bytes` (including the trailing newline). As the file is accessed via
+    the operating system's page cache, repeated passes over the same file avoid copying
+    it through Python's I/O buffers. Each line is still a copy - a slice of the map -
+    so it remains valid after the reader is closed.
+
+    The reader supports the subset of the binary file interface used by
+    `pafpy.paffile.PafFile`: iteration, `readline`, `tell`, `seek`, and `close`.
+
+    ## Example
+    ```py
+    from pathlib import Path
+    import tempfile
+    from pafpy.streams import MmapLineReader
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.txt")
+        path.write_bytes(b"line1\nline2")
+
+        reader = MmapLineReader(path)
+        assert list(reader) == [b"line1\n", b"line2"]
+        reader.seek(6)
+        assert reader.readline() == b"line2"
+        reader.close()
+
+    assert reader.closed
+    ```
+    """
+
+    def __init__(self, path: PathLike):
+        self._file = open(path, mode="rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._pos = 0
+        # an empty file cannot be memory-mapped
+        self._mmap: Optional[mmap.mmap] = None
+        if self._size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mmap, "madvise"):  # python 3.8+
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+    def __iter__(self) -> "MmapLineReader":
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def __enter__(self) -> "MmapLineReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Is the reader closed?"""
+        return self._file.closed
+
+    def _check_closed(self):
+        if self._file.closed:
+            raise ValueError("I/O operation on closed file")
+
+    def readline(self) -> bytes:
+        """Read the next line (including the newline) as a copy of that part of the
+        map. Returns `b""` at the end of the file.
+
+        ## Errors
+        If the reader is closed, a `ValueError` is raised.
+        """
+        pos = self._pos
+        # closing unmaps the file, so this also catches reads after close
+        if pos >= self._size or self._mmap is None:
+            self._check_closed()
+            return b""
+        end = self._mmap.find(NEWLINE, pos)
+        end = self._size if end == -1 else end + 1
+        self._pos = end
+        return self._mmap[pos:end]
+
+    def tell(self) -> int:
+        """The current byte offset into the file."""
+        self._check_closed()
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Move to the byte `offset` (relative to `whence`) and return the new offset."""
+        self._check_closed()
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._pos = offset
+        return self._pos
+
+    def close(self):
+        """Unmap and close the underlying file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+class ReadAheadLineReader:
+    """Read the lines of a binary stream with the reading - and any decompression - done
+    ahead of time on a background thread.
+
+    A producer thread reads `chunk_size` bytes at a time from `stream`, splits them into
+    lines (`bytes`, including the trailing newline), and puts them on a queue holding at
+    most `max_chunks` chunks. While the consumer works through one chunk, the next is
+    being read. As `zlib` releases the GIL, wrapping a `gzip` stream in a
+    `ReadAheadLineReader` lets decompression run in parallel with parsing.
+
+    Lines are only split on `\\n`, as when iterating over a binary file.
+
+    Only forward iteration and `readline` are supported. Closing the reader stops the
+    background thread and closes `stream`. If the thread is blocked reading from
+    `stream` (e.g. a pipe that has no data yet), `close` does not wait for the read; the
+    thread closes `stream` once the read returns.
+
+    ## Example
+    ```py
+    import gzip
+    import io
+    from pafpy.streams import ReadAheadLineReader
+
+    data = gzip.compress(b"line1\nline2\nline3")
+    reader = ReadAheadLineReader(gzip.open(io.BytesIO(data)), chunk_size=8)
+
+    assert reader.readline() == b"line1\n"
+    assert list(reader) == [b"line2\n", b"line3"]
+    reader.close()
+
+    assert reader.closed
+    ```
+    """
+
+    def __init__(
+        self,
+        stream: IO,
+        chunk_size: int = DEFAULT_READ_AHEAD_CHUNK_SIZE,
+        max_chunks: int = DEFAULT_READ_AHEAD_CHUNKS,
+    ):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._lines: List[bytes] = []
+        self._index = 0
+        self._exhausted = False
+        self._closed = False
+        self._stop = threading.Event()
+        # guards handing over the closing of the stream to a producer still reading it
+        self._lock = threading.Lock()
+        self._producing = True
+        self._close_stream_on_exit = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def __iter__(self) -> "ReadAheadLineReader":
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def __enter__(self) -> "ReadAheadLineReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Is the reader closed?"""
+        return self._closed
+
+    def _put(self, item) -> bool:
+        """Put `item` on the queue, waiting for space unless the reader is closed.
+        Returns whether the item was queued."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        remainder = b""
+        try:
+            while True:
+                chunk = self._stream.read(self._chunk_size)
+                if not chunk:
+                    break
+                data = remainder + chunk
+                cut = data.rfind(NEWLINE) + 1
+                remainder = data[cut:]
+                # unlike bytes.splitlines, this only splits on newlines
+                if cut and not self._put(io.BytesIO(data[:cut]).readlines()):
+                    return
+            if remainder and not self._put([remainder]):
+                return
+            self._put(_EOF)
+        except Exception as err:  # re-raised in the consumer thread
+            self._put(err)
+        finally:
+            with self._lock:
+                self._producing = False
+                if self._close_stream_on_exit:
+                    self._stream.close()
+
+    def readline(self) -> bytes:
+        """Read the next line (including the newline). Returns `b""` at the end of the
+        stream.
+
+        ## Errors
+        - If the reader is closed, a `ValueError` is raised.
+        - Any exception raised while reading the stream in the background is re-raised.
+        """
+        while self._index >= len(self._lines):
+            if self._closed:
+                raise ValueError("I/O operation on closed ReadAheadLineReader.")
+            if self._exhausted:
+                return b""
+            item = self._queue.get()
+            if item is _EOF:
+                self._exhausted = True
+                return b""
+            if isinstance(item, Exception):
+                self._exhausted = True
+                raise item
+            self._lines = item
+            self._index = 0
+        line = self._lines[self._index]
+        self._index += 1
+        return line
+
+    def tell(self) -> int:
+        raise io.UnsupportedOperation("ReadAheadLineReader does not support tell")
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        raise io.UnsupportedOperation("ReadAheadLineReader does not support seek")
+
+    def close(self):
+        """Stop the background thread and close the underlying stream."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._thread.join(_CLOSE_WAIT)
+        self._lines = []
+        with self._lock:
+            if self._producing:  # blocked in a read - let the producer close it
+                self._close_stream_on_exit = True
+                return
+        self._stream.close()
@@ -0,0 +1,344 @@
+"""This module contains a generator of synthetic (but realistic-looking) PAF records, for
+benchmarking and load-testing without real data.
+
+The records mimic the output of `minimap2 -c` for long reads: read lengths are
+log-normally distributed, alignment identity follows a beta distribution, each read
+has a primary alignment and possibly some secondary and supplementary alignments (all
+written next to each other), and alignments carry minimap2's tags - including a long
+CIGAR string (`cg`) and, optionally, a difference string (`cs`). The distributions are
+set with a `pafpy.synthetic.WorkloadConfig`. Generation is deterministic for a given
+`seed`.
+
+```py
+from pafpy.synthetic import WorkloadConfig, generate_records, write_synthetic_paf
+```
+"""
+import math
+import random
+from bisect import bisect_left
+from itertools import accumulate, chain
+from operator import add
+from typing import IO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pafpy.pafrecord import PafRecord
+from pafpy.strand import Strand
+from pafpy.tag import Tag
+from pafpy.writer import PafWriter, PathLike
+
+BASES = "ACGT"
+
+
+class WorkloadConfig(NamedTuple):
+    """The distributions synthetic records are drawn from. The defaults resemble
+    Oxford Nanopore reads aligned to a set of bacterial genomes."""
+
+    num_targets: int = 25
+    """The number of target sequences."""
+    target_length: int = 5_000_000
+    """The length of each target sequence."""
+    mean_read_length: int = 8_000
+    """The mean (log-normally distributed) read length."""
+    read_length_sigma: float = 0.7
+    """The shape (sigma) of the log-normal read length distribution."""
+    min_read_length: int = 200
+    """The shortest read length."""
+    mean_identity: float = 0.93
+    """The mean (beta-distributed) identity of alignments."""
+    indel_fraction: float = 0.5
+    """The fraction of errors that are insertions or deletions rather than
+    mismatches."""
+    secondary_rate: float = 0.3
+    """The mean number of secondary alignments per mapped read."""
+    supplementary_rate: float = 0.05
+    """The probability that a mapped read also has a supplementary alignment."""
+    unmapped_rate: float = 0.02
+    """The probability that a read is unmapped."""
+    cigar: bool = True
+    """Whether alignments have a CIGAR string (`cg` tag)."""
+    cs: bool = False
+    """Whether alignments have a difference string (`cs` tag). This is much slower to
+    generate as it contains the inserted, deleted, and mismatched bases."""
+
+
+class _Alignment(NamedTuple):
+    query_length: int
+    target_length: int
+    matches: int
+    mismatches: int
+    gap_opens: int
+    gap_bases: int
+    cigar: str
+    cs: str
+
+
+# the (lower) quantiles of the exponential distribution with a mean of 1, which are
+# scaled to draw the length of the runs of matches between indels
+_EXP_QUANTILES = [-math.log(1 - (i + 0.5) / 4096) for i in range(4096)]
+# indels and their (roughly geometric) relative frequencies
+_GAPS = [f"{length}{op}" for length in range(1, 9) for op in "ID"]
+_GAP_LENGTHS = [length for length in range(1, 9) for _ in "ID"]
+_GAP_QUERY_LENGTHS = [length * (op == "I") for length in range(1, 9) for op in "ID"]
+_GAP_CUM_WEIGHTS = list(accumulate(0.5**length for length in range(1, 9) for _ in "ID"))
+
+
+def _random_bases(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(BASES) for _ in range(length)).lower()
+
+
+def _events(
+    rng: random.Random, query_length: int, mean_run: float
+) -> Tuple[List[int], List[int]]:
+    """Draw runs of matches/mismatches, each followed by an indel (given by its index
+    in `_GAPS`), until `query_length` query bases are consumed. There is one more run
+    than there are indels, as an alignment ends with a run."""
+    runs: List[int] = []
+    gaps: List[int] = []
+    consumed = 0
+    gap_indices = range(len(_GAPS))
+    while True:
+        # draw the expected number of events, then more if that was not enough
+        k = int((query_length - consumed) / mean_run) + 1
+        new_runs = [int(e * mean_run) + 1 for e in rng.choices(_EXP_QUANTILES, k=k)]
+        new_gaps = rng.choices(gap_indices, cum_weights=_GAP_CUM_WEIGHTS, k=k)
+        steps = map(add, new_runs, map(_GAP_QUERY_LENGTHS.__getitem__, new_gaps))
+        # ends[i] is the number of query bases consumed before event i of this batch
+        ends = list(accumulate(chain((consumed,), steps)))
+        last = bisect_left(ends, query_length, lo=1) - 1
+        if last < k:
+            # event `last` reaches the end of the query - its run takes up the rest
+            runs.extend(new_runs[:last])
+            runs.append(query_length - ends[last])
+            gaps.extend(new_gaps[:last])
+            return runs, gaps
+        runs.extend(new_runs)
+        gaps.extend(new_gaps)
+        consumed = ends[-1]
+
+
+def _align(
+    rng: random.Random, query_length: int, identity: float, config: WorkloadConfig
+) -> _Alignment:
+    """Simulate the operations of an alignment that consumes `query_length` bases."""
+    error_rate = 1.0 - identity
+    indel_rate = error_rate * config.indel_fraction
+    mismatch_rate = (error_rate - indel_rate) / (1 - indel_rate)
+    mean_run = 1 / indel_rate if indel_rate > 0 else query_length
+    runs, gaps = _events(rng, query_length, mean_run)
+
+    aligned = sum(runs)
+    expected = aligned * mismatch_rate
+    mismatches = round(rng.gauss(expected, math.sqrt(expected * (1 - mismatch_rate))))
+    mismatches = min(max(mismatches, 0), aligned)
+    gap_lengths = [_GAP_LENGTHS[gap] for gap in gaps]
+    inserted = sum(_GAP_QUERY_LENGTHS[gap] for gap in gaps)
+    gap_ops = [_GAPS[gap] for gap in gaps]
+    gap_ops.append("")
+    cigar = "".join(map("{}M{}".format, runs, gap_ops))
+    cs = _cs_string(rng, runs, gap_ops, mismatches) if config.cs else ""
+    return _Alignment(
+        query_length=aligned + inserted,
+        target_length=aligned + sum(gap_lengths) - inserted,
+        matches=aligned - mismatches,
+        mismatches=mismatches,
+        gap_opens=len(gaps),
+        gap_bases=sum(gap_lengths),
+        cigar=cigar,
+        cs=cs,
+    )
+
+
+def _cs_string(
+    rng: random.Random, runs: List[int], gap_ops: List[str], mismatches: int
+) -> str:
+    """The (short) `cs` string for the given runs and indels, with `mismatches`
+    mismatches placed at random within the runs."""
+    positions = iter(sorted(rng.sample(range(sum(runs)), mismatches)))
+    position = next(positions, None)
+    cs: List[str] = []
+    offset = 0
+    for run, gap in zip(runs, gap_ops):
+        previous = offset
+        end = offset + run
+        while position is not None and position < end:
+            if position > previous:
+                cs.append(f":{position - previous}")
+            ref, alt = rng.sample(BASES, 2)
+            cs.append(f"*{ref.lower()}{alt.lower()}")
+            previous = position + 1
+            position = next(positions, None)
+        if end > previous:
+            cs.append(f":{end - previous}")
+        offset = end
+        if gap:
+            sign = "+" if gap[-1] == "I" else "-"
+            cs.append(f"{sign}{_random_bases(rng, int(gap[:-1]))}")
+    return "".join(cs)
+
+
+def _read_length(rng: random.Random, config: WorkloadConfig) -> int:
+    sigma = config.read_length_sigma
+    mu = math.log(config.mean_read_length) - sigma**2 / 2
+    return max(config.min_read_length, int(rng.lognormvariate(mu, sigma)))
+
+
+def _record(
+    rng: random.Random,
+    qname: str,
+    qlen: int,
+    aligned: Tuple[int, int],
+    alignment_type: str,
+    config: WorkloadConfig,
+) -> PafRecord:
+    identity = rng.betavariate(
+        50 * config.mean_identity, 50 * (1 - config.mean_identity)
+    )
+    qstart, qend = aligned
+    alignment = _align(rng, qend - qstart, identity, config)
+    tlen = config.target_length
+    target_span = min(alignment.target_length, tlen)
+    tstart = rng.randrange(tlen - target_span + 1)
+    if alignment_type == "S":
+        mapq = 0
+    else:
+        mapq = 60 if rng.random() < 0.85 else rng.randrange(60)
+    score = alignment.matches - 2 * alignment.mismatches - 2 * alignment.gap_bases
+    errors = alignment.mismatches + alignment.gap_opens
+    divergence = errors / (alignment.matches + errors)
+    tags = [
+        Tag("NM", "i", alignment.mismatches + alignment.gap_bases),
+        Tag("ms", "i", max(score, 0)),
+        Tag("AS", "i", max(score, 0)),
+        Tag("nn", "i", 0),
+        Tag("tp", "A", "S" if alignment_type == "S" else "P"),
+        Tag("cm", "i", max(1, alignment.matches // 40)),
+        Tag("s1", "i", max(1, alignment.matches // 12)),
+    ]
+    if alignment_type == "P":
+        tags.append(Tag("s2", "i", rng.randrange(max(1, alignment.matches // 24))))
+    tags.append(Tag("de", "f", round(divergence, 4)))
+    tags.append(Tag("rl", "i", rng.randrange(500)))
+    if config.cigar:
+        tags.append(Tag("cg", "Z", alignment.cigar))
+    if config.cs:
+        tags.append(Tag("cs", "Z", alignment.cs))
+    return PafRecord(
+        qname=qname,
+        qlen=qlen,
+        qstart=qstart,
+        qend=qstart + alignment.query_length,
+        strand=Strand.Forward if rng.random() < 0.5 else Strand.Reverse,
+        tname=f"contig{rng.randrange(config.num_targets)}",
+        tlen=tlen,
+        tstart=tstart,
+        tend=tstart + target_span,
+        mlen=alignment.matches,
+        blen=alignment.matches + alignment.mismatches + alignment.gap_bases,
+        mapq=mapq,
+        tags={tag.tag: tag for tag in tags},
+    )
+
+
+def _read_records(
+    rng: random.Random, number: int, config: WorkloadConfig
+) -> List[PafRecord]:
+    qname = f"read{number}"
+    qlen = _read_length(rng, config)
+    if rng.random() < config.unmapped_rate:
+        return [PafRecord(qname=qname, qlen=qlen)]
+
+    clip = min(int(rng.expovariate(1 / 50)), qlen // 4)
+    primary_end = qlen - min(int(rng.expovariate(1 / 50)), qlen // 4)
+    records = [_record(rng, qname, qlen, (clip, primary_end), "P", config)]
+    if rng.random() < config.supplementary_rate and clip > 0:
+        records.append(_record(rng, qname, qlen, (0, clip), "P", config))
+    # the number of secondaries is geometrically distributed with the given mean
+    p_more = config.secondary_rate / (1 + config.secondary_rate)
+    while rng.random() < p_more:
+        start = rng.randrange(qlen // 2)
+        end = rng.randrange(start + 1, qlen + 1)
+        records.append(_record(rng, qname, qlen, (start, end), "S", config))
+    return records
+
+
+def generate_records(
+    num_records: Optional[int] = None,
+    config: WorkloadConfig = WorkloadConfig(),
+    seed: int = 0,
+) -> Iterator[PafRecord]:
+    """Generate `num_records` synthetic `pafpy.pafrecord.PafRecord`s (endlessly, if
+    `num_records` is `None`), with the alignments of each read next to each other.
+    The records are the same for the same `config` and `seed`.
+
+    ## Example
+    ```py
+    from pafpy.synthetic import WorkloadConfig, generate_records
+
+    config = WorkloadConfig(mean_read_length=1000, cs=True)
+    records = list(generate_records(100, config=config, seed=1))
+
+    assert len(records) == 100
+    assert records == list(generate_records(100, config=config, seed=1))
+    primary = next(r for r in records if r.is_primary())
+    assert primary.get_tag("cg") is not None
+    assert primary.get_tag("cs") is not None
+    ```
+
+    ## Errors
+    If `num_records` is negative, a `ValueError` is raised.
+    """
+    if num_records is not None and num_records < 0:
+        raise ValueError(f"num_records must not be negative, got {num_records}")
+    return _generate(num_records, config, random.Random(seed))
+
+
+def _generate(
+    num_records: Optional[int], config: WorkloadConfig, rng: random.Random
+) -> Iterator[PafRecord]:
+    remaining = num_records
+    number = 0
+    while remaining is None or remaining > 0:
+        records = _read_records(rng, number, config)
+        if remaining is not None:
+            records = records[:remaining]
+            remaining -= len(records)
+        yield from records
+        number += 1
+
+
+def write_synthetic_paf(
+    fileobj: Union[PathLike, IO],
+    num_records: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    config: WorkloadConfig = WorkloadConfig(),
+    seed: int = 0,
+    compression: Optional[str] = None,
+    threads: int = 0,
+) -> int:
+    """Write synthetic records (see `generate_records`) to `fileobj` until
+    `num_records` records or (at least) `max_bytes` uncompressed bytes have been
+    written, whichever comes first. `fileobj`, `compression` (e.g. `"gzip"`), and
+    `threads` are as for `pafpy.writer.PafWriter`. Returns the number of records
+    written.
+
+    ## Errors
+    - If neither `num_records` nor `max_bytes` is given, a `ValueError` is raised.
+    - See `pafpy.writer.PafWriter`.
+    """
+    if num_records is None and max_bytes is None:
+        raise ValueError("At least one of num_records and max_bytes must be given")
+    records = generate_records(num_records, config=config, seed=seed)
+    written = size = 0
+    with PafWriter(fileobj, compression=compression, threads=threads) as writer:
+        lines = []
+        for record in records:
+            line = f"{record}\n"
+            lines.append(line)
+            written += 1
+            size += len(line)
+            if len(lines) >= 10_000:
+                writer.write_lines(lines)
+                lines.clear()
+            if max_bytes is not None and size >= max_bytes:
+                break
+        writer.write_lines(lines)
+    return written
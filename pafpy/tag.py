@@ -11,7 +11,18 @@ from pafpy import Tag
 [specs]: https://samtools.github.io/hts-specs/SAMtags.pdf
 """
 import re
-from typing import NamedTuple, Pattern, Type, Union
+from collections.abc import Mapping
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Type,
+    Union,
+)
 
 DELIM = ":"
 
@@ -64,10 +75,61 @@ TagTypes = {
 
 
 TAG_REGEX = re.compile(
-    rf"^(?P<tag>\w{{2}}){DELIM}(?P<type>[{''.join(TagTypes)}]){DELIM}(?P<value>.*)$"
+    rf"^(?P<tag>[A-Za-z][A-Za-z0-9]){DELIM}(?P<type>[{''.join(TagTypes)}]){DELIM}(?P<value>.*)$"
 )
 
 
+_TAG_FIRST_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+_TAG_CHARS = _TAG_FIRST_CHARS | frozenset("0123456789")
+_FLOAT_REGEX = TagTypes["f"].value_regex
+
+
+def _to_char(value: str) -> str:
+    if len(value) != 1 or not "!" <= value <= "~":
+        raise ValueError(f"{value!r} is not a single printable character")
+    return value
+
+
+def _to_int(value: str) -> int:
+    # int() also accepts whitespace and underscores, which the spec does not
+    digits = value[1:] if value[:1] in ("+", "-") else value
+    if not digits.isdecimal():
+        raise ValueError(f"{value!r} is not an integer")
+    return int(value)
+
+
+def _to_float(value: str) -> float:
+    # float() also accepts whitespace, underscores, nan, and infinity
+    if _FLOAT_REGEX.fullmatch(value) is None:
+        raise ValueError(f"{value!r} is not a float")
+    return float(value)
+
+
+# the conversion doubles as validation of the value - it raises a ValueError if the
+# value is not of the expected type
+_CONVERTERS: Dict[str, Callable[[str], Union[str, float, int]]] = {
+    "A": _to_char,
+    "i": _to_int,
+    "f": _to_float,
+    "Z": str,
+}
+
+
+def _find_raw_tag(tags: bytes, key: bytes, tab_key: bytes) -> Optional[bytes]:
+    """Find the tag with prefix `key` (e.g. `b"NM:"`; `tab_key` is `b"\t" + key`) in the
+    raw, tab-separated `tags` and return its `TYPE:VALUE` (e.g. `b"i:5"`). If the tag
+    appears more than once, the last is used, as for a `pafpy.pafrecord.PafRecord`."""
+    start = tags.rfind(tab_key)
+    if start != -1:
+        start += len(tab_key)
+    elif tags.startswith(key):
+        start = len(key)
+    else:
+        return None
+    end = tags.find(b"\t", start)
+    return tags[start:] if end == -1 else tags[start:end]
+
+
 class Tag(NamedTuple):
     """Class representing a single SAM-like optional field (tag).
 
@@ -103,12 +165,19 @@ class Tag(NamedTuple):
     """The value of the tag."""
 
     def __str__(self) -> str:
-        return DELIM.join([self.tag, self.type, str(self.value)])
+        return f"{self.tag}{DELIM}{self.type}{DELIM}{self.value}"
 
     @staticmethod
-    def from_str(string: str) -> "Tag":
+    def from_str(string: str, strict: bool = False) -> "Tag":
         """Construct a `Tag` from a string.
 
+        By default, the `TAG:TYPE:` prefix is checked by position, and the value is
+        checked and converted to the type's python type with cheap, type-specific
+        checks that accept the same `A`, `i`, and `f` values as the
+        [specs][specs]. If `strict` is `True`, the whole string is instead validated
+        against the regular expressions in the specs (see `TagType.value_regex`),
+        which is considerably slower and also checks that `Z` values are printable.
+
         ## Example
         ```py
         from pafpy import Tag
@@ -127,6 +196,33 @@ class Tag(NamedTuple):
 
         [specs]: https://samtools.github.io/hts-specs/SAMtags.pdf
         """
+        if strict:
+            return Tag._from_str_strict(string)
+
+        if (
+            len(string) < 5
+            or string[2] != DELIM
+            or string[4] != DELIM
+            or string[0] not in _TAG_FIRST_CHARS
+            or string[1] not in _TAG_CHARS
+        ):
+            raise InvalidTagFormat(f"{string} is not in valid TAG:TYPE:VALUE format.")
+
+        tag_type = string[3]
+        convert = _CONVERTERS.get(tag_type)
+        if convert is None:
+            raise InvalidTagFormat(f"{string} is not in valid TAG:TYPE:VALUE format.")
+        try:
+            value = convert(string[5:])
+        except ValueError:
+            raise InvalidTagFormat(
+                f"VALUE of tag {string} is not the expected TYPE"
+            ) from None
+
+        return Tag(string[:2], tag_type, value)
+
+    @staticmethod
+    def _from_str_strict(string: str) -> "Tag":
         match = TAG_REGEX.search(string)
         if not match:
             raise InvalidTagFormat(f"{string} is not in valid TAG:TYPE:VALUE format.")
@@ -137,10 +233,80 @@ class Tag(NamedTuple):
         tag_type = TagTypes[match.group("type")]
 
         value_string = match.group("value")
-        value_match = tag_type.value_regex.match(value_string)
+        value_match = tag_type.value_regex.fullmatch(value_string)
         if not value_match:
             raise InvalidTagFormat(f"VALUE of tag {string} is not the expected TYPE")
 
         value = tag_type.python_type(value_string)
 
         return Tag(tag, tag_type.char, value)
+
+
+class LazyTags(Mapping):
+    """A read-only mapping of tag names to `Tag`s where each tag is only parsed when
+    it is accessed.
+
+    The raw tag strings (`str` or `bytes`) are stored as-is and are only decoded and
+    parsed with `Tag.from_str` on the first lookup of a given tag - the result is then
+    cached. This makes it cheap to carry tags you never read, such as long `cg` or `cs`
+    strings. `LazyTags` can be used anywhere a `dict` of tags is expected (e.g.
+    `pafpy.pafrecord.PafRecord.tags`) and compares equal to a `dict` holding the same
+    (parsed) tags.
+
+    > *Note: If there are duplicate tags, only the last one will be retained. As
+    parsing is deferred, an invalid tag will only raise an `InvalidTagFormat`
+    exception when it is accessed.*
+
+    ## Example
+    ```py
+    from pafpy import Tag
+    from pafpy.tag import LazyTags
+
+    tags = LazyTags(["NM:i:8", "cg:Z:5M1I3M"])
+
+    assert "cg" in tags
+    assert tags.raw("cg") == "cg:Z:5M1I3M"
+    assert tags["NM"] == Tag.from_str("NM:i:8")
+    assert tags == {"NM": Tag("NM", "i", 8), "cg": Tag("cg", "Z", "5M1I3M")}
+    ```
+    """
+
+    __slots__ = ("_raw", "_parsed")
+
+    def __init__(self, strings: Iterable[Union[str, bytes]] = ()):
+        self._raw: Dict[str, Union[str, bytes]] = {
+            (string[:2] if isinstance(string, str) else string[:2].decode()): string
+            for string in strings
+        }
+        self._parsed: Dict[str, Tag] = dict()
+
+    def __getitem__(self, key: str) -> Tag:
+        try:
+            return self._parsed[key]
+        except KeyError:
+            raw = self._raw[key]
+            tag = Tag.from_str(raw if isinstance(raw, str) else raw.decode())
+            self._parsed[key] = tag
+            return tag
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._raw
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self.raw_values())!r})"
+
+    def raw(self, key: str) -> Optional[str]:
+        """The unparsed string for the tag `key`, or `None` if it is not present."""
+        raw = self._raw.get(key)
+        return raw if raw is None or isinstance(raw, str) else raw.decode()
+
+    def raw_values(self) -> Iterator[str]:
+        """An iterator over the unparsed tag strings, in the order they were given."""
+        for raw in self._raw.values():
+            yield raw if isinstance(raw, str) else raw.decode()
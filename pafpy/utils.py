@@ -1,11 +1,13 @@
 """This module contains utility functions unlikely to be of use to anyone else.
 
 ```py
-from pafpy.utils import first_n_bytes, is_compressed
+from pafpy.utils import first_n_bytes, is_bgzf, is_compressed
 ```
 """
 from typing import IO
 
+from pafpy.bgzf import BGZF_MAGIC
+
 GZIP_MAGIC = b"\x1f\x8b"
 
 
@@ -49,3 +51,25 @@ def is_compressed(fileobj: IO) -> bool:
     """
     n_bytes = first_n_bytes(fileobj, n=2)
     return n_bytes == GZIP_MAGIC
+
+
+def is_bgzf(fileobj: IO) -> bool:
+    """Reads the first block header of an open file to check whether it is
+    [BGZF][bgzf]-compressed (i.e. whether it can be read with
+    `pafpy.bgzf.BgzfReader`).
+
+    ```py
+    from tempfile import TemporaryFile
+    from pafpy.bgzf import EOF_BLOCK
+    from pafpy.utils import is_bgzf
+
+    with TemporaryFile() as fileobj:
+        fileobj.write(EOF_BLOCK)
+        fileobj.seek(0)
+        assert is_bgzf(fileobj)
+    ```
+
+    [bgzf]: https://samtools.github.io/hts-specs/SAMv1.pdf
+    """
+    header = first_n_bytes(fileobj, n=18)
+    return header[:4] == BGZF_MAGIC and header[12:14] == b"BC"
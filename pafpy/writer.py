@@ -0,0 +1,265 @@
+"""This module contains objects for writing PAF files.
+
+The main class of interest here is `pafpy.writer.PafWriter`. Rather than writing each
+record with `print(str(record), file=...)`, a `PafWriter` formats records into a large
+buffer and writes it in one go, optionally compressing the output (`gzip` or BGZF) on
+background threads.
+
+```py
+from pafpy.writer import PafWriter
+```
+"""
+import gzip
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, AnyStr, Deque, Iterable, List, Optional, Union
+
+from pafpy.batch import _CODE_TO_STRAND, PafBatch
+from pafpy.bgzf import BgzfWriter, _open_binary
+from pafpy.pafrecord import PafRecord
+
+PathLike = Union[str, os.PathLike]
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+"""The default (approximate) number of bytes buffered before they are written."""
+COMPRESSION_TYPES = ("gzip", "bgzf")
+"""The supported values for the `compression` of a `PafWriter`."""
+
+
+def _format_batch(batch: PafBatch) -> str:
+    strands = [_CODE_TO_STRAND[code].value for code in batch.strand]
+    rows = zip(
+        batch.query_names(),
+        batch.qlen,
+        batch.qstart,
+        batch.qend,
+        strands,
+        batch.target_names(),
+        batch.tlen,
+        batch.tstart,
+        batch.tend,
+        batch.mlen,
+        batch.blen,
+        batch.mapq,
+    )
+    return "".join("\t".join(map(str, row)) + "\n" for row in rows)
+
+
+class _GzipMemberWriter:
+    """Compresses each chunk of data into its own gzip member on a pool of threads and
+    writes the members in order. A concatenation of gzip members is a valid gzip
+    file."""
+
+    def __init__(self, fileobj: IO, compresslevel: int, threads: int):
+        self._file = fileobj
+        self._compresslevel = compresslevel
+        self._executor = ThreadPoolExecutor(threads)
+        self._max_pending = 2 * threads
+        self._pending: Deque[Future] = deque()
+
+    def _drain(self, keep: int = 0):
+        while len(self._pending) > keep:
+            self._file.write(self._pending.popleft().result())
+
+    def write(self, data: bytes) -> int:
+        self._pending.append(
+            self._executor.submit(gzip.compress, data, self._compresslevel)
+        )
+        self._drain(keep=self._max_pending)
+        return len(data)
+
+    def flush(self):
+        self._drain()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+class PafWriter:
+    """Write PAF records to a file.
+
+    `fileobj` is a path (`str` or `pathlib.Path`), `"-"` for stdout, or a file object
+    opened in binary mode. Records are formatted into a buffer that is written once it
+    holds roughly `buffer_size` bytes, so there is one write per buffer rather than per
+    record.
+
+    `compression` can be `None` (default), `"gzip"`, or `"bgzf"` (blocked `gzip`, as
+    produced by `bgzip`, which can be indexed - see `pafpy.index`). If `threads` is
+    greater than 0, compression is done on a pool of `threads` background threads. For
+    `gzip` output, each buffer is then compressed into a separate `gzip` member, which
+    any `gzip` reader handles transparently.
+
+    `PafWriter` is a context manager; leaving the context (or calling
+    `PafWriter.close`) writes any buffered records.
+
+    ## Example
+    ```py
+    from pafpy import PafFile, PafRecord
+    from pafpy.writer import PafWriter
+    from pathlib import Path
+    import tempfile
+
+    records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(100)]
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(f"{tmpdirname}/test.paf.gz")
+        with PafWriter(path, compression="bgzf", threads=2) as writer:
+            writer.write(records[0])
+            writer.write_batch(records[1:])
+
+        with PafFile(path) as paf:
+            assert list(paf) == records
+    ```
+
+    ## Errors
+    If `compression` is not one of `COMPRESSION_TYPES`, a `ValueError` is raised.
+    """
+
+    def __init__(
+        self,
+        fileobj: Union[PathLike, IO],
+        compression: Optional[str] = None,
+        compresslevel: int = 6,
+        threads: int = 0,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        if compression is not None and compression not in COMPRESSION_TYPES:
+            raise ValueError(
+                f"Unknown compression {compression!r}. "
+                f"Expected one of {COMPRESSION_TYPES} or None"
+            )
+        self.buffer_size = buffer_size
+        """The (approximate) number of bytes buffered before they are written."""
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._closed = False
+
+        if str(fileobj) == "-":
+            self._stream, self._owns_file = sys.stdout.buffer, False
+        else:
+            self._stream, self._owns_file = _open_binary(fileobj, mode="wb")
+
+        # the sink compresses (if needed) and writes to the stream
+        if compression == "bgzf":
+            self._sink = BgzfWriter(
+                self._stream, compresslevel=compresslevel, threads=threads
+            )
+        elif compression == "gzip" and threads > 0:
+            self._sink = _GzipMemberWriter(self._stream, compresslevel, threads)
+        elif compression == "gzip":
+            self._sink = gzip.GzipFile(
+                fileobj=self._stream, mode="wb", compresslevel=compresslevel
+            )
+        else:
+            self._sink = self._stream
+
+    def __enter__(self) -> "PafWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Is the writer closed?"""
+        return self._closed
+
+    def _ensure_open(self):
+        if self._closed:
+            raise IOError("PafWriter is closed.")
+
+    def _write_buffer(self):
+        if self._buffer:
+            self._sink.write(b"".join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+
+    def _add(self, data: bytes):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.buffer_size:
+            self._write_buffer()
+
+    def write(self, record: PafRecord):
+        """Write a single record.
+
+        ## Errors
+        If the writer is closed, an `IOError` is raised.
+        """
+        self._ensure_open()
+        self._add((str(record) + "\n").encode())
+
+    def write_batch(self, records: Union[Iterable[PafRecord], PafBatch]):
+        """Write many records at once. `records` is either an iterable of
+        `pafpy.pafrecord.PafRecord`s or a `pafpy.batch.PafBatch`, which is formatted
+        straight from its columns (a `PafBatch` has no tags).
+
+        ## Errors
+        If the writer is closed, an `IOError` is raised.
+        """
+        self._ensure_open()
+        if isinstance(records, PafBatch):
+            self._add(_format_batch(records).encode())
+            return
+        lines = []
+        size = 0
+        for record in records:
+            line = str(record)
+            lines.append(line)
+            size += len(line)
+            if size >= self.buffer_size:
+                self._add(("\n".join(lines) + "\n").encode())
+                lines.clear()
+                size = 0
+        if lines:
+            self._add(("\n".join(lines) + "\n").encode())
+
+    def write_lines(self, lines: Iterable[AnyStr]):
+        """Write raw PAF lines (`str` or `bytes`), each ending in a newline, as they
+        are. `bytes` lines are written without being decoded.
+
+        ## Errors
+        If the writer is closed, an `IOError` is raised.
+        """
+        self._ensure_open()
+        chunk = []
+        size = 0
+        for line in lines:
+            if isinstance(line, str):
+                line = line.encode()
+            chunk.append(line)
+            size += len(line)
+            if size >= self.buffer_size:
+                self._add(b"".join(chunk))
+                chunk.clear()
+                size = 0
+        if chunk:
+            self._add(b"".join(chunk))
+
+    def flush(self):
+        """Write any buffered records.
+
+        ## Errors
+        If the writer is closed, an `IOError` is raised.
+        """
+        self._ensure_open()
+        self._write_buffer()
+        self._sink.flush()
+
+    def close(self):
+        """Write any buffered records and close the writer (and the underlying file if
+        the writer opened it)."""
+        if self._closed:
+            return
+        self._write_buffer()
+        if self._sink is not self._stream:
+            self._sink.close()
+        if self._owns_file:
+            self._stream.close()
+        else:
+            self._stream.flush()
+        self._closed = True
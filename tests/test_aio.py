@@ -0,0 +1,216 @@
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.aio import AsyncPafFile
+from pafpy.filters import col
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import PafRecord
+
+TEST_DIR = Path(__file__).parent
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def read_demo(**kwargs):
+    with PafFile(TEST_DIR / "demo.paf", **kwargs) as paf:
+        return list(paf)
+
+
+async def collect(paf):
+    return [record async for record in paf]
+
+
+async def collect_batches(paf):
+    return [batch async for batch in paf.iter_batches()]
+
+
+class TestConstructor:
+    def test_batch_size_less_than_one_raises_error(self):
+        with pytest.raises(ValueError):
+            AsyncPafFile(TEST_DIR / "demo.paf", batch_size=0)
+
+    def test_chunk_size_less_than_one_raises_error(self):
+        with pytest.raises(ValueError):
+            AsyncPafFile(TEST_DIR / "demo.paf", chunk_size=0)
+
+
+class TestFile:
+    @pytest.mark.parametrize("name", ["demo.paf", "demo.paf.gz"])
+    def test_records_match_paffile(self, name):
+        async def main():
+            async with AsyncPafFile(TEST_DIR / name, batch_size=7) as paf:
+                return await collect(paf)
+
+        assert run(main()) == read_demo()
+
+    def test_batches(self):
+        async def main():
+            async with AsyncPafFile(path, batch_size=3) as paf:
+                return await collect_batches(paf)
+
+        records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(10)]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            batches = run(main())
+
+        assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+        assert [r for batch in batches for r in batch] == records
+
+    def test_paffile_arguments_passed_on(self):
+        async def main():
+            async with AsyncPafFile(
+                TEST_DIR / "demo.paf", where=col("mapq") == 0, fields=["qname"]
+            ) as paf:
+                return await collect(paf)
+
+        assert run(main()) == [("11737-1",)]
+
+    def test_stop_early_and_close(self):
+        async def main():
+            paf = await AsyncPafFile(TEST_DIR / "demo.paf", batch_size=1).open()
+            async for _ in paf:
+                break
+            await paf.close()
+            return paf
+
+        paf = run(main())
+
+        assert paf.closed
+
+    def test_stop_early_waits_for_pending_read_on_exit(self):
+        records = [PafRecord(qname=f"read{i}") for i in range(20)]
+
+        async def main(path):
+            async with AsyncPafFile(path, batch_size=2) as paf:
+                async for _ in paf:
+                    pending = paf._pending
+                    break
+            return paf, pending
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            paf, pending = run(main(path))
+
+        assert paf.closed
+        assert pending.done()
+        assert paf._pending is None
+
+    def test_closed_file_raises_error(self):
+        with pytest.raises(IOError):
+            run(collect(AsyncPafFile(TEST_DIR / "demo.paf")))
+
+
+class TestStreamReader:
+    def test_records_match_paffile(self):
+        records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(50)]
+        data = "\n".join(map(str, records)).encode()
+
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await collect_batches(AsyncPafFile(reader, chunk_size=100))
+
+        batches = run(main())
+
+        assert len(batches) > 1
+        assert [r for batch in batches for r in batch] == records
+
+    def test_long_lines_and_no_final_newline(self):
+        line = b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0\tcg:Z:" + b"1M" * 100_000
+
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(line + b"\n" + line)
+            reader.feed_eof()
+            return await collect(AsyncPafFile(reader, chunk_size=1000))
+
+        records = run(main())
+
+        assert len(records) == 2
+        assert records[1].get_tag("cg").value == "1M" * 100_000
+
+    def test_subprocess_stdout(self):
+        path = TEST_DIR / "demo.paf"
+        script = "import sys; sys.stdout.buffer.write(open(sys.argv[1], 'rb').read())"
+
+        async def main():
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-c",
+                script,
+                str(path),
+                stdout=asyncio.subprocess.PIPE,
+            )
+            records = await collect(AsyncPafFile(process.stdout, lazy_tags=True))
+            await process.wait()
+            return records
+
+        assert run(main()) == read_demo(lazy_tags=True)
+
+    def test_stats_and_names_shared_across_chunks(self):
+        records = [PafRecord(qname=f"read{i % 3}", tname="chr1") for i in range(50)]
+        data = "\n".join(map(str, records)).encode()
+        reports = []
+
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            paf = AsyncPafFile(
+                reader, chunk_size=100, stats=True, intern_names=["qname", "tname"]
+            )
+            paf.stats.callback = lambda stats: reports.append(stats.lines)
+            return paf, await collect_batches(paf)
+
+        paf, batches = run(main())
+        actual = [r for batch in batches for r in batch]
+
+        assert len(batches) > 1
+        assert actual == records
+        assert paf.stats.lines == paf.stats.records == 50
+        assert paf.stats.bytes_read == len(data)
+        assert reports == [50]
+        assert paf._parser.qnames.names == ["read0", "read1", "read2"]
+        assert actual[0].tname is actual[-1].tname
+        assert actual[0].qname is actual[3].qname
+
+    def test_stop_early_and_close(self):
+        records = [PafRecord(qname=f"read{i}") for i in range(50)]
+        data = "\n".join(map(str, records)).encode()
+
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            async with AsyncPafFile(reader, chunk_size=100) as paf:
+                async for record in paf:
+                    break
+            return paf, record
+
+        paf, record = run(main())
+
+        assert paf.closed
+        assert paf._pending is None
+        assert record == records[0]
+
+    def test_closed_raises_error(self):
+        async def main():
+            paf = AsyncPafFile(asyncio.StreamReader())
+            await paf.close()
+            return await collect(paf)
+
+        with pytest.raises(IOError):
+            run(main())
@@ -0,0 +1,100 @@
+from array import array
+
+import pytest
+
+from pafpy.batch import INT_TYPECODE, PafBatch, _batch_from_lines
+from pafpy.names import NameDictionary
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+from pafpy.strand import Strand
+
+LINES = [
+    "read1\t10\t5\t9\t+\tchr1\t100\t50\t54\t3\t4\t60\tNM:i:1",
+    "read2\t10\t0\t10\t-\tchr2\t100\t10\t20\t10\t10\t0",
+    "read3\t0\t0\t0\t*\t*\t0\t0\t0\t0\t0\t255",
+]
+
+
+class TestFromLines:
+    def test_empty(self):
+        batch = PafBatch.from_lines([])
+
+        assert len(batch) == 0
+        assert batch.qname_categories == []
+
+    def test_columns(self):
+        batch = PafBatch.from_lines(LINES)
+
+        assert len(batch) == 3
+        assert batch.qlen == array(INT_TYPECODE, [10, 10, 0])
+        assert list(batch.qstart) == [5, 0, 0]
+        assert list(batch.qend) == [9, 10, 0]
+        assert list(batch.strand) == [1, -1, 0]
+        assert list(batch.tlen) == [100, 100, 0]
+        assert list(batch.tstart) == [50, 10, 0]
+        assert list(batch.tend) == [54, 20, 0]
+        assert list(batch.mlen) == [3, 10, 0]
+        assert list(batch.blen) == [4, 10, 0]
+        assert list(batch.mapq) == [60, 0, 255]
+
+    def test_bytes_lines(self):
+        expected = PafBatch.from_lines(LINES)
+        actual = PafBatch.from_lines([line.encode() + b"\n" for line in LINES])
+
+        assert actual.tname_categories == expected.tname_categories
+        assert actual.mapq == expected.mapq
+        assert actual.qlen == expected.qlen
+
+    def test_names_are_category_codes(self):
+        lines = LINES + ["read1\t10\t5\t9\t+\tchr1\t100\t50\t54\t3\t4\t60"]
+        batch = PafBatch.from_lines(lines)
+
+        assert list(batch.qname) == [0, 1, 2, 0]
+        assert batch.qname_categories == ["read1", "read2", "read3"]
+        assert list(batch.tname) == [0, 1, 2, 0]
+        assert batch.target_names() == ["chr1", "chr2", "*", "chr1"]
+
+    def test_shared_categories_give_consistent_codes(self):
+        qnames = NameDictionary()
+        tnames = NameDictionary()
+        batch1 = _batch_from_lines(LINES[:1], qnames, tnames)
+        batch2 = _batch_from_lines(LINES, qnames, tnames)
+
+        assert list(batch1.tname) == [0]
+        assert list(batch2.tname) == [0, 1, 2]
+        assert batch1.tname_categories is batch2.tname_categories
+
+    def test_too_few_fields_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            PafBatch.from_lines(["read1\t10\t5"])
+
+    def test_invalid_strand_raises_error(self):
+        with pytest.raises(ValueError):
+            PafBatch.from_lines([LINES[0].replace("+", "x")])
+
+
+class TestRecords:
+    def test_records_match_from_str_without_tags(self):
+        batch = PafBatch.from_lines(LINES)
+
+        actual = list(batch)
+        expected = [PafRecord.from_str(line)._replace(tags=None) for line in LINES]
+
+        assert actual == expected
+        assert actual[2].strand is Strand.Unmapped
+
+
+class TestDerivedMetrics:
+    def test_metrics_match_pafrecord(self):
+        batch = PafBatch.from_lines(LINES)
+        records = [PafRecord.from_str(line) for line in LINES]
+
+        assert list(batch.query_aligned_length()) == [
+            r.query_aligned_length for r in records
+        ]
+        assert list(batch.target_aligned_length()) == [
+            r.target_aligned_length for r in records
+        ]
+        assert list(batch.query_coverage()) == [r.query_coverage for r in records]
+        assert list(batch.target_coverage()) == [r.target_coverage for r in records]
+        assert list(batch.relative_length()) == [r.relative_length for r in records]
+        assert list(batch.blast_identity()) == [r.blast_identity() for r in records]
@@ -0,0 +1,260 @@
+import gzip
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.bgzf import (
+    BLOCK_DATA_SIZE,
+    EOF_BLOCK,
+    MAX_BLOCK_SIZE,
+    BgzfReader,
+    BgzfWriter,
+    MalformattedBlock,
+    compress_block,
+    iter_block_offsets,
+    iter_blocks,
+    make_virtual_offset,
+    read_block,
+    split_virtual_offset,
+)
+
+
+@pytest.fixture
+def tmp_path_gz():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(f"{tmpdirname}/test.gz")
+
+
+class TestVirtualOffset:
+    def test_round_trip(self):
+        actual = split_virtual_offset(make_virtual_offset(123456789, 65535))
+        expected = (123456789, 65535)
+
+        assert actual == expected
+
+    def test_within_block_too_large_raises_error(self):
+        with pytest.raises(ValueError):
+            make_virtual_offset(0, MAX_BLOCK_SIZE)
+
+
+class TestCompressBlock:
+    def test_decompresses_with_gzip(self):
+        data = b"some data\n" * 10
+
+        assert gzip.decompress(compress_block(data)) == data
+
+    def test_read_block(self):
+        data = b"some data\n" * 10
+        fileobj = io.BytesIO(compress_block(data))
+
+        block = read_block(fileobj)
+
+        assert block.offset == 0
+        assert block.size == len(fileobj.getvalue())
+        assert block.isize == len(data)
+        assert block.decompress() == data
+        assert read_block(fileobj) is None
+
+    def test_incompressible_data_split_into_blocks(self):
+        data = bytes(range(256)) * (BLOCK_DATA_SIZE // 256)
+        fileobj = io.BytesIO(compress_block(data, compresslevel=0))
+
+        blocks = list(iter_blocks(fileobj))
+
+        assert all(block.size <= MAX_BLOCK_SIZE for block in blocks)
+        assert b"".join(block.decompress() for block in blocks) == data
+
+    def test_eof_block(self):
+        block = read_block(io.BytesIO(EOF_BLOCK))
+
+        assert block.decompress() == b""
+        assert compress_block(b"") == EOF_BLOCK
+
+
+class TestReadBlock:
+    def test_not_bgzf_raises_error(self):
+        with pytest.raises(MalformattedBlock):
+            read_block(io.BytesIO(gzip.compress(b"data")))
+
+    def test_truncated_raises_error(self):
+        with pytest.raises(MalformattedBlock):
+            read_block(io.BytesIO(compress_block(b"data")[:-3]))
+
+    def test_corrupt_crc_raises_error(self):
+        data = bytearray(compress_block(b"data"))
+        data[-5] ^= 0xFF
+        block = read_block(io.BytesIO(bytes(data)))
+
+        with pytest.raises(MalformattedBlock):
+            block.decompress()
+
+    def test_iter_block_offsets(self):
+        first = compress_block(b"first")
+        fileobj = io.BytesIO(first + compress_block(b"second") + EOF_BLOCK)
+
+        actual = list(iter_block_offsets(fileobj))
+        expected = [
+            (0, len(first)),
+            (len(first), len(fileobj.getvalue()) - len(first) - len(EOF_BLOCK)),
+            (len(fileobj.getvalue()) - len(EOF_BLOCK), len(EOF_BLOCK)),
+        ]
+
+        assert actual == expected
+
+
+class TestBgzfWriter:
+    def test_empty_file_is_eof_block(self, tmp_path_gz):
+        with BgzfWriter(tmp_path_gz):
+            pass
+
+        assert tmp_path_gz.read_bytes() == EOF_BLOCK
+
+    def test_large_data_written_in_blocks(self, tmp_path_gz):
+        data = b"".join(b"line%d\n" % i for i in range(50_000))
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(data)
+
+        with tmp_path_gz.open("rb") as fileobj:
+            blocks = list(iter_blocks(fileobj))
+
+        assert gzip.decompress(tmp_path_gz.read_bytes()) == data
+        assert len(blocks) > 2
+        assert all(block.isize <= BLOCK_DATA_SIZE for block in blocks)
+
+    def test_threads_output_matches_single_thread(self, tmp_path_gz):
+        data = b"".join(b"line%d\n" % i for i in range(50_000))
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(data)
+        expected = tmp_path_gz.read_bytes()
+
+        with BgzfWriter(tmp_path_gz, threads=3) as writer:
+            for line in data.splitlines(keepends=True):
+                writer.write(line)
+
+        assert tmp_path_gz.read_bytes() == expected
+
+    def test_tell_is_virtual_offset(self, tmp_path_gz):
+        with BgzfWriter(tmp_path_gz) as writer:
+            assert writer.tell() == 0
+            writer.write(b"abc")
+            assert writer.tell() == make_virtual_offset(0, 3)
+            writer.flush()
+            block_size = len(compress_block(b"abc"))
+            assert writer.tell() == make_virtual_offset(block_size, 0)
+
+    def test_write_to_fileobj_does_not_close_it(self):
+        fileobj = io.BytesIO()
+        with BgzfWriter(fileobj) as writer:
+            writer.write(b"abc")
+
+        assert not fileobj.closed
+        assert gzip.decompress(fileobj.getvalue()) == b"abc"
+
+    def test_write_after_close_raises_error(self, tmp_path_gz):
+        writer = BgzfWriter(tmp_path_gz)
+        writer.close()
+
+        assert writer.closed
+        with pytest.raises(ValueError):
+            writer.write(b"abc")
+
+
+class TestBgzfReader:
+    @pytest.mark.parametrize("use_fileobj", [False, True])
+    def test_read_after_close_raises_error(self, tmp_path_gz, use_fileobj):
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"line1\nline2\n")
+        fileobj = open(tmp_path_gz, mode="rb") if use_fileobj else None
+        reader = BgzfReader(fileobj or tmp_path_gz)
+        assert reader.readline() == b"line1\n"
+
+        reader.close()
+        reader.close()
+
+        assert reader.closed
+        with pytest.raises(ValueError):
+            reader.readline()
+        with pytest.raises(ValueError):
+            next(reader)
+        with pytest.raises(ValueError):
+            reader.tell()
+        with pytest.raises(ValueError):
+            reader.seek(0)
+        if fileobj is not None:
+            assert not fileobj.closed
+            fileobj.close()
+
+    def test_empty_file(self, tmp_path_gz):
+        tmp_path_gz.write_bytes(b"")
+
+        with BgzfReader(tmp_path_gz) as reader:
+            assert list(reader) == []
+
+    def test_lines_spanning_blocks(self, tmp_path_gz):
+        lines = [b"line%d\n" % i for i in range(50_000)]
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"".join(lines))
+
+        with BgzfReader(tmp_path_gz) as reader:
+            actual = list(reader)
+
+        assert actual == lines
+
+    def test_last_line_without_newline(self, tmp_path_gz):
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"a\nb")
+
+        with BgzfReader(tmp_path_gz) as reader:
+            assert list(reader) == [b"a\n", b"b"]
+
+    @pytest.mark.parametrize("threads", [0, 2])
+    def test_seek_to_every_line(self, tmp_path_gz, threads):
+        lines = [b"line%d\n" % i for i in range(30_000)]
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"".join(lines))
+
+        with BgzfReader(tmp_path_gz, threads=threads) as reader:
+            offsets = []
+            while True:
+                offsets.append(reader.tell())
+                if not reader.readline():
+                    break
+            for i in [0, 1, 9_999, 20_000, 29_999]:
+                reader.seek(offsets[i])
+                assert reader.readline() == lines[i]
+
+    def test_tell_at_block_end_is_start_of_next_block(self, tmp_path_gz):
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"a\n")
+            writer.flush()
+            second_block = split_virtual_offset(writer.tell())[0]
+            writer.write(b"b\n")
+
+        with BgzfReader(tmp_path_gz) as reader:
+            reader.readline()
+            assert reader.tell() == make_virtual_offset(second_block, 0)
+
+    def test_seek_outside_block_raises_error(self, tmp_path_gz):
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"a\n")
+
+        with BgzfReader(tmp_path_gz) as reader:
+            with pytest.raises(ValueError):
+                reader.seek(make_virtual_offset(0, 10))
+
+    def test_not_bgzf_raises_error(self, tmp_path_gz):
+        tmp_path_gz.write_bytes(gzip.compress(b"a\n"))
+
+        with pytest.raises(MalformattedBlock):
+            BgzfReader(tmp_path_gz)
+
+    def test_concatenated_files(self, tmp_path_gz):
+        with BgzfWriter(tmp_path_gz) as writer:
+            writer.write(b"a\n")
+        data = tmp_path_gz.read_bytes()
+        tmp_path_gz.write_bytes(data + data)
+
+        with BgzfReader(tmp_path_gz) as reader:
+            assert list(reader) == [b"a\n", b"a\n"]
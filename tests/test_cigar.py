@@ -0,0 +1,134 @@
+import pytest
+
+from pafpy.cigar import (
+    CONSUMES_QUERY,
+    CONSUMES_TARGET,
+    OPS,
+    Cigar,
+    CigarBatch,
+    InvalidCigar,
+)
+from pafpy.pafrecord import PafRecord
+
+
+class TestCigarFromStr:
+    def test_empty_string(self):
+        cigar = Cigar.from_str("")
+
+        assert len(cigar) == 0
+        assert cigar.query_length == 0
+        assert cigar.target_length == 0
+
+    def test_all_operations(self):
+        string = "".join(f"{i + 1}{op}" for i, op in enumerate(OPS))
+
+        cigar = Cigar.from_str(string)
+
+        assert list(cigar.ops) == list(range(len(OPS)))
+        assert list(cigar.lengths) == list(range(1, len(OPS) + 1))
+        assert str(cigar) == string
+
+    def test_offsets(self):
+        cigar = Cigar.from_str("2S10M3N4I1D5=1X")
+
+        assert list(cigar.query_offsets) == [0, 2, 12, 12, 16, 16, 21, 22]
+        assert list(cigar.target_offsets) == [0, 0, 10, 13, 13, 14, 19, 20]
+        assert cigar.query_length == 22
+        assert cigar.target_length == 20
+
+    def test_consumption_tables_match_ops(self):
+        assert len(CONSUMES_QUERY) == len(CONSUMES_TARGET) == len(OPS)
+
+    def test_long_cigar(self):
+        string = "10M1I" * 100_000
+
+        cigar = Cigar.from_str(string)
+
+        assert len(cigar) == 200_000
+        assert cigar.query_length == 1_100_000
+        assert cigar.target_length == 1_000_000
+
+    def test_iter(self):
+        assert list(Cigar.from_str("3M1D")) == [(3, "M"), (1, "D")]
+
+    def test_equality(self):
+        assert Cigar.from_str("3M1D") == Cigar.from_str("3M1D")
+        assert Cigar.from_str("3M1D") != Cigar.from_str("3M1I")
+
+    @pytest.mark.parametrize(
+        "string",
+        [
+            "M",
+            "3M4",
+            "3Q",
+            "3M2Q1M",
+            "-3M",
+            "3M M",
+            "+5M",
+            " 5M",
+            "5M 2I",
+            "1_0M",
+            "\u0665M",
+            "5m",
+            "99999999999M",
+        ],
+    )
+    def test_invalid_raises_error(self, string):
+        with pytest.raises(InvalidCigar):
+            Cigar.from_str(string)
+
+
+class TestCigarFromRecord:
+    def test_record_with_cigar(self):
+        record = PafRecord.from_str(
+            "r\t10\t0\t10\t+\tt\t20\t0\t10\t10\t10\t60\tNM:i:0\tcg:Z:10M"
+        )
+
+        assert Cigar.from_record(record) == Cigar.from_str("10M")
+
+    def test_record_with_lazy_tags(self):
+        record = PafRecord.from_str(
+            "r\t10\t0\t10\t+\tt\t20\t0\t10\t10\t10\t60\tcg:Z:10M", lazy_tags=True
+        )
+
+        assert Cigar.from_record(record) == Cigar.from_str("10M")
+
+    def test_record_without_cigar(self):
+        assert Cigar.from_record(PafRecord()) is None
+
+
+class TestCigarBatch:
+    def test_empty(self):
+        batch = CigarBatch.from_strings([])
+
+        assert len(batch) == 0
+        assert list(batch.bounds) == [0]
+
+    def test_matches_single_decoding(self):
+        strings = ["5M2I3M", "", None, "1S4=1X2D3M"]
+
+        batch = CigarBatch.from_strings(strings)
+
+        assert len(batch) == 4
+        assert list(batch.bounds) == [0, 3, 3, 3, 8]
+        assert batch[0] == Cigar.from_str("5M2I3M")
+        assert batch[1] == Cigar.from_str("")
+        assert batch[2] is None
+        assert batch[3] == Cigar.from_str("1S4=1X2D3M")
+        assert list(batch.query_offsets) == [0, 5, 7, 0, 1, 5, 6, 6]
+        assert list(batch.target_offsets) == [0, 5, 5, 0, 0, 4, 5, 7]
+
+    def test_from_records(self):
+        records = [
+            PafRecord.from_str("r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0\tcg:Z:1M"),
+            PafRecord(),
+        ]
+
+        batch = CigarBatch.from_records(records)
+
+        assert list(batch) == [Cigar.from_str("1M"), None]
+
+    @pytest.mark.parametrize("string", ["1Q", "+5M", " 5M", "1_0M"])
+    def test_invalid_raises_error(self, string):
+        with pytest.raises(InvalidCigar):
+            CigarBatch.from_strings(["1M", string])
@@ -0,0 +1,252 @@
+import gzip
+import io
+import os
+import tempfile
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+from pafpy.batch import PafBatch
+from pafpy.columnar import (
+    COLUMNS,
+    ColumnarPafFile,
+    InvalidColumnarFormat,
+    cache_path,
+    open_cached,
+    write_columnar,
+)
+from pafpy.filters import col
+from pafpy.grouping import best_by
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import PafRecord
+from pafpy.synthetic import generate_records
+from pafpy.tag import LazyTags
+
+RECORDS = list(islice(generate_records(seed=1), 250))
+
+
+def write_paf(path, records=RECORDS):
+    path.write_text("".join(f"{record}\n" for record in records))
+    return path
+
+
+class TestWriteColumnar:
+    @pytest.mark.parametrize("block_size", [1, 7, 1_000])
+    def test_round_trip(self, block_size):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            output = Path(f"{tmpdirname}/test.pafc")
+            num_records = write_columnar(path, output, block_size=block_size)
+            with ColumnarPafFile(output) as paf:
+                actual = list(paf)
+
+        assert num_records == len(RECORDS)
+        assert actual == RECORDS
+
+    def test_names_are_shared(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            write_columnar(path, f"{path}.pafc", block_size=10)
+            with ColumnarPafFile(f"{path}.pafc") as paf:
+                actual = list(paf)
+
+        by_name = {}
+        for record in actual:
+            assert by_name.setdefault(record.tname, record.tname) is record.tname
+        assert paf.tnames.names == list(dict.fromkeys(r.tname for r in RECORDS))
+
+    def test_gzip_input_and_where(self):
+        data = "".join(f"{record}\n" for record in RECORDS).encode()
+        where = col("mapq") >= 30
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            path.write_bytes(gzip.compress(data))
+            write_columnar(path, f"{path}.pafc", where=where)
+            with ColumnarPafFile(f"{path}.pafc") as paf:
+                actual = list(paf)
+
+        assert actual == [r for r in RECORDS if r.mapq >= 30]
+
+    def test_text_file_object(self):
+        records = [PafRecord(qname="read1"), PafRecord(qname="read2")]
+        fileobj = io.StringIO("\n".join(map(str, records)))
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            write_columnar(fileobj, f"{tmpdirname}/test.pafc")
+            with ColumnarPafFile(f"{tmpdirname}/test.pafc") as paf:
+                actual = list(paf)
+
+        assert actual == records
+        assert paf.source is None
+
+    def test_empty_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"), [])
+            assert write_columnar(path, f"{path}.pafc") == 0
+            with ColumnarPafFile(f"{path}.pafc") as paf:
+                assert list(paf) == []
+                assert list(paf.iter_batches()) == []
+
+        assert len(paf) == 0
+        assert len(paf.qnames) == 0
+
+    def test_block_size_less_than_one_raises_error(self):
+        with pytest.raises(ValueError):
+            write_columnar(io.BytesIO(b""), "never-written.pafc", block_size=0)
+
+
+class TestColumnarPafFile:
+    @pytest.fixture
+    def columnar_path(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            write_columnar(path, f"{path}.pafc", block_size=64)
+            yield Path(f"{path}.pafc")
+
+    def test_lazy_tags(self, columnar_path):
+        with ColumnarPafFile(columnar_path, lazy_tags=True) as paf:
+            actual = list(paf)
+
+        assert all(isinstance(r.tags, LazyTags) for r in actual if r.tags)
+        assert [r.get_tag("NM") for r in actual] == [r.get_tag("NM") for r in RECORDS]
+
+    def test_columns(self, columnar_path):
+        with ColumnarPafFile(columnar_path) as paf:
+            for name in COLUMNS:
+                values = list(paf.column(name))
+                if name in ("qname", "tname", "strand"):
+                    assert len(values) == len(RECORDS)
+                else:
+                    assert values == [getattr(r, name) for r in RECORDS]
+            qnames = [paf.qnames[code] for code in paf.column("qname")]
+
+        assert qnames == [r.qname for r in RECORDS]
+
+    def test_unknown_column_raises_error(self, columnar_path):
+        with ColumnarPafFile(columnar_path) as paf:
+            with pytest.raises(ValueError):
+                paf.column("tags")
+
+    def test_iter_batches(self, columnar_path):
+        lines = [str(record) for record in RECORDS]
+        expected = PafBatch.from_lines(lines)
+        with ColumnarPafFile(columnar_path) as paf:
+            batches = list(paf.iter_batches())
+
+        assert [len(batch) for batch in batches] == [64, 64, 64, 58]
+        assert [n for b in batches for n in b.query_names()] == expected.query_names()
+        assert [q for b in batches for q in b.mapq] == list(expected.mapq)
+        assert [s for b in batches for s in b.strand] == list(expected.strand)
+        assert [r for b in batches for r in b.records()] == list(expected.records())
+
+    def test_group_by_query(self, columnar_path):
+        with ColumnarPafFile(columnar_path) as paf:
+            actual = list(paf.group_by_query(best_by("mapq")))
+        with PafFile(columnar_path.with_suffix("")) as paf:
+            expected = list(paf.group_by_query(best_by("mapq")))
+
+        assert actual == expected
+
+    def test_closed_file_raises_error(self, columnar_path):
+        paf = ColumnarPafFile(columnar_path)
+
+        assert paf.closed
+        with pytest.raises(IOError):
+            next(paf)
+        with pytest.raises(IOError):
+            paf.column("mapq")
+
+    def test_open_again_restarts(self, columnar_path):
+        with ColumnarPafFile(columnar_path) as paf:
+            first = next(paf)
+            next(paf)
+            paf.open()
+            assert next(paf) == first
+
+        assert paf.closed
+
+    def test_not_columnar_raises_error(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            with pytest.raises(InvalidColumnarFormat):
+                ColumnarPafFile(path)
+
+    def test_truncated_raises_error(self, columnar_path):
+        data = columnar_path.read_bytes()
+        columnar_path.write_bytes(data[:-20])
+
+        with pytest.raises(InvalidColumnarFormat):
+            ColumnarPafFile(columnar_path)
+
+    def test_missing_file_raises_error(self):
+        with pytest.raises(OSError):
+            ColumnarPafFile("does/not/exist.pafc")
+
+    def test_other_byte_order(self, columnar_path):
+        paf = ColumnarPafFile(columnar_path)
+        with paf:
+            expected = list(paf.column("tlen"))
+        for offset, size in paf._blocks:
+            # swap the stored bytes, as if the file was written on another machine
+            with columnar_path.open("r+b") as fileobj:
+                columns = ColumnarPafFile(columnar_path).open()
+                values = columns._read_columns(offset, size, ["tlen"])["tlen"]
+                columns.close()
+                values.byteswap()
+                fileobj.seek(offset + 8 * (size + 1) + 3 * 8 * size)
+                values.tofile(fileobj)
+        paf._swap = True
+        with paf:
+            assert list(paf.column("tlen")) == expected
+
+
+class TestOpenCached:
+    def test_creates_and_reuses_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            with open_cached(path) as paf:
+                assert list(paf) == RECORDS
+            cached = cache_path(path)
+            mtime = cached.stat().st_mtime_ns
+            with open_cached(path) as paf:
+                assert list(paf) == RECORDS
+
+            assert cached.stat().st_mtime_ns == mtime
+            assert sorted(os.listdir(tmpdirname)) == ["test.paf", "test.paf.pafc"]
+
+    def test_rebuilds_when_source_changes(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            with open_cached(path) as paf:
+                assert len(paf) == len(RECORDS)
+            write_paf(path, RECORDS[:10])
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            with open_cached(path) as paf:
+                actual = list(paf)
+
+        assert actual == RECORDS[:10]
+
+    def test_rebuilds_invalid_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            cache_path(path).write_bytes(b"not a cache")
+            with open_cached(path) as paf:
+                actual = list(paf)
+
+        assert actual == RECORDS
+
+    def test_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = write_paf(Path(f"{tmpdirname}/test.paf"))
+            cache_dir = Path(f"{tmpdirname}/cache/paf")
+            with open_cached(path, cache_dir=cache_dir, lazy_tags=True) as paf:
+                actual = list(paf)
+            cached = cache_path(path, cache_dir)
+
+            assert cached.parent == cache_dir
+            assert cached.name.startswith("test.paf.")
+            assert os.listdir(cache_dir) == [cached.name]
+            assert not cache_path(path).exists()
+
+        assert actual == RECORDS
@@ -0,0 +1,181 @@
+import io
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.coverage import Coverage
+from pafpy.pafrecord import PafRecord
+from pafpy.strand import Strand
+from pafpy.tag import Tag
+
+TEST_DIR = Path(__file__).parent
+
+
+def naive_depth(intervals, length):
+    depth = [0] * length
+    for start, end in intervals:
+        for i in range(start, end):
+            depth[i] += 1
+    return depth
+
+
+class TestConstructor:
+    def test_bin_size_less_than_one_raises_error(self):
+        with pytest.raises(ValueError):
+            Coverage(bin_size=0)
+
+
+class TestAdd:
+    def test_interval_outside_target_raises_error(self):
+        coverage = Coverage()
+
+        with pytest.raises(ValueError):
+            coverage.add("chr1", 10, 5, 11)
+
+    def test_inconsistent_length_raises_error(self):
+        coverage = Coverage()
+        coverage.add("chr1", 10, 0, 5)
+
+        with pytest.raises(ValueError):
+            coverage.add("chr1", 20, 0, 5)
+
+    def test_empty_interval_registers_target(self):
+        coverage = Coverage()
+        coverage.add("chr1", 3, 1, 1)
+
+        assert "chr1" in coverage
+        assert list(coverage.depth("chr1")) == [0, 0, 0]
+
+    def test_unknown_target_raises_error(self):
+        with pytest.raises(KeyError):
+            Coverage().depth("chr1")
+
+
+class TestDepth:
+    def test_per_base_matches_naive(self):
+        rng = random.Random(42)
+        length = 500
+        intervals = []
+        for _ in range(200):
+            start = rng.randrange(length)
+            intervals.append((start, rng.randint(start, length)))
+        coverage = Coverage()
+        for start, end in intervals:
+            coverage.add("chr1", length, start, end)
+
+        assert list(coverage.depth("chr1")) == naive_depth(intervals, length)
+
+    @pytest.mark.parametrize("bin_size", [2, 7, 10, 64, 1000])
+    def test_binned_matches_naive_mean(self, bin_size):
+        rng = random.Random(bin_size)
+        length = 503
+        intervals = []
+        for _ in range(200):
+            start = rng.randrange(length)
+            intervals.append((start, rng.randint(start, length)))
+        coverage = Coverage(bin_size=bin_size)
+        for start, end in intervals:
+            coverage.add("chr1", length, start, end)
+
+        per_base = naive_depth(intervals, length)
+        bins = [per_base[i:][:bin_size] for i in range(0, length, bin_size)]
+        expected = [sum(bases) / len(bases) for bases in bins]
+
+        assert list(coverage.depth("chr1")) == pytest.approx(expected)
+
+    def test_to_arrays_has_every_target(self):
+        coverage = Coverage()
+        coverage.add("chr2", 2, 0, 1)
+        coverage.add("chr1", 3, 1, 3)
+
+        actual = coverage.to_arrays()
+
+        assert list(actual) == ["chr2", "chr1"]
+        assert list(actual["chr1"]) == [0, 1, 1]
+
+
+class TestUpdate:
+    def test_unmapped_records_skipped(self):
+        records = [
+            PafRecord(strand=Strand.Forward, tname="chr1", tlen=4, tstart=1, tend=3),
+            PafRecord(tname="*", tlen=0),
+        ]
+        coverage = Coverage()
+        coverage.update(records)
+
+        assert list(coverage) == ["chr1"]
+        assert list(coverage.depth("chr1")) == [0, 1, 1, 0]
+
+
+class TestIntervals:
+    def test_runs_are_merged(self):
+        coverage = Coverage()
+        coverage.add("chr1", 6, 1, 4)
+        coverage.add("chr2", 2, 0, 2)
+
+        actual = list(coverage.intervals())
+        expected = [
+            ("chr1", 0, 1, 0),
+            ("chr1", 1, 4, 1),
+            ("chr1", 4, 6, 0),
+            ("chr2", 0, 2, 1),
+        ]
+
+        assert actual == expected
+        assert list(coverage.intervals("chr2")) == expected[-1:]
+
+    def test_write_bedgraph(self):
+        coverage = Coverage(bin_size=4)
+        coverage.add("chr1", 10, 2, 6)
+        stream = io.StringIO()
+
+        coverage.write_bedgraph(stream)
+
+        assert stream.getvalue() == "chr1\t0\t8\t0.5\nchr1\t8\t10\t0\n"
+
+    def test_write_bedgraph_to_path(self):
+        coverage = Coverage()
+        coverage.add("chr1", 3, 0, 3)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.bedgraph")
+            coverage.write_bedgraph(path)
+
+            assert path.read_text() == "chr1\t0\t3\t1\n"
+
+
+class TestFromPaf:
+    def test_demo_file_matches_update(self):
+        from pafpy import PafFile
+
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            expected = Coverage(bin_size=100)
+            expected.update(paf)
+
+        actual = Coverage.from_paf(TEST_DIR / "demo.paf.gz", bin_size=100)
+
+        assert list(actual) == list(expected)
+        assert actual.to_arrays() == expected.to_arrays()
+
+    def test_filters(self):
+        tp = {"P": Tag("tp", "A", "P"), "S": Tag("tp", "A", "S")}
+        records = [
+            PafRecord(
+                strand=Strand.Forward,
+                tname="chr1",
+                tlen=10,
+                tstart=i,
+                tend=i + 1,
+                mapq=i * 10,
+                tags={"tp": tp["PS"[i % 2]]},
+            )
+            for i in range(10)
+        ]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+
+            actual = Coverage.from_paf(path, min_mapq=30, primary_only=True)
+
+        assert list(actual.depth("chr1")) == [0, 0, 0, 0, 1, 0, 1, 0, 1, 0]
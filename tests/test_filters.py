@@ -0,0 +1,123 @@
+import pytest
+
+from pafpy.filters import DERIVED_FIELDS, col, tag
+from pafpy.pafrecord import PafRecord
+from pafpy.strand import Strand
+
+LINE = b"read1\t10\t2\t8\t-\tchr1\t100\t50\t56\t5\t6\t60\tNM:i:1\ttp:A:P\tde:f:0.2"
+FIELDS = LINE.split(b"\t", 12)
+NO_TAGS = LINE.split(b"\tNM")[0].split(b"\t", 12)
+
+
+class TestCol:
+    @pytest.mark.parametrize(
+        "condition,expected",
+        [
+            (col("mapq") == 60, True),
+            (col("mapq") != 60, False),
+            (col("mapq") < 60, False),
+            (col("mapq") <= 60, True),
+            (col("qlen") > 9, True),
+            (col("tstart") >= 51, False),
+            (col("qname") == "read1", True),
+            (col("tname") != "chr1", False),
+            (col("tname") < "chr2", True),
+            (col("strand") == "-", True),
+            (col("strand") == Strand.Reverse, True),
+            (col("tname").isin({"chr1", "chr2"}), True),
+            (col("mapq").isin([0, 255]), False),
+        ],
+    )
+    def test_mandatory_fields(self, condition, expected):
+        assert condition(FIELDS) is expected
+
+    @pytest.mark.parametrize("name", list(DERIVED_FIELDS))
+    def test_derived_fields_match_record(self, name):
+        record = PafRecord.from_bytes(LINE)
+        expected = getattr(record, name)
+        if callable(expected):
+            expected = expected()
+
+        assert (col(name) == expected)(FIELDS)
+        assert not (col(name) != expected)(FIELDS)
+
+    def test_derived_field_zero_denominator(self):
+        fields = b"r\t0\t0\t0\t*\t*\t0\t0\t0\t0\t0\t255".split(b"\t")
+
+        assert (col("query_coverage") == 0.0)(fields)
+        assert (col("blast_identity") == 0.0)(fields)
+
+    def test_unknown_field_raises_error(self):
+        with pytest.raises(ValueError):
+            col("foo")
+
+
+class TestTag:
+    @pytest.mark.parametrize(
+        "condition,expected",
+        [
+            (tag("NM") == 1, True),
+            (tag("NM") > 1, False),
+            (tag("tp") == "P", True),
+            (tag("tp").isin({"S", "I"}), False),
+            (tag("de") < 0.5, True),
+            (tag("cg") == "5M", False),
+            (tag("cg") != "5M", False),
+            (tag("tp") > 1, False),
+        ],
+    )
+    def test_comparisons(self, condition, expected):
+        assert condition(FIELDS) is expected
+
+    def test_first_and_last_tags_found(self):
+        assert (tag("NM") == 1)(FIELDS)
+        assert (tag("de") == 0.2)(FIELDS)
+
+    def test_tag_name_not_matched_inside_value(self):
+        fields = b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0\tcg:Z:1M\tZM:i:3".split(b"\t", 12)
+
+        assert (tag("ZM") == 3)(fields)
+        assert not (tag("1M") == "x")(fields)
+
+    def test_duplicate_tag_uses_last(self):
+        fields = b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0\tNM:i:1\tNM:i:3".split(b"\t", 12)
+
+        assert (tag("NM") == 3)(fields)
+        assert not (tag("NM") == 1)(fields)
+
+    def test_record_without_tags(self):
+        assert not (tag("NM") == 1)(NO_TAGS)
+        assert (~(tag("NM") == 1))(NO_TAGS)
+
+    def test_invalid_name_raises_error(self):
+        with pytest.raises(ValueError):
+            tag("NMX")
+
+
+class TestCondition:
+    def test_and(self):
+        assert ((col("mapq") == 60) & (tag("tp") == "P"))(FIELDS)
+        assert not ((col("mapq") == 60) & (tag("tp") == "S"))(FIELDS)
+
+    def test_or(self):
+        assert ((col("mapq") == 0) | (tag("tp") == "P"))(FIELDS)
+        assert not ((col("mapq") == 0) | (tag("tp") == "S"))(FIELDS)
+
+    def test_invert(self):
+        assert (~(col("mapq") == 0))(FIELDS)
+
+    def test_matches_line(self):
+        assert (col("mapq") == 60).matches(LINE + b"\n")
+
+    def test_repr(self):
+        condition = (col("mapq") >= 30) & ~(tag("tp") == "S")
+
+        assert repr(condition) == "(mapq >= 30 & ~tag('tp') == 'S')"
+
+    def test_bool_raises_error(self):
+        with pytest.raises(TypeError):
+            bool(col("mapq") > 30)
+
+    def test_chained_comparison_raises_error(self):
+        with pytest.raises(TypeError):
+            0 < col("mapq") < 60
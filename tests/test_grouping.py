@@ -0,0 +1,102 @@
+import pytest
+
+from pafpy.grouping import best_by, group_by_query, primary_only, top_k
+from pafpy.pafrecord import PafRecord
+from pafpy.strand import Strand
+from pafpy.tag import Tag
+
+
+def make_record(qname, mlen=0, mapq=0, tp="P"):
+    return PafRecord(
+        qname=qname,
+        strand=Strand.Forward,
+        mlen=mlen,
+        blen=100,
+        mapq=mapq,
+        tags={"tp": Tag("tp", "A", tp)},
+    )
+
+
+class TestGroupByQuery:
+    def test_empty(self):
+        assert list(group_by_query([])) == []
+
+    def test_consecutive_records_grouped(self):
+        records = [make_record(q) for q in ["a", "a", "b", "c", "c", "c"]]
+
+        actual = list(group_by_query(records))
+        expected = [("a", records[:2]), ("b", records[2:3]), ("c", records[3:])]
+
+        assert actual == expected
+
+    def test_non_consecutive_records_are_separate_groups(self):
+        records = [make_record(q) for q in ["a", "b", "a"]]
+
+        actual = [qname for qname, _ in group_by_query(records)]
+
+        assert actual == ["a", "b", "a"]
+
+    def test_is_lazy(self):
+        def records():
+            yield make_record("a")
+            yield make_record("b")
+            raise RuntimeError("read too far")
+
+        groups = group_by_query(records())
+
+        assert next(groups)[0] == "a"
+
+
+class TestBestBy:
+    def test_field(self):
+        group = [make_record("a", mapq=q) for q in [10, 60, 30]]
+
+        assert best_by("mapq")(group) is group[1]
+
+    def test_method(self):
+        group = [make_record("a", mlen=m) for m in [90, 95, 50]]
+
+        assert best_by("blast_identity")(group) is group[1]
+
+    def test_callable(self):
+        group = [make_record("a", mapq=q) for q in [10, 60, 30]]
+
+        assert best_by(lambda record: -record.mapq)(group) is group[0]
+
+    def test_ties_return_first(self):
+        group = [make_record("a", mapq=60), make_record("a", mapq=60)]
+
+        assert best_by("mapq")(group) is group[0]
+
+    def test_unknown_key_raises_error(self):
+        with pytest.raises(ValueError):
+            best_by("foo")
+
+
+class TestTopK:
+    def test_descending_order(self):
+        group = [make_record("a", mlen=m) for m in [5, 20, 10, 15]]
+
+        actual = top_k(2, "mlen")(group)
+
+        assert actual == [group[1], group[3]]
+
+    def test_k_larger_than_group(self):
+        group = [make_record("a", mlen=m) for m in [5, 20]]
+
+        assert top_k(5, "mlen")(group) == [group[1], group[0]]
+
+    def test_k_less_than_one_raises_error(self):
+        with pytest.raises(ValueError):
+            top_k(0, "mlen")
+
+
+class TestPrimaryOnly:
+    def test_secondary_and_unmapped_removed(self):
+        group = [
+            make_record("a", tp="S"),
+            make_record("a", tp="P"),
+            PafRecord(qname="a"),
+        ]
+
+        assert primary_only(group) == [group[1]]
@@ -0,0 +1,311 @@
+import gzip
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.bgzf import BgzfReader, BgzfWriter
+from pafpy.index import (
+    QUERY_INDEX_HEADER,
+    InvalidIndexFormat,
+    MissingIndex,
+    QueryIndex,
+    TargetIndex,
+    iter_line_offsets,
+    reg2bin,
+    reg2bins,
+)
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+
+
+@pytest.fixture
+def tmpdir():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+
+def write_records(path, records):
+    path.write_text("\n".join(map(str, records)) + "\n")
+
+
+class TestIterLineOffsets:
+    def test_uncompressed(self, tmpdir):
+        path = tmpdir / "test.paf"
+        path.write_bytes(b"a\nbb\nccc")
+
+        actual = list(iter_line_offsets(path))
+        expected = [(0, b"a\n"), (2, b"bb\n"), (5, b"ccc")]
+
+        assert actual == expected
+
+    def test_bgzf_offsets_are_virtual(self, tmpdir):
+        path = tmpdir / "test.paf.gz"
+        with BgzfWriter(path) as writer:
+            writer.write(b"".join(b"line%d\n" % i for i in range(20_000)))
+
+        offsets = list(iter_line_offsets(path))
+        with BgzfReader(path) as reader:
+            for offset, line in offsets[::1000]:
+                reader.seek(offset)
+                assert reader.readline() == line
+
+    def test_gzip_raises_error(self, tmpdir):
+        path = tmpdir / "test.paf.gz"
+        path.write_bytes(gzip.compress(b"a\n"))
+
+        with pytest.raises(ValueError):
+            list(iter_line_offsets(path))
+
+
+class TestQueryIndex:
+    def test_build(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = [PafRecord(qname=name) for name in ["r1", "r2", "r1", "r3"]]
+        write_records(path, records)
+        line_length = len(str(records[0])) + 1
+
+        index = QueryIndex.build(path)
+
+        assert len(index) == 3
+        assert list(index) == ["r1", "r2", "r3"]
+        assert index["r1"] == [0, 2 * line_length]
+        assert index["r3"] == [3 * line_length]
+        assert "r2" in index
+        assert "r4" not in index
+        assert index.get("r4") == []
+
+    def test_save_and_load_round_trip(self, tmpdir):
+        index = QueryIndex({"r1": [0, 100], "r2": [50]})
+        index_path = tmpdir / "test.paf.qidx"
+
+        index.save(index_path)
+        actual = QueryIndex.load(index_path)
+
+        assert actual._offsets == dict()
+        assert list(actual) == ["r1", "r2"]
+        assert {qname: actual[qname] for qname in actual} == index._offsets
+        assert index_path.read_text().startswith(QUERY_INDEX_HEADER + "\t")
+
+    def test_load_reads_offsets_on_lookup(self, tmpdir):
+        offsets = {f"r{i}": [i * 10, i * 10 + 5] for i in range(100, 0, -1)}
+        index_path = tmpdir / "test.paf.qidx"
+        QueryIndex(offsets).save(index_path)
+
+        index = QueryIndex.load(index_path)
+
+        assert len(index) == 100
+        assert list(index) == sorted(offsets)
+        assert index["r42"] == [420, 425]
+        assert index.get("r1") == [10, 15]
+        assert index.get("r0") == []
+        assert index.get("r999") == []
+        assert "r100" in index
+        assert "r101" not in index
+        assert 1 not in index
+        with pytest.raises(KeyError):
+            index["zzz"]
+
+    def test_save_loaded_index_over_itself(self, tmpdir):
+        index_path = tmpdir / "test.paf.qidx"
+        QueryIndex({"r2": [50], "r1": [0, 100]}).save(index_path)
+
+        QueryIndex.load(index_path).save(index_path)
+        actual = QueryIndex.load(index_path)
+
+        assert actual["r1"] == [0, 100]
+        assert actual["r2"] == [50]
+
+    def test_build_skips_blank_lines(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = [PafRecord(qname="r1"), PafRecord(qname="r2")]
+        path.write_text(f"{records[0]}\n\n{records[1]}\n\n")
+        line_length = len(str(records[0])) + 1
+
+        index = QueryIndex.build(path)
+
+        assert list(index) == ["r1", "r2"]
+        assert index["r2"] == [line_length + 1]
+
+    def test_load_missing_raises_error(self, tmpdir):
+        with pytest.raises(MissingIndex):
+            QueryIndex.load(tmpdir / "missing.qidx")
+
+    def test_load_invalid_raises_error(self, tmpdir):
+        index_path = tmpdir / "test.paf.qidx"
+        index_path.write_text("r1\t0\n")
+
+        with pytest.raises(InvalidIndexFormat):
+            QueryIndex.load(index_path)
+
+
+class TestReg2Bin:
+    def test_smallest_bin(self):
+        assert reg2bin(0, 1) == 37449
+        assert reg2bin(16384, 16385) == 37450
+
+    def test_interval_spanning_bins_goes_up_a_level(self):
+        assert reg2bin(16383, 16385) == 4681
+
+    def test_empty_interval_treated_as_single_base(self):
+        assert reg2bin(10, 10) == reg2bin(10, 11)
+
+    def test_beyond_max_coordinate_is_root_bin(self):
+        assert reg2bin(2**33, 2**33 + 10) == 0
+
+    def test_matches_sam_specification(self):
+        # the SAM/BAI scheme is the CSI scheme with depth 5
+        assert reg2bin(0, 1, depth=5) == 4681
+        assert reg2bin(16383, 16385, depth=5) == 585
+        assert reg2bin(0, 2**29, depth=5) == 0
+
+
+class TestReg2Bins:
+    def test_includes_every_level(self):
+        actual = reg2bins(0, 1)
+
+        assert actual == [0, 1, 9, 73, 585, 4681, 37449]
+
+    def test_contains_bin_of_every_overlapping_interval(self):
+        rng = random.Random(1)
+        for _ in range(1000):
+            start = rng.randrange(0, 2**30)
+            end = start + rng.randrange(1, 2**20)
+            query_start = rng.randrange(max(0, start - 10**6), end)
+            query_end = max(start + 1, query_start + rng.randrange(1, 10**6))
+
+            assert reg2bin(start, end) in reg2bins(query_start, query_end)
+
+
+class TestTargetIndex:
+    @staticmethod
+    def overlapping(records, tname, start, end):
+        return [
+            i
+            for i, r in enumerate(records)
+            if r.tname == tname and r.tstart < end and r.tend > start
+        ]
+
+    def test_build_and_query(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = [
+            PafRecord(tname="chr1", tstart=100, tend=200),
+            PafRecord(tname="chr2", tstart=100, tend=200),
+            PafRecord(tname="chr1", tstart=150, tend=100_000),
+            PafRecord(tname="chr1", tstart=300, tend=400),
+        ]
+        write_records(path, records)
+        line_length = len(str(records[0])) + 1
+
+        index = TargetIndex.build(path)
+
+        assert len(index) == 2
+        assert list(index) == ["chr1", "chr2"]
+        assert "chr2" in index
+        assert index.overlapping_offsets("chr1", 0, 160) == [0, 2 * line_length]
+        assert index.overlapping_offsets("chr1", 200, 300) == [2 * line_length]
+        assert index.overlapping_offsets("chr1", 400, 500) == [2 * line_length]
+        assert index.overlapping_offsets("chr3", 0, 500) == []
+
+    def test_save_and_load_matches_in_memory_index(self, tmpdir):
+        path = tmpdir / "test.paf"
+        rng = random.Random(42)
+        records = []
+        for i in range(2000):
+            tstart = rng.randrange(0, 10**7)
+            tend = tstart + rng.choice([100, 10_000, 500_000])
+            records.append(
+                PafRecord(qname=f"r{i}", tname=f"chr{i % 3}", tstart=tstart, tend=tend)
+            )
+        write_records(path, records)
+        index_path = tmpdir / "test.paf.tidx"
+
+        built = TargetIndex.build(path)
+        built.save(index_path)
+        loaded = TargetIndex.load(index_path)
+
+        assert list(loaded) == list(built)
+        for _ in range(50):
+            start = rng.randrange(0, 10**7)
+            end = start + rng.randrange(1, 10**5)
+            expected = built.overlapping_offsets("chr1", start, end)
+
+            assert loaded.overlapping_offsets("chr1", start, end) == expected
+            assert len(expected) == len(self.overlapping(records, "chr1", start, end))
+
+    def test_bgzf_offsets_are_virtual(self, tmpdir):
+        path = tmpdir / "test.paf.gz"
+        records = [
+            PafRecord(qname=f"r{i}", tname="chr1", tstart=i, tend=i + 1)
+            for i in range(3)
+        ]
+        with BgzfWriter(path) as writer:
+            writer.write("".join(f"{r}\n" for r in records).encode())
+        with BgzfReader(path) as reader:
+            expected = []
+            for _ in records:
+                expected.append(reader.tell())
+                reader.readline()
+
+        index = TargetIndex.build(path)
+
+        assert index.overlapping_offsets("chr1", 0, 3) == expected
+        assert index.overlapping_offsets("chr1", 1, 2) == expected[1:2]
+
+    def test_save_loaded_index_over_itself(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = [
+            PafRecord(tname="chr2", tstart=100, tend=200),
+            PafRecord(tname="chr1", tstart=150, tend=100_000),
+            PafRecord(tname="chr1", tstart=300, tend=400),
+        ]
+        write_records(path, records)
+        offsets = [0, len(str(records[0])) + 1]
+        offsets.append(offsets[1] + len(str(records[1])) + 1)
+        index_path = tmpdir / "test.paf.tidx"
+        TargetIndex.build(path, min_shift=10, depth=4).save(index_path)
+
+        TargetIndex.load(index_path).save(index_path)
+        actual = TargetIndex.load(index_path)
+
+        assert len(actual) == 2
+        assert (actual.min_shift, actual.depth) == (10, 4)
+        assert actual.overlapping_offsets("chr1", 0, 500) == offsets[1:]
+        assert actual.overlapping_offsets("chr2", 0, 500) == [0]
+
+    def test_build_skips_blank_lines(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = [PafRecord(tname=f"chr{i}", tend=1) for i in (1, 2)]
+        path.write_text(f"{records[0]}\n\n{records[1]}\n\n")
+        line_length = len(str(records[0])) + 1
+
+        index = TargetIndex.build(path)
+
+        assert list(index) == ["chr1", "chr2"]
+        assert index.overlapping_offsets("chr2", 0, 1) == [line_length + 1]
+
+    def test_build_too_few_fields_raises_error(self, tmpdir):
+        path = tmpdir / "test.paf"
+        path.write_text("read1\t10\t0\n")
+
+        with pytest.raises(MalformattedRecord):
+            TargetIndex.build(path)
+
+    def test_load_missing_raises_error(self, tmpdir):
+        with pytest.raises(MissingIndex):
+            TargetIndex.load(tmpdir / "missing.tidx")
+
+    def test_load_invalid_raises_error(self, tmpdir):
+        index_path = tmpdir / "test.paf.tidx"
+        index_path.write_text(QUERY_INDEX_HEADER + "\n")
+
+        with pytest.raises(InvalidIndexFormat):
+            TargetIndex.load(index_path)
+
+    def test_gzip_raises_error(self, tmpdir):
+        path = tmpdir / "test.paf.gz"
+        with gzip.open(path, mode="wt") as fileobj:
+            fileobj.write(str(PafRecord()))
+
+        with pytest.raises(ValueError):
+            TargetIndex.build(path)
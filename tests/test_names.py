@@ -0,0 +1,56 @@
+import pytest
+
+from pafpy.names import CODE_TYPECODE, NameDictionary
+
+
+class TestNameDictionary:
+    def test_codes_in_order_first_seen(self):
+        names = NameDictionary()
+
+        assert names.code(b"chr2") == 0
+        assert names.code(b"chr1") == 1
+        assert names.code(b"chr2") == 0
+        assert names.names == ["chr2", "chr1"]
+        assert len(names) == 2
+
+    def test_intern_returns_same_object(self):
+        names = NameDictionary()
+        first = names.intern(b"read1")
+        second = names.intern(b"read1")
+
+        assert first == "read1"
+        assert first is second
+        assert names.intern("read1") is first
+
+    def test_str_and_bytes_share_code(self):
+        names = NameDictionary()
+        names.code("chr1")
+
+        assert names.code(b"chr1") == 0
+        assert list(names.encode(["chr1", b"chr1", b"chr2"])) == [0, 0, 1]
+        assert names.names == ["chr1", "chr2"]
+
+    def test_encode(self):
+        names = NameDictionary()
+        encoded = names.encode([b"a", b"b", b"a"])
+
+        assert encoded.typecode == CODE_TYPECODE
+        assert list(encoded) == [0, 1, 0]
+
+    def test_lookups(self):
+        names = NameDictionary()
+        names.encode([b"chr1", b"chr2"])
+
+        assert names[1] == "chr2"
+        assert names.index("chr2") == 1
+        assert names.index(b"chr2") == 1
+        assert names.get("chr3") is None
+        assert "chr1" in names
+        assert b"chr1" in names
+        assert "chr3" not in names
+        assert list(names) == ["chr1", "chr2"]
+        assert repr(names) == "NameDictionary(2 names)"
+
+    def test_index_of_unknown_name_raises_error(self):
+        with pytest.raises(KeyError):
+            NameDictionary().index("chr1")
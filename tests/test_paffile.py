@@ -1,11 +1,20 @@
+import gzip
 import io
 import tempfile
 from pathlib import Path
 
 import pytest
 
+from pafpy.bgzf import BgzfReader, BgzfWriter
+from pafpy.filters import col, tag
+from pafpy.grouping import best_by
+from pafpy.index import MissingIndex
 from pafpy.paffile import PafFile
-from pafpy.pafrecord import PafRecord
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+from pafpy.stats import ReadStats
+from pafpy.strand import Strand
+from pafpy.streams import MmapLineReader, ReadAheadLineReader
+from pafpy.tag import LazyTags, Tag
 
 TEST_DIR = Path(__file__).parent
 
@@ -123,6 +132,14 @@ class TestIterateFile:
 
             assert actual == expected
 
+    def test_lazy_tags_passed_to_records(self):
+        path = TEST_DIR / "demo.paf"
+        with PafFile(path, lazy_tags=True) as paf:
+            record = next(paf)
+
+        assert isinstance(record.tags, LazyTags)
+        assert record.get_tag("de") == Tag("de", "f", 0.0)
+
     def test_call_next_on_closed_file_raises_error(self):
         paf = PafFile(fileobj="foo")
         with pytest.raises(IOError):
@@ -144,6 +161,72 @@ class TestIO:
 
         assert record.qname == "11737-1"
 
+    def test_read_bgzf_compressed(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}") for i in range(10_000)]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with BgzfWriter(path) as writer:
+                writer.write("\n".join(map(str, records)).encode())
+            with PafFile(path, threads=2) as paf:
+                assert isinstance(paf._stream, BgzfReader)
+                actual = list(paf)
+
+        assert actual == records
+
+    def test_read_normal_file_with_mmap(self):
+        path = TEST_DIR / "demo.paf"
+        with PafFile(path, use_mmap=True) as paf:
+            assert isinstance(paf._stream, MmapLineReader)
+            records = list(paf)
+            paf.open()
+            assert next(paf) == records[0]
+
+        assert records == list(PafFile(path).open())
+
+    def test_read_gzip_compressed_ignores_mmap(self):
+        path = TEST_DIR / "demo.paf.gz"
+        with PafFile(path, use_mmap=True) as paf:
+            assert not isinstance(paf._stream, MmapLineReader)
+            record = next(paf)
+
+        assert record.qname == "11737-1"
+
+    def test_read_gzip_compressed_with_read_ahead(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}") for i in range(10_000)]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with gzip.open(path, mode="wt") as fileobj:
+                fileobj.write("\n".join(map(str, records)))
+            with PafFile(path, read_ahead=True) as paf:
+                assert isinstance(paf._stream, ReadAheadLineReader)
+                actual = list(paf)
+
+        assert actual == records
+
+    def test_reopen_gzip_compressed_with_read_ahead(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}") for i in range(100)]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with gzip.open(path, mode="wt") as fileobj:
+                fileobj.write("\n".join(map(str, records)))
+            with PafFile(path, read_ahead=True) as paf:
+                first_pass = list(paf)
+                stream = paf._stream
+                paf.open()
+                assert stream.closed
+                second_pass = list(paf)
+
+        assert first_pass == records
+        assert second_pass == records
+
+    def test_read_normal_file_ignores_read_ahead(self):
+        path = TEST_DIR / "demo.paf"
+        with PafFile(path, read_ahead=True) as paf:
+            assert not isinstance(paf._stream, ReadAheadLineReader)
+            record = next(paf)
+
+        assert record.qname == "11737-1"
+
     def test_read_from_fileobj(self):
         path = TEST_DIR / "demo.paf"
         with open(path) as fileobj:
@@ -175,3 +258,639 @@ class TestIO:
         record = next(paf)
 
         assert record.qname == fields[0]
+
+
+class TestIterBatches:
+    def test_batches_cover_all_records(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}", tname="chr1") for i in range(5)]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            with PafFile(path) as paf:
+                batches = list(paf.iter_batches(batch_size=2))
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [r for batch in batches for r in batch] == records
+        assert all(list(batch.tname) == [0] * len(batch) for batch in batches)
+        assert list(batches[2].qname) == [4]
+
+    def test_gzip_compressed(self):
+        path = TEST_DIR / "demo.paf.gz"
+        with PafFile(path) as paf:
+            batch = next(paf.iter_batches())
+
+        assert batch.query_names() == ["11737-1"]
+
+    def test_invalid_batch_size_raises_error(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            with pytest.raises(ValueError):
+                next(paf.iter_batches(batch_size=0))
+
+    def test_closed_file_raises_error(self):
+        paf = PafFile(fileobj="foo")
+        with pytest.raises(IOError):
+            next(paf.iter_batches())
+
+
+class TestIterLines:
+    def test_raw_lines(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            actual = list(paf.iter_lines())
+
+        assert actual == (TEST_DIR / "demo.paf").read_bytes().splitlines(True)
+
+    def test_where_filters_lines(self):
+        lines = ["r1\t10\t0\t10\t+\tt\t10\t0\t10\t10\t10\t" + q for q in "0369"]
+        with PafFile(
+            io.BytesIO("\n".join(lines).encode()), where=col("mapq") > 4
+        ) as paf:
+            actual = list(paf.iter_lines())
+
+        assert actual == [lines[2].encode() + b"\n", lines[3].encode()]
+
+    def test_closed_file_raises_error(self):
+        paf = PafFile(fileobj="foo")
+        with pytest.raises(IOError):
+            next(paf.iter_lines())
+
+
+def _mapq_if_named_read1(record):
+    return record.mapq if record.qname == "read1" else None
+
+
+class TestIterParallel:
+    def test_ordered_returns_all_records_in_order(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(50)]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)) + "\n")
+            paf = PafFile(path)
+            actual = list(paf.iter_parallel(processes=2, chunk_size=100))
+
+        assert actual == records
+
+    def test_unordered_returns_all_records(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(50)]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            paf = PafFile(path)
+            actual = paf.iter_parallel(processes=2, ordered=False, chunk_size=100)
+
+            assert sorted(actual, key=lambda r: r.mapq) == records
+
+    def test_func_maps_and_filters_in_workers(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i % 3}", mapq=i) for i in range(30)]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            paf = PafFile(path)
+            actual = list(
+                paf.iter_parallel(processes=2, func=_mapq_if_named_read1, chunk_size=64)
+            )
+
+        expected = list(range(1, 30, 3))
+
+        assert actual == expected
+
+    def test_lazy_tags_passed_to_workers(self):
+        paf = PafFile(TEST_DIR / "demo.paf", lazy_tags=True)
+
+        record = next(paf.iter_parallel(processes=1))
+
+        assert isinstance(record.tags, LazyTags)
+        assert record == next(PafFile(TEST_DIR / "demo.paf").open())
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_bgzf_returns_every_record_once(self, ordered):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}", mapq=i % 256) for i in range(20_000)]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with BgzfWriter(path) as writer:
+                writer.write(("\n".join(map(str, records)) + "\n").encode())
+            paf = PafFile(path)
+            actual = list(
+                paf.iter_parallel(processes=2, ordered=ordered, chunk_size=20_000)
+            )
+
+        if not ordered:
+            actual.sort(key=lambda r: int(r.qname[4:]))
+        assert actual == records
+
+    def test_compressed_file_raises_error(self):
+        paf = PafFile(TEST_DIR / "demo.paf.gz")
+
+        with pytest.raises(ValueError):
+            paf.iter_parallel()
+
+    def test_file_object_raises_error(self):
+        with open(TEST_DIR / "demo.paf") as fileobj:
+            paf = PafFile(fileobj)
+
+            with pytest.raises(ValueError):
+                paf.iter_parallel()
+
+    @pytest.mark.parametrize(
+        "kwargs, message",
+        [
+            ({"where": col("mapq") >= 3}, "where"),
+            ({"fields": ["qname"]}, "fields/tags"),
+            ({"tags": ["NM"]}, "fields/tags"),
+            ({"intern_names": ["tname"]}, "intern_names"),
+        ],
+    )
+    def test_unsupported_options_raise_error(self, kwargs, message):
+        paf = PafFile(TEST_DIR / "demo.paf", **kwargs)
+
+        with pytest.raises(ValueError, match=message):
+            paf.iter_parallel()
+
+
+class TestTellSeek:
+    def test_uncompressed(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}") for i in range(5)]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            for use_mmap in [False, True]:
+                with PafFile(path, use_mmap=use_mmap) as paf:
+                    offsets = []
+                    for _ in records:
+                        offsets.append(paf.tell())
+                        next(paf)
+                    paf.seek(offsets[3])
+                    assert next(paf) == records[3]
+                    paf.seek(offsets[1])
+                    assert next(paf) == records[1]
+
+    def test_bgzf(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i}") for i in range(10_000)]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with BgzfWriter(path) as writer:
+                writer.write("\n".join(map(str, records)).encode())
+            with PafFile(path) as paf:
+                offsets = []
+                for _ in records:
+                    offsets.append(paf.tell())
+                    next(paf)
+                paf.seek(offsets[9_000])
+                assert next(paf) == records[9_000]
+                paf.seek(offsets[2])
+                assert next(paf) == records[2]
+
+    def test_closed_file_raises_error(self):
+        paf = PafFile(TEST_DIR / "demo.paf")
+
+        with pytest.raises(IOError):
+            paf.tell()
+        with pytest.raises(IOError):
+            paf.seek(0)
+
+
+class TestFetchQuery:
+    def test_uncompressed(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i % 7}", mapq=i) for i in range(50)]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            with PafFile(path) as paf:
+                paf.build_query_index()
+            assert Path(f"{tmpdirname}/test.paf.qidx").exists()
+
+            with PafFile(path) as paf:
+                actual = paf.fetch_query("read2")
+                missing = paf.fetch_query("read8")
+
+        expected = [r for r in records if r.qname == "read2"]
+
+        assert actual == expected
+        assert missing == []
+
+    def test_bgzf(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [PafRecord(qname=f"read{i % 7}", mapq=i) for i in range(10_000)]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with BgzfWriter(path) as writer:
+                writer.write("\n".join(map(str, records)).encode())
+            with PafFile(path) as paf:
+                paf.build_query_index()
+                actual = paf.fetch_query("read5")
+
+        expected = [r for r in records if r.qname == "read5"]
+
+        assert actual == expected
+
+    def test_custom_index_path(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = TEST_DIR / "demo.paf"
+            index_path = Path(f"{tmpdirname}/demo.qidx")
+            with PafFile(path) as paf:
+                index = paf.build_query_index(index_path)
+                record = paf.fetch_query("11737-1")[0]
+
+            assert index_path.exists()
+            assert list(index) == ["11737-1"]
+            assert record.tname == "31171-1"
+
+    def test_missing_index_raises_error(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            with pytest.raises(MissingIndex):
+                paf.fetch_query("11737-1")
+
+    def test_gzip_raises_error(self):
+        with PafFile(TEST_DIR / "demo.paf.gz") as paf:
+            with pytest.raises(ValueError):
+                paf.build_query_index()
+
+    def test_query_index_path(self):
+        assert PafFile("dir/test.paf").query_index_path == Path("dir/test.paf.qidx")
+        assert PafFile("-").query_index_path is None
+
+
+class TestFetch:
+    def test_uncompressed(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [
+                PafRecord(
+                    qname=f"r{i}", tname=f"chr{i % 2}", tstart=i * 10, tend=i * 10 + 50
+                )
+                for i in range(1000)
+            ]
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            with PafFile(path) as paf:
+                paf.build_target_index()
+            assert Path(f"{tmpdirname}/test.paf.tidx").exists()
+
+            with PafFile(path) as paf:
+                actual = paf.fetch("chr1", 1000, 1100)
+                whole_target = paf.fetch("chr0")
+                missing = paf.fetch("chr2", 0, 100)
+
+        assert [r.qname for r in actual] == [f"r{i}" for i in range(97, 110, 2)]
+        assert whole_target == records[::2]
+        assert missing == []
+
+    def test_bgzf(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            records = [
+                PafRecord(qname=f"r{i}", tname="chr1", tstart=i, tend=i + 100)
+                for i in range(10_000)
+            ]
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            with BgzfWriter(path) as writer:
+                writer.write("\n".join(map(str, records)).encode())
+            with PafFile(path) as paf:
+                paf.build_target_index()
+                actual = paf.fetch("chr1", 5000, 5001)
+
+        assert actual == records[4901:5001]
+
+    def test_invalid_region_raises_error(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            with pytest.raises(ValueError):
+                paf.fetch("31171-1", 10, 5)
+
+    def test_missing_index_raises_error(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            with pytest.raises(MissingIndex):
+                paf.fetch("31171-1", 0, 10)
+
+    def test_target_index_path(self):
+        assert PafFile("dir/test.paf").target_index_path == Path("dir/test.paf.tidx")
+        assert PafFile("-").target_index_path is None
+
+
+class TestWhere:
+    def write_records(self, path):
+        records = [
+            PafRecord(
+                qname=f"read{i}",
+                strand=Strand.Forward,
+                tname=f"chr{i % 3}",
+                tstart=i,
+                tend=i + 10,
+                mapq=i % 61,
+                tags={"tp": Tag("tp", "A", "PS"[i % 2])},
+            )
+            for i in range(200)
+        ]
+        path.write_text("\n".join(map(str, records)))
+        return records
+
+    def test_iteration(self):
+        where = (col("mapq") >= 30) & (tag("tp") == "P")
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = self.write_records(path)
+            with PafFile(path, where=where) as paf:
+                actual = list(paf)
+
+        expected = [r for r in records if r.mapq >= 30 and r.is_primary()]
+
+        assert actual == expected
+
+    def test_text_stream(self):
+        with open(TEST_DIR / "demo.paf") as fileobj:
+            actual = list(PafFile(fileobj, where=col("mapq") == 0))
+
+        assert [r.qname for r in actual] == ["11737-1"]
+
+    def test_iter_batches_and_to_store(self):
+        where = col("tname") == "chr1"
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = self.write_records(path)
+            with PafFile(path, where=where) as paf:
+                batches = list(paf.iter_batches(batch_size=3))
+            with PafFile(path, where=where) as paf:
+                store = paf.to_store()
+
+        expected = [r.qname for r in records if r.tname == "chr1"]
+
+        assert all(len(batch) <= 3 for batch in batches)
+        assert [name for batch in batches for name in batch.query_names()] == expected
+        assert [record.qname for record in store] == expected
+
+    def test_fetch(self):
+        where = tag("tp") == "S"
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = self.write_records(path)
+            with PafFile(path) as paf:
+                paf.build_target_index()
+                paf.build_query_index()
+            with PafFile(path, where=where) as paf:
+                fetched = paf.fetch("chr0", 0, 50)
+                fetched_query = paf.fetch_query("read3")
+                missing = paf.fetch_query("read2")
+
+        expected = [
+            r
+            for r in records
+            if r.tname == "chr0" and r.tstart < 50 and r.is_secondary()
+        ]
+
+        assert fetched == expected
+        assert fetched_query == [records[3]]
+        assert missing == []
+
+    def test_malformed_line_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            list(PafFile(io.BytesIO(b"read1\t10\n"), where=col("mapq") > 0))
+
+
+class TestProjection:
+    def test_iteration(self):
+        with PafFile(
+            TEST_DIR / "demo.paf", fields=["qname", "mapq"], tags=["tp"]
+        ) as paf:
+            actual = list(paf)
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            records = list(paf)
+
+        expected = [(r.qname, r.mapq, r.get_tag("tp").value) for r in records]
+
+        assert [tuple(row) for row in actual] == expected
+        assert actual[0].qname == records[0].qname
+
+    def test_text_stream_and_compressed(self):
+        with open(TEST_DIR / "demo.paf") as fileobj:
+            text = list(PafFile(fileobj, fields=["tname", "strand"]))
+        with PafFile(TEST_DIR / "demo.paf.gz", fields=["tname", "strand"]) as paf:
+            compressed = list(paf)
+
+        assert text == compressed
+        assert text[0].strand in (Strand.Forward, Strand.Reverse)
+
+    def test_tags_only(self):
+        with PafFile(
+            io.BytesIO(b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0\tNM:i:3\n"), tags=["NM"]
+        ) as paf:
+            actual = list(paf)
+
+        assert actual == [(3,)]
+        assert actual[0].NM == 3
+
+    def test_with_where(self):
+        where = col("mapq") == 0
+        with PafFile(TEST_DIR / "demo.paf", where=where, fields=["qname"]) as paf:
+            actual = list(paf)
+
+        assert actual == [("11737-1",)]
+
+    def test_fetch(self):
+        records = [
+            PafRecord(qname=f"read{i}", tname="chr1", tstart=i, tend=i + 10, mapq=i)
+            for i in range(50)
+        ]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            with PafFile(path) as paf:
+                paf.build_target_index()
+                paf.build_query_index()
+            with PafFile(path, fields=["mapq"]) as paf:
+                fetched = paf.fetch("chr1", 0, 5)
+                fetched_query = paf.fetch_query("read7")
+
+        assert [row.mapq for row in fetched] == list(range(5))
+        assert fetched_query == [(7,)]
+
+    def test_unknown_field_raises_error(self):
+        with pytest.raises(ValueError):
+            PafFile(TEST_DIR / "demo.paf", fields=["foo"])
+
+
+class TestGroupByQuery:
+    def test_groups_demo_file(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            records = list(paf)
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            groups = list(paf.group_by_query())
+
+        assert [r for _, group in groups for r in group] == records
+        assert all(r.qname == qname for qname, group in groups for r in group)
+        assert len({qname for qname, _ in groups}) == len(groups)
+
+    def test_reducer(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            best = dict(paf.group_by_query(best_by("mlen")))
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            records = list(paf)
+
+        for qname, record in best.items():
+            assert record.mlen == max(r.mlen for r in records if r.qname == qname)
+
+
+class TestStats:
+    def test_disabled_by_default(self):
+        assert PafFile(TEST_DIR / "demo.paf").stats is None
+
+    def test_counts_lines_records_and_bytes(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [
+                PafRecord(qname=f"read{i}", mapq=i, tags={"NM": Tag.from_str("NM:i:1")})
+                for i in range(10)
+            ]
+            path.write_text("".join(f"{record}\n" for record in records))
+            with PafFile(path, stats=True) as paf:
+                actual = list(paf)
+            size = path.stat().st_size
+
+        stats = paf.stats
+        assert actual == records
+        assert stats.lines == 10
+        assert stats.records == 10
+        assert stats.bytes_read == size
+        assert stats.compressed_bytes_read == 0
+        assert stats.tag_time > 0
+        assert stats.elapsed >= stats.read_time + stats.parse_time - 1e-9
+
+    def test_end_of_file_reported_once_per_pass(self):
+        reports = []
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("".join(f"{PafRecord(qname=f'r{i}')}\n" for i in range(5)))
+            with PafFile(path, stats=True) as paf:
+                paf.stats.callback = lambda stats: reports.append(stats.lines)
+                paf.stats.interval = 2
+                for _ in range(3):
+                    assert len(list(paf)) == 5
+                    assert list(paf) == []
+                    with pytest.raises(StopIteration):
+                        next(paf)
+                    paf.open()
+
+        assert reports == [2, 4, 5, 6, 8, 10, 12, 14, 15]
+
+    def test_where_counts_only_matching_records(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(10)]
+            path.write_text("\n".join(map(str, records)))
+            with PafFile(path, where=col("mapq") >= 7, stats=True) as paf:
+                actual = list(paf)
+
+        assert actual == records[7:]
+        assert paf.stats.lines == 10
+        assert paf.stats.records == 3
+
+    def test_with_projection_and_lazy_tags(self):
+        path = TEST_DIR / "demo.paf"
+        with PafFile(path) as paf:
+            expected = list(paf)
+        with PafFile(path, lazy_tags=True, stats=True) as paf:
+            lazy = list(paf)
+        with PafFile(path, fields=["qname"], stats=True) as paf:
+            projected = list(paf)
+
+        assert lazy == expected
+        assert isinstance(lazy[0].tags, LazyTags)
+        assert [r.qname for r in projected] == [r.qname for r in expected]
+        assert paf.stats.tag_time == 0.0
+
+    @pytest.mark.parametrize("bgzf", [False, True])
+    def test_counts_compressed_bytes(self, bgzf):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            records = [PafRecord(qname=f"read{i}") for i in range(1_000)]
+            data = "".join(f"{record}\n" for record in records).encode()
+            if bgzf:
+                with BgzfWriter(path) as writer:
+                    writer.write(data)
+            else:
+                path.write_bytes(gzip.compress(data))
+            with PafFile(path, stats=True) as paf:
+                actual = list(paf)
+            size = path.stat().st_size
+
+        assert actual == records
+        assert paf.stats.bytes_read == len(data)
+        assert 0 < paf.stats.compressed_bytes_read <= size
+        assert paf._counter is None
+
+    def test_shared_stats_accumulate_and_report_at_end(self):
+        calls = []
+        stats = ReadStats(callback=lambda s: calls.append(s.records), interval=1_000)
+        for _ in range(2):
+            with PafFile(TEST_DIR / "demo.paf", stats=stats) as paf:
+                list(paf)
+
+        assert stats.records == 2
+        assert calls == [1, 2]
+
+    def test_malformed_line_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            next(PafFile(io.BytesIO(b"read1\t10\n"), stats=True))
+
+
+class TestInternNames:
+    def test_not_interned_by_default(self):
+        paf = PafFile(TEST_DIR / "demo.paf")
+
+        assert paf.qnames is None
+        assert paf.tnames is None
+
+    def test_unknown_name_raises_error(self):
+        with pytest.raises(ValueError):
+            PafFile(TEST_DIR / "demo.paf", intern_names=["strand"])
+
+    @pytest.mark.parametrize("stats", [False, True])
+    def test_records_share_names(self, stats):
+        records = [
+            PafRecord(qname=f"read{i // 2}", tname=f"chr{i % 3}", tstart=i)
+            for i in range(12)
+        ]
+        data = "\n".join(map(str, records)).encode()
+        intern_names = ["qname", "tname"]
+        with PafFile(io.BytesIO(data), intern_names=intern_names, stats=stats) as paf:
+            actual = list(paf)
+
+        assert actual == records
+        assert actual[0].tname is actual[3].tname
+        assert actual[0].qname is actual[1].qname
+        assert paf.tnames.names == ["chr0", "chr1", "chr2"]
+        assert paf.tnames.index(actual[4].tname) == 1
+        assert len(paf.qnames) == 6
+
+    def test_only_target_names(self):
+        records = [PafRecord(qname="read1", tname="chr1") for _ in range(2)]
+        data = "\n".join(map(str, records))
+        with PafFile(io.StringIO(data), intern_names=["tname"]) as paf:
+            actual = list(paf)
+
+        assert actual == records
+        assert actual[0].tname is actual[1].tname
+        assert actual[0].qname is not actual[1].qname
+        assert paf.qnames is None
+
+    def test_with_where(self):
+        records = [PafRecord(tname=f"chr{i}", mapq=i) for i in range(4)]
+        data = "\n".join(map(str, records)).encode()
+        where = col("mapq") >= 2
+        with PafFile(io.BytesIO(data), where=where, intern_names=["tname"]) as paf:
+            actual = list(paf)
+
+        assert actual == records[2:]
+        assert paf.tnames.names == ["chr2", "chr3"]
+
+    def test_iter_batches_shares_codes(self):
+        records = [PafRecord(tname=f"chr{i % 2}") for i in range(4)]
+        data = "\n".join(map(str, records)).encode()
+        with PafFile(io.BytesIO(data), intern_names=["tname"]) as paf:
+            first = next(paf)
+            (batch,) = list(paf.iter_batches())
+
+        assert first.tname == "chr0"
+        assert list(batch.tname) == [1, 0, 1]
+        assert batch.target_names() == ["chr1", "chr0", "chr1"]
+        assert batch.tname_categories is paf.tnames.names
+
+    def test_malformed_line_raises_error(self):
+        paf = PafFile(io.BytesIO(b"read1\t10\n"), intern_names=["tname"])
+
+        with pytest.raises(MalformattedRecord):
+            next(paf)
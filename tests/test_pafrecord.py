@@ -5,7 +5,7 @@ import pytest
 
 from pafpy.pafrecord import DELIM, MalformattedRecord, PafRecord
 from pafpy.strand import Strand
-from pafpy.tag import InvalidTagFormat, Tag
+from pafpy.tag import InvalidTagFormat, LazyTags, Tag
 
 
 class TestStr:
@@ -34,6 +34,30 @@ class TestStr:
 
         assert actual == expected
 
+    def test_with_lazy_tags_uses_raw_strings(self):
+        tags = LazyTags(["NM:i:1", "de:f:1e-05"])
+        record = PafRecord(tags=tags)
+
+        actual = str(record)
+        expected = (
+            DELIM.join(
+                str(x) for x in PafRecord._field_defaults.values() if x is not None
+            )
+            + DELIM
+            + "NM:i:1\tde:f:1e-05"
+        )
+
+        assert actual == expected
+        assert tags._parsed == dict()
+
+    def test_empty_tags_same_as_no_tags(self):
+        assert str(PafRecord(tags={})) == str(PafRecord())
+
+    def test_round_trip(self):
+        line = "read\t10\t2\t9\t-\tchr1\t100\t50\t57\t6\t7\t60\tNM:i:1\tcg:Z:7M"
+
+        assert str(PafRecord.from_str(line)) == line
+
 
 class TestFromStr:
     def test_empty_str_raises_error(self):
@@ -182,6 +206,93 @@ class TestFromStr:
 
         assert actual == expected
 
+    def test_lazy_tags_not_parsed_until_accessed(self):
+        line = "q\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t60\tNM:i:89\tcg:Z:1M"
+
+        actual = PafRecord.from_str(line, lazy_tags=True)
+
+        assert isinstance(actual.tags, LazyTags)
+        assert actual.tags._parsed == dict()
+        assert actual.get_tag("NM") == Tag.from_str("NM:i:89")
+        assert list(actual.tags._parsed) == ["NM"]
+
+    def test_lazy_tags_equal_to_eager_tags(self):
+        line = "q\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t60\tNM:i:89\tNM:i:2\ttp:A:P"
+
+        actual = PafRecord.from_str(line, lazy_tags=True)
+        expected = PafRecord.from_str(line)
+
+        assert actual == expected
+        assert actual.is_primary()
+
+    def test_lazy_tags_with_invalid_tag_raises_error_on_access(self):
+        line = "q\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t60\tNMX:i:89"
+
+        record = PafRecord.from_str(line, lazy_tags=True)
+
+        with pytest.raises(InvalidTagFormat):
+            record.get_tag("NM")
+
+    def test_lazy_tags_without_tags_is_none(self):
+        line = "q\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t60"
+
+        actual = PafRecord.from_str(line, lazy_tags=True)
+
+        assert actual.tags is None
+
+
+class TestFromBytes:
+    def test_empty_bytes_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            PafRecord.from_bytes(b"")
+
+    def test_too_few_fields_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            PafRecord.from_bytes(b"qname\t1\t0\t1\t+\ttname\n")
+
+    def test_invalid_strand_raises_error(self):
+        line = b"qname\t1\t0\t1\t?\ttname\t1\t0\t1\t1\t1\t60"
+
+        with pytest.raises(ValueError):
+            PafRecord.from_bytes(line)
+
+    def test_invalid_int_raises_error(self):
+        line = b"qname\tx\t0\t1\t+\ttname\t1\t0\t1\t1\t1\t60"
+
+        with pytest.raises(ValueError):
+            PafRecord.from_bytes(line)
+
+    @pytest.mark.parametrize("lazy_tags", [False, True])
+    def test_same_as_from_str(self, lazy_tags):
+        lines = [
+            "qname\t1239\t65\t1239\t-\ttname\t4378340\t2555250\t2556472\t1139\t1228\t60\n",
+            "q\t10\t0\t10\t*\tt\t20\t0\t10\t10\t10\t0\tNM:i:3\tde:f:0.1\tcg:Z:10M\n",
+            "q\t10\t0\t10\t+\tt\t20\t0\t10\t10\t10\t255\ttp:A:P",
+        ]
+
+        for line in lines:
+            actual = PafRecord.from_bytes(line.encode(), lazy_tags=lazy_tags)
+            expected = PafRecord.from_str(line, lazy_tags=lazy_tags)
+
+            assert actual == expected
+            assert str(actual) == str(expected)
+
+    def test_lazy_tags_are_decoded_on_access(self):
+        line = b"q\t10\t0\t10\t+\tt\t20\t0\t10\t10\t10\t60\ttp:A:P\tcg:Z:10M"
+
+        record = PafRecord.from_bytes(line, lazy_tags=True)
+
+        assert record.tags.raw("cg") == "cg:Z:10M"
+        assert record.tags._parsed == dict()
+        assert record.get_tag("cg") == Tag("cg", "Z", "10M")
+        assert record.is_primary()
+
+    def test_invalid_tag_raises_error(self):
+        line = b"q\t10\t0\t10\t+\tt\t20\t0\t10\t10\t10\t60\tNM:i:foo"
+
+        with pytest.raises(InvalidTagFormat):
+            PafRecord.from_bytes(line)
+
 
 class TestQueryAlignedLength:
     def test_unmapped_record_returns_zero(self):
@@ -0,0 +1,68 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.pafrecord import PafRecord
+from pafpy.parallel import newline_aligned_ranges, parse_range
+
+
+@pytest.fixture
+def tmp_file():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(f"{tmpdirname}/test.paf")
+
+
+class TestNewlineAlignedRanges:
+    def test_empty_file(self, tmp_file):
+        tmp_file.write_bytes(b"")
+
+        assert newline_aligned_ranges(tmp_file) == []
+
+    def test_chunk_larger_than_file(self, tmp_file):
+        tmp_file.write_bytes(b"aaa\nbbb\n")
+
+        assert newline_aligned_ranges(tmp_file, chunk_size=100) == [(0, 8)]
+
+    def test_chunk_ends_on_newline(self, tmp_file):
+        tmp_file.write_bytes(b"aaa\nbbb\n")
+
+        assert newline_aligned_ranges(tmp_file, chunk_size=4) == [(0, 4), (4, 8)]
+
+    def test_no_trailing_newline(self, tmp_file):
+        tmp_file.write_bytes(b"aaa\nbbb\nccc")
+
+        actual = newline_aligned_ranges(tmp_file, chunk_size=2)
+        expected = [(0, 4), (4, 8), (8, 11)]
+
+        assert actual == expected
+
+    def test_invalid_chunk_size_raises_error(self, tmp_file):
+        tmp_file.write_bytes(b"aaa\n")
+
+        with pytest.raises(ValueError):
+            newline_aligned_ranges(tmp_file, chunk_size=0)
+
+
+class TestParseRange:
+    def test_ranges_cover_every_record_once(self, tmp_file):
+        records = [PafRecord(qname=f"read{i}") for i in range(20)]
+        tmp_file.write_text("\n".join(map(str, records)) + "\n")
+
+        actual = []
+        for byte_range in newline_aligned_ranges(tmp_file, chunk_size=50):
+            actual.extend(parse_range(tmp_file, byte_range))
+
+        assert actual == records
+
+    def test_func_result_none_is_dropped(self, tmp_file):
+        records = [PafRecord(qname=f"read{i}", mapq=i) for i in range(5)]
+        tmp_file.write_text("\n".join(map(str, records)))
+
+        actual = parse_range(
+            tmp_file,
+            (0, tmp_file.stat().st_size),
+            func=lambda r: r.mapq if r.mapq % 2 else None,
+        )
+
+        assert actual == [1, 3]
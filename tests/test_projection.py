@@ -0,0 +1,105 @@
+import pytest
+
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+from pafpy.projection import FIELD_NAMES, Projection
+from pafpy.strand import Strand
+
+LINE = b"read1\t10\t2\t9\t-\tchr1\t100\t5\t12\t6\t7\t60\tNM:i:1\tde:f:0.5\ttp:A:P\n"
+
+
+class TestConstructor:
+    def test_unknown_field_raises_error(self):
+        with pytest.raises(ValueError):
+            Projection(fields=["qname", "foo"])
+
+    @pytest.mark.parametrize("name", ["NMM", "N", "1M", "N_", "\u00e9M", "N\u00e9"])
+    def test_invalid_tag_raises_error(self, name):
+        with pytest.raises(ValueError):
+            Projection(tags=[name])
+
+    def test_duplicate_name_raises_error(self):
+        with pytest.raises(ValueError):
+            Projection(fields=["mapq", "mapq"])
+
+    def test_nothing_requested_raises_error(self):
+        with pytest.raises(ValueError):
+            Projection()
+
+    def test_maxsplit_without_tags_or_mapq_leaves_mapq_with_tags(self):
+        assert Projection(fields=["qlen", "qname"]).maxsplit == 11
+
+    def test_maxsplit_with_mapq_splits_tags_off(self):
+        assert Projection(fields=["mapq"]).maxsplit == 12
+
+    def test_maxsplit_with_tags_splits_tags_off(self):
+        assert Projection(fields=["qname"], tags=["NM"]).maxsplit == 12
+
+
+class TestCall:
+    def test_all_fields_match_record(self):
+        projection = Projection(fields=FIELD_NAMES)
+        record = PafRecord.from_bytes(LINE)
+
+        actual = projection(LINE)
+
+        assert tuple(actual) == tuple(record)[:12]
+
+    def test_fields_in_requested_order(self):
+        projection = Projection(fields=["mapq", "strand", "tname"])
+
+        actual = projection(LINE)
+
+        assert actual == (60, Strand.Reverse, "chr1")
+        assert actual.strand == Strand.Reverse
+
+    def test_tag_values_are_typed(self):
+        projection = Projection(tags=["tp", "de", "NM", "cg"])
+
+        actual = projection(LINE)
+
+        assert actual == ("P", 0.5, 1, None)
+
+    def test_duplicate_tag_uses_last_like_record(self):
+        line = b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0\tNM:i:1\ttp:A:P\tNM:i:2"
+        projection = Projection(tags=["NM", "tp"])
+
+        actual = projection(line)
+
+        assert actual == (2, "P")
+        assert actual.NM == PafRecord.from_bytes(line).get_tag("NM").value
+
+    def test_line_without_tags(self):
+        projection = Projection(fields=["qname"], tags=["NM"])
+
+        actual = projection(b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0")
+
+        assert actual == ("r", None)
+
+    def test_too_few_fields_raises_error(self):
+        projection = Projection(fields=["qname"], tags=["NM"])
+
+        with pytest.raises(MalformattedRecord):
+            projection(b"read1\t10\t2")
+
+    @pytest.mark.parametrize("fields", [["qname"], ["qlen", "qname"], ["mapq"]])
+    def test_short_line_raises_error_without_tags(self, fields):
+        projection = Projection(fields=fields)
+        short_line = LINE.split(b"\t")[:11]
+
+        with pytest.raises(MalformattedRecord, match="Expected 12 fields, but got 11"):
+            projection(b"\t".join(short_line))
+        with pytest.raises(MalformattedRecord):
+            projection.from_fields(short_line)
+
+    def test_line_with_only_mandatory_fields(self):
+        projection = Projection(fields=["qname", "mapq"])
+
+        actual = projection(b"r\t1\t0\t1\t+\tt\t1\t0\t1\t1\t1\t0")
+
+        assert actual == ("r", 0)
+
+    def test_invalid_strand_raises_error(self):
+        projection = Projection(fields=["strand"])
+
+        with pytest.raises(ValueError):
+            projection(LINE.replace(b"\t-\t", b"\t?\t"))
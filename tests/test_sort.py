@@ -0,0 +1,222 @@
+import gzip
+import io
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy import sort
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+from pafpy.sort import (
+    iter_merged_lines,
+    iter_sorted,
+    iter_sorted_lines,
+    merge_paf_files,
+    sort_paf,
+)
+
+TEST_DIR = Path(__file__).parent
+
+
+def make_records(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        PafRecord(
+            qname=f"read{rng.randrange(20)}",
+            qstart=rng.randrange(100),
+            tname=f"chr{rng.randrange(5)}",
+            tstart=rng.randrange(1000),
+            mapq=i,
+        )
+        for i in range(n)
+    ]
+
+
+class TestIterSorted:
+    def test_invalid_order_raises_error(self):
+        with pytest.raises(ValueError):
+            iter_sorted(TEST_DIR / "demo.paf", by="foo")
+
+    @pytest.mark.parametrize("memory_limit", [1, 5_000, sort.DEFAULT_MEMORY_LIMIT])
+    def test_by_target_is_stable(self, memory_limit):
+        records = make_records(500)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+
+            actual = list(iter_sorted(path, memory_limit=memory_limit))
+
+        expected = sorted(records, key=lambda r: (r.tname, r.tstart))
+
+        assert actual == expected
+
+    def test_by_query(self):
+        records = make_records(500)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+
+            actual = list(iter_sorted(path, by="query", memory_limit=10_000))
+
+        expected = sorted(records, key=lambda r: (r.qname, r.qstart))
+
+        assert actual == expected
+
+    def test_multiple_merge_passes(self, monkeypatch):
+        monkeypatch.setattr(sort, "MERGE_FAN_IN", 3)
+        records = make_records(100)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+
+            actual = list(iter_sorted(path, memory_limit=1_000))
+
+        expected = sorted(records, key=lambda r: (r.tname, r.tstart))
+
+        assert actual == expected
+
+    def test_merge_passes_rewrite_each_line_once_per_level(self, monkeypatch):
+        monkeypatch.setattr(sort, "MERGE_FAN_IN", 3)
+        write_merged = sort._write_merged
+        written = []
+
+        def counting_write_merged(*args):
+            path = write_merged(*args)
+            written.append(Path(path).stat().st_size)
+            return path
+
+        monkeypatch.setattr(sort, "_write_merged", counting_write_merged)
+        lines = [f"{r}\n".encode() for r in make_records(27)]
+        size = sum(map(len, lines))
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            runs = [
+                sort._write_run([line], tmpdirname, number)
+                for number, line in enumerate(lines)
+            ]
+            actual = list(sort._merge_runs(runs, sort.SORT_KEYS["target"], tmpdirname))
+
+        # 27 runs -> 9 -> 3, then the last 3 are merged without being written
+        assert len(written) == 12
+        assert sum(written) == 2 * size
+        assert actual == sorted(lines, key=sort.SORT_KEYS["target"])
+
+    def test_runs_written_to_tmpdir_and_removed(self):
+        records = make_records(50)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            path.write_text("\n".join(map(str, records)))
+            runs_dir = Path(f"{tmpdirname}/runs")
+            runs_dir.mkdir()
+
+            lines = iter_sorted_lines(path, memory_limit=1, tmpdir=runs_dir)
+            next(lines)
+            assert len(list(runs_dir.glob("*/run*.paf"))) == 50
+            lines.close()
+
+            assert list(runs_dir.iterdir()) == []
+
+    def test_blank_lines_skipped(self):
+        stream = io.BytesIO(
+            b"r\t1\t0\t1\t+\tchr2\t9\t5\t6\t1\t1\t0\n\n"
+            b"r\t1\t0\t1\t+\tchr1\t9\t5\t6\t1\t1\t0\n"
+        )
+
+        actual = [r.tname for r in iter_sorted(stream)]
+
+        assert actual == ["chr1", "chr2"]
+
+    def test_too_few_fields_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            list(iter_sorted(io.BytesIO(b"r\t1\t0\t1\n")))
+
+
+class TestSortPaf:
+    def test_gzip_output_has_sorted_lines(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            output = Path(f"{tmpdirname}/sorted.paf.gz")
+            sort_paf(TEST_DIR / "demo.paf", output, compression="gzip")
+
+            with gzip.open(output, "rt") as fileobj:
+                actual = fileobj.read().splitlines()
+
+        lines = (TEST_DIR / "demo.paf").read_text().splitlines()
+        fields = [line.split("\t") for line in lines]
+        expected = [
+            "\t".join(f) for f in sorted(fields, key=lambda f: (f[5], int(f[7])))
+        ]
+
+        assert actual == expected
+
+    def test_non_utf8_lines_written_unchanged(self):
+        lines = [
+            b"r\xff2\t1\t0\t1\t+\tchr2\t1\t0\t1\t1\t1\t0\n",
+            b"r\xfe1\t1\t0\t1\t+\tchr1\t1\t0\t1\t1\t1\t0\n",
+        ]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            output = Path(f"{tmpdirname}/sorted.paf")
+            sort_paf(io.BytesIO(b"".join(lines)), output)
+
+            actual = output.read_bytes()
+
+        assert actual == lines[1] + lines[0]
+
+
+class TestMergePafFiles:
+    def write_shards(self, directory, records, num_shards, sort_key):
+        paths = []
+        for i in range(num_shards):
+            path = Path(f"{directory}/shard{i}.paf")
+            shard = sorted(records[i::num_shards], key=sort_key)
+            path.write_text("\n".join(map(str, shard)))
+            paths.append(path)
+        return paths
+
+    def test_invalid_order_raises_error(self):
+        with pytest.raises(ValueError):
+            merge_paf_files([TEST_DIR / "demo.paf"], key="foo")
+
+    @pytest.mark.parametrize("num_shards", [1, 3, 10])
+    def test_by_target(self, num_shards):
+        records = make_records(300)
+        sort_key = lambda r: (r.tname, r.tstart)  # noqa: E731
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            paths = self.write_shards(tmpdirname, records, num_shards, sort_key)
+
+            actual = list(merge_paf_files(paths))
+
+        assert [sort_key(r) for r in actual] == sorted(map(sort_key, records))
+        assert sorted(actual, key=str) == sorted(records, key=str)
+
+    def test_by_query_with_compressed_input(self):
+        records = make_records(100)
+        sort_key = lambda r: (r.qname, r.qstart)  # noqa: E731
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            paths = self.write_shards(tmpdirname, records, 2, sort_key)
+            compressed = Path(f"{tmpdirname}/shard.paf.gz")
+            sort_paf(paths[1], compressed, by="query", compression="bgzf")
+
+            actual = list(merge_paf_files([paths[0], compressed], key="query"))
+
+        assert [sort_key(r) for r in actual] == sorted(map(sort_key, records))
+
+    def test_callable_key(self):
+        records = make_records(100)
+        sort_key = lambda r: r.mapq  # noqa: E731
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            paths = self.write_shards(tmpdirname, records, 4, sort_key)
+
+            actual = list(merge_paf_files(paths, key=sort_key))
+
+        assert actual == records
+
+    def test_equal_keys_in_file_order(self):
+        lines = [
+            b"a\t1\t0\t1\t+\tchr1\t9\t5\t6\t1\t1\t0\n",
+            b"b\t1\t0\t1\t+\tchr1\t9\t5\t6\t1\t1\t0\n",
+        ]
+
+        actual = list(iter_merged_lines([io.BytesIO(lines[1]), io.BytesIO(lines[0])]))
+
+        assert actual == [lines[1], lines[0]]
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+
+from pafpy.stats import CountingReader, ReadStats
+
+
+class TestReadStats:
+    def test_interval_less_than_one_raises_error(self):
+        with pytest.raises(ValueError):
+            ReadStats(interval=0)
+
+    def test_new_stats_are_zero(self):
+        stats = ReadStats()
+
+        assert stats.lines == 0
+        assert stats.records == 0
+        assert stats.elapsed == 0.0
+        assert stats.lines_per_sec == 0.0
+        assert stats.mb_per_sec == 0.0
+
+    def test_add_accumulates_counts_and_times(self):
+        stats = ReadStats()
+        stats._add(10, start=1.0, read=1.5, end=3.0, tag_time=0.5, matched=True)
+        stats._add(20, start=3.0, read=3.5, end=5.0, tag_time=0.0, matched=False)
+
+        assert stats.lines == 2
+        assert stats.records == 1
+        assert stats.bytes_read == 30
+        assert stats.read_time == 1.0
+        assert stats.parse_time == 2.5
+        assert stats.tag_time == 0.5
+        assert stats.elapsed == 4.0
+        assert stats.lines_per_sec == 0.5
+        assert stats.records_per_sec == 0.25
+
+    def test_callback_every_interval_lines_and_at_finish(self):
+        calls = []
+        stats = ReadStats(callback=lambda s: calls.append(s.lines), interval=2)
+        for i in range(5):
+            stats._add(1, float(i), float(i), float(i + 1), 0.0, True)
+        stats._finish(10.0)
+
+        assert calls == [2, 4, 5]
+        assert stats.elapsed == 10.0
+
+    def test_finish_does_not_repeat_last_report(self):
+        calls = []
+        stats = ReadStats(callback=lambda s: calls.append(s.lines), interval=2)
+        for i in range(4):
+            stats._add(1, float(i), float(i), float(i + 1), 0.0, True)
+        stats._finish(10.0)
+        stats._finish(11.0)
+
+        assert calls == [2, 4]
+
+    def test_reset(self):
+        stats = ReadStats()
+        stats._add(10, 1.0, 1.5, 3.0, 0.5, True)
+        stats.compressed_bytes_read = 5
+        stats.reset()
+
+        assert stats.as_dict() == ReadStats().as_dict()
+
+    def test_as_dict_and_repr(self):
+        stats = ReadStats()
+        stats._add(2_000_000, 0.0, 1.0, 2.0, 0.0, True)
+
+        assert stats.as_dict()["mb_per_sec"] == 1.0
+        assert repr(stats).startswith("ReadStats(lines=1, records=1, ")
+
+
+class TestCountingReader:
+    def test_counts_bytes_read(self):
+        stats = ReadStats()
+        reader = CountingReader(io.BytesIO(b"abcdef"), stats)
+
+        assert reader.read(4) == b"abcd"
+        assert reader.read() == b"ef"
+        assert stats.compressed_bytes_read == 6
+        assert reader.tell() == 6
+
+    def test_only_closes_owned_file(self):
+        fileobj = io.BytesIO(b"abc")
+        CountingReader(fileobj, ReadStats(), owns_file=False).close()
+        assert not fileobj.closed
+
+        CountingReader(fileobj, ReadStats()).close()
+        assert fileobj.closed
@@ -0,0 +1,148 @@
+from pathlib import Path
+
+import pytest
+
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import MalformattedRecord, PafRecord
+from pafpy.store import CompactRecord, RecordStore
+from pafpy.strand import Strand
+from pafpy.tag import Tag
+
+TEST_DIR = Path(__file__).parent
+
+LINES = [
+    "read1\t10\t5\t9\t+\tchr1\t100\t50\t54\t3\t4\t60\ttp:A:P\tNM:i:1\tde:f:0.1",
+    "read2\t10\t0\t10\t-\tchr1\t100\t10\t20\t10\t10\t0\ttp:A:S",
+    "read1\t10\t0\t8\t+\tchr2\t50\t0\t8\t8\t8\t255",
+    "read3\t10\t0\t0\t*\t*\t0\t0\t0\t0\t0\t255\ttp:A:I",
+]
+
+
+class TestRecordStore:
+    def test_empty(self):
+        store = RecordStore()
+
+        assert len(store) == 0
+        assert list(store) == []
+        with pytest.raises(IndexError):
+            store[0]
+
+    def test_from_lines_matches_paf_records(self):
+        store = RecordStore.from_lines(LINES)
+
+        assert len(store) == 4
+        assert [r.to_record() for r in store] == [
+            PafRecord.from_str(line) for line in LINES
+        ]
+
+    def test_from_bytes_lines(self):
+        store = RecordStore.from_lines(line.encode() + b"\n" for line in LINES)
+
+        assert [str(r) for r in store] == LINES
+
+    def test_append_shares_names_with_lines(self):
+        store = RecordStore.from_lines(LINES[:1])
+
+        store.append(PafRecord.from_str(LINES[2]))
+        store.extend([PafRecord(qname="read9", tags={"NM": Tag("NM", "i", 2)})])
+
+        assert store._qnames.names == ["read1", "read9"]
+        assert list(store.qname) == [0, 0, 1]
+        assert store[1].to_record() == PafRecord.from_str(LINES[2])
+        assert store[2].get_tag("NM") == Tag("NM", "i", 2)
+
+    def test_negative_index(self):
+        store = RecordStore.from_lines(LINES)
+
+        assert store[-1].qname == "read3"
+
+    def test_accessors(self):
+        store = RecordStore.from_lines(LINES)
+        first, second, third, fourth = store
+
+        assert isinstance(first, CompactRecord)
+        assert first.strand is Strand.Forward
+        assert first.query_aligned_length == 4
+        assert first.query_coverage == 0.4
+        assert first.target_coverage == 0.04
+        assert first.relative_length == 1.0
+        assert first.blast_identity() == 0.75
+        assert first.get_tag("de") == Tag("de", "f", 0.1)
+        assert first.get_tag("cg") is None
+        assert first.is_primary()
+        assert second.is_secondary()
+        assert third.tags is None
+        assert fourth.is_unmapped()
+        assert not fourth.is_inversion()
+
+    def test_equality(self):
+        store = RecordStore.from_lines(LINES)
+
+        assert store[0] == PafRecord.from_str(LINES[0])
+        assert store[0] == store[0]
+        assert store[0] != store[1]
+
+    def test_nbytes_is_small(self):
+        store = RecordStore.from_lines(LINES * 1000)
+
+        assert store.nbytes < 130 * len(store)
+
+    def test_too_few_fields_raises_error(self):
+        with pytest.raises(MalformattedRecord):
+            RecordStore.from_lines(["read1\t10"])
+
+    def test_invalid_strand_raises_error(self):
+        with pytest.raises(ValueError):
+            RecordStore.from_lines([LINES[0].replace("+", "?")])
+
+    @pytest.mark.parametrize(
+        "bad_line",
+        [
+            "read9\t10\t0\t10\t+\tchr9\t100\tfoo\t10\t10\t10\t60",
+            "read9\t10\t0\t10\t+\tchr9\t100\t0\t10\t10\t10\t256\ttp:A:P",
+        ],
+    )
+    def test_failed_extend_lines_leaves_store_unchanged(self, bad_line):
+        store = RecordStore.from_lines(LINES[:2])
+
+        with pytest.raises((ValueError, OverflowError)):
+            store.extend_lines([LINES[2], bad_line, LINES[3]])
+
+        assert len(store) == 3
+        assert all(len(column) == 3 for column in store._columns())
+        assert len(store.tag_offsets) == 4
+        assert store.tag_offsets[-1] == len(store.tag_data)
+        assert [str(r) for r in store] == LINES[:3]
+
+        store.extend_lines(LINES[3:])
+
+        assert [str(r) for r in store] == LINES
+
+    def test_failed_append_leaves_store_unchanged(self):
+        store = RecordStore.from_lines(LINES[:1])
+
+        with pytest.raises(OverflowError):
+            store.append(
+                PafRecord(qname="read9", mapq=256, tags={"NM": Tag("NM", "i", 2)})
+            )
+
+        assert len(store) == 1
+        assert all(len(column) == 1 for column in store._columns())
+        assert [str(r) for r in store] == LINES[:1]
+
+
+class TestPafFileToStore:
+    def test_demo_file(self):
+        with PafFile(TEST_DIR / "demo.paf") as paf:
+            store = paf.to_store()
+        with PafFile(TEST_DIR / "demo.paf", lazy_tags=True) as paf:
+            expected = [str(record) for record in paf]
+
+        assert len(store) == len(expected)
+        assert [str(record.to_record()) for record in store] == expected
+
+    def test_gzip_file(self):
+        with PafFile(TEST_DIR / "demo.paf.gz") as paf:
+            store = paf.to_store()
+
+        assert store[0].qname == "11737-1"
@@ -0,0 +1,179 @@
+import gzip
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from pafpy.streams import MmapLineReader, ReadAheadLineReader
+
+
+@pytest.fixture
+def tmp_file():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(f"{tmpdirname}/test.txt")
+
+
+class TestMmapLineReader:
+    def test_empty_file(self, tmp_file):
+        tmp_file.write_bytes(b"")
+
+        with MmapLineReader(tmp_file) as reader:
+            assert list(reader) == []
+            assert reader.readline() == b""
+
+    def test_lines_with_trailing_newline(self, tmp_file):
+        tmp_file.write_bytes(b"a\nbb\nccc\n")
+
+        with MmapLineReader(tmp_file) as reader:
+            actual = list(reader)
+
+        expected = [b"a\n", b"bb\n", b"ccc\n"]
+
+        assert actual == expected
+
+    def test_last_line_without_newline(self, tmp_file):
+        tmp_file.write_bytes(b"a\nbb")
+
+        with MmapLineReader(tmp_file) as reader:
+            actual = list(reader)
+
+        expected = [b"a\n", b"bb"]
+
+        assert actual == expected
+
+    def test_tell_and_seek(self, tmp_file):
+        tmp_file.write_bytes(b"a\nbb\nccc\n")
+
+        with MmapLineReader(tmp_file) as reader:
+            reader.readline()
+            assert reader.tell() == 2
+            reader.seek(0)
+            assert reader.readline() == b"a\n"
+            reader.seek(-4, os.SEEK_END)
+            assert reader.readline() == b"ccc\n"
+            reader.seek(-4, os.SEEK_CUR)
+            assert reader.readline() == b"ccc\n"
+
+    def test_negative_seek_raises_error(self, tmp_file):
+        tmp_file.write_bytes(b"a\n")
+
+        with MmapLineReader(tmp_file) as reader:
+            with pytest.raises(ValueError):
+                reader.seek(-1)
+
+    def test_close(self, tmp_file):
+        tmp_file.write_bytes(b"a\n")
+        reader = MmapLineReader(tmp_file)
+
+        assert not reader.closed
+        reader.close()
+        assert reader.closed
+
+    @pytest.mark.parametrize("data", [b"a\nb\n", b""])
+    def test_read_after_close_raises_error(self, tmp_file, data):
+        tmp_file.write_bytes(data)
+        reader = MmapLineReader(tmp_file)
+        reader.close()
+
+        with pytest.raises(ValueError, match="closed file"):
+            reader.readline()
+        with pytest.raises(ValueError, match="closed file"):
+            next(reader)
+        with pytest.raises(ValueError, match="closed file"):
+            reader.tell()
+        with pytest.raises(ValueError, match="closed file"):
+            reader.seek(0)
+
+    def test_lines_remain_valid_after_close(self, tmp_file):
+        tmp_file.write_bytes(b"a\nb\n")
+        reader = MmapLineReader(tmp_file)
+
+        line = reader.readline()
+        reader.close()
+
+        assert line == b"a\n"
+        assert isinstance(line, bytes)
+
+
+class FailingStream(io.BytesIO):
+    def read(self, size=-1):
+        raise OSError("disk on fire")
+
+
+class TestReadAheadLineReader:
+    def test_empty_stream(self):
+        with ReadAheadLineReader(io.BytesIO()) as reader:
+            assert list(reader) == []
+            assert reader.readline() == b""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+    def test_lines_split_across_chunks(self, chunk_size):
+        data = b"a\nbb\n\nccc\ndddd"
+
+        with ReadAheadLineReader(io.BytesIO(data), chunk_size=chunk_size) as reader:
+            actual = list(reader)
+
+        assert actual == [b"a\n", b"bb\n", b"\n", b"ccc\n", b"dddd"]
+
+    @pytest.mark.parametrize("chunk_size", [1, 1024])
+    def test_only_splits_on_newline(self, chunk_size):
+        data = b"x\ry\na\r\nb\x0bc"
+
+        with ReadAheadLineReader(io.BytesIO(data), chunk_size=chunk_size) as reader:
+            actual = list(reader)
+
+        assert actual == list(io.BytesIO(data))
+
+    def test_gzip_stream(self):
+        lines = [f"line{i}\n".encode() for i in range(100_000)]
+        data = gzip.compress(b"".join(lines))
+
+        stream = gzip.open(io.BytesIO(data))
+        with ReadAheadLineReader(stream, chunk_size=4096, max_chunks=3) as reader:
+            actual = list(reader)
+
+        assert actual == lines
+        assert stream.closed
+
+    def test_close_before_exhausted_stops_thread(self):
+        data = b"line\n" * 100_000
+        reader = ReadAheadLineReader(io.BytesIO(data), chunk_size=16)
+        reader.readline()
+
+        reader.close()
+
+        assert reader.closed
+        assert not reader._thread.is_alive()
+        with pytest.raises(ValueError):
+            reader.readline()
+
+    def test_close_does_not_wait_for_blocked_read(self):
+        read_fd, write_fd = os.pipe()
+        stream = open(read_fd, mode="rb")
+        reader = ReadAheadLineReader(stream)
+        try:
+            start = time.monotonic()
+            reader.close()
+
+            assert time.monotonic() - start < 2
+            assert reader.closed
+            assert not stream.closed
+        finally:
+            os.close(write_fd)
+        reader._thread.join(5)
+
+        assert not reader._thread.is_alive()
+        assert stream.closed
+
+    def test_error_in_background_is_raised(self):
+        with ReadAheadLineReader(FailingStream()) as reader:
+            with pytest.raises(OSError):
+                reader.readline()
+
+    def test_seek_not_supported(self):
+        with ReadAheadLineReader(io.BytesIO(b"a\n")) as reader:
+            with pytest.raises(io.UnsupportedOperation):
+                reader.seek(0)
@@ -0,0 +1,125 @@
+import gzip
+import re
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.cigar import Cigar
+from pafpy.paffile import PafFile
+from pafpy.synthetic import WorkloadConfig, generate_records, write_synthetic_paf
+
+
+def cs_lengths(cs):
+    query = target = 0
+    for op, value in re.findall(r"([:*+-])([0-9]+|[a-z]+)", cs):
+        if op == ":":
+            query += int(value)
+            target += int(value)
+        elif op == "*":
+            query += 1
+            target += 1
+        elif op == "+":
+            query += len(value)
+        else:
+            target += len(value)
+    return query, target
+
+
+class TestGenerateRecords:
+    def test_negative_number_raises_error(self):
+        with pytest.raises(ValueError):
+            generate_records(-1)
+
+    def test_number_of_records(self):
+        assert len(list(generate_records(123))) == 123
+
+    def test_endless_without_number(self):
+        records = generate_records()
+
+        assert len([next(records) for _ in range(50)]) == 50
+
+    def test_same_seed_same_records(self):
+        first = list(generate_records(50, seed=3))
+
+        assert first == list(generate_records(50, seed=3))
+        assert first != list(generate_records(50, seed=4))
+
+    def test_alignments_of_each_read_are_consecutive(self):
+        records = list(generate_records(500))
+
+        qnames = [r.qname for r in records]
+        runs = [q for i, q in enumerate(qnames) if i == 0 or q != qnames[i - 1]]
+
+        assert len(runs) == len(set(runs))
+
+    def test_fields_are_consistent_with_cigar(self):
+        config = WorkloadConfig(mean_read_length=2_000)
+        for record in generate_records(300, config=config):
+            if record.is_unmapped():
+                continue
+            cigar = Cigar.from_record(record)
+
+            assert 0 <= record.qstart < record.qend <= record.qlen
+            assert 0 <= record.tstart < record.tend <= record.tlen
+            assert cigar.query_length == record.qend - record.qstart
+            assert cigar.target_length == record.tend - record.tstart
+            assert record.blen == sum(cigar.lengths)
+            assert record.mlen <= record.blen
+
+    def test_cs_is_consistent_with_fields(self):
+        config = WorkloadConfig(mean_read_length=1_000, cs=True, cigar=False)
+        for record in generate_records(100, config=config):
+            if record.is_unmapped():
+                continue
+
+            assert record.get_tag("cg") is None
+            actual = cs_lengths(record.get_tag("cs").value)
+            assert actual == (record.qend - record.qstart, record.tend - record.tstart)
+
+    def test_distributions(self):
+        config = WorkloadConfig(
+            mean_read_length=3_000, secondary_rate=0.5, unmapped_rate=0.1
+        )
+        records = list(generate_records(3_000, config=config))
+        mapped = [r for r in records if not r.is_unmapped()]
+        primary = [r for r in mapped if r.is_primary()]
+        secondary = [r for r in mapped if r.is_secondary()]
+        num_reads = len({r.qname for r in records})
+
+        mean_length = sum(r.qlen for r in primary) / len(primary)
+        mean_identity = sum(r.blast_identity() for r in primary) / len(primary)
+
+        assert 2_500 < mean_length < 3_500
+        assert 0.85 < mean_identity < 0.95
+        assert 0.35 < len(secondary) / len(primary) < 0.65
+        assert 0.05 < (len(records) - len(mapped)) / num_reads < 0.15
+        assert all(r.mapq == 0 for r in secondary)
+
+
+class TestWriteSyntheticPaf:
+    def test_no_limit_raises_error(self):
+        with pytest.raises(ValueError):
+            write_synthetic_paf("unused.paf")
+
+    def test_num_records(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf")
+            written = write_synthetic_paf(path, num_records=200, seed=2)
+
+            with PafFile(path) as paf:
+                actual = list(paf)
+
+        assert written == 200
+        assert actual == list(generate_records(200, seed=2))
+
+    def test_max_bytes_gzip(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(f"{tmpdirname}/test.paf.gz")
+            written = write_synthetic_paf(path, max_bytes=100_000, compression="gzip")
+
+            with gzip.open(path) as fileobj:
+                data = fileobj.read()
+
+        assert 100_000 <= len(data) < 100_000 + 50_000
+        assert data.count(b"\n") == written
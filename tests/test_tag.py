@@ -1,6 +1,6 @@
 import pytest
 
-from pafpy.tag import InvalidTagFormat, Tag
+from pafpy.tag import InvalidTagFormat, LazyTags, Tag
 
 
 class TestStr:
@@ -125,3 +125,135 @@ class TestFromStr:
         expected = Tag(tag, tag_type, float(value))
 
         assert actual == expected
+
+    @pytest.mark.parametrize(
+        "string", ["NM:i:foo", "NM:i:1.5", "de:f:abc", "tp:A:PP", "tp:A:", "NM;i:5"]
+    )
+    def test_unconvertible_value_raises_error(self, string):
+        with pytest.raises(InvalidTagFormat):
+            Tag.from_str(string)
+
+    @pytest.mark.parametrize(
+        "string",
+        ["cg:Z:97M1I13M", "tp:A:P", "tp:A:*", "NM:i:-50", "de:f:0.0391", "de:f:inf"],
+    )
+    def test_strict_matches_default(self, string):
+        assert Tag.from_str(string, strict=True) == Tag.from_str(string)
+
+    @pytest.mark.parametrize("string", ["foo", "NM:i:", "NM:x:5", "N@:i:5"])
+    def test_strict_invalid_raises_error(self, string):
+        with pytest.raises(InvalidTagFormat):
+            Tag.from_str(string, strict=True)
+
+    @pytest.mark.parametrize(
+        "string",
+        [
+            "NM:i: 5",
+            "NM:i:5 ",
+            "NM:i:1_000",
+            "NM:i:+-5",
+            "de:f:nan",
+            "de:f:Infinity",
+            "de:f:-inf",
+            "de:f: 1.5",
+            "de:f:1_0.5",
+            "de:f:1.",
+            "!!:i:5",
+            "N@:i:5",
+            "1M:i:5",
+            "_x:i:5",
+            "tp:A:PP",
+            "tp:A: ",
+        ],
+    )
+    def test_invalid_values_rejected_by_default_and_strict(self, string):
+        with pytest.raises(InvalidTagFormat):
+            Tag.from_str(string)
+        with pytest.raises(InvalidTagFormat):
+            Tag.from_str(string, strict=True)
+
+    @pytest.mark.parametrize(
+        "string",
+        [
+            "NM:i:+5",
+            "NM:i:007",
+            "de:f:-1.5e-3",
+            "de:f:+.5",
+            "de:f:5E10",
+            "x1:A:~",
+            "cs:Z:",
+        ],
+    )
+    def test_valid_values_agree_with_strict(self, string):
+        tag = Tag.from_str(string)
+
+        assert tag == Tag.from_str(string, strict=True)
+        assert Tag.from_str(str(tag)) == tag
+
+
+class TestLazyTags:
+    def test_empty(self):
+        tags = LazyTags()
+
+        assert len(tags) == 0
+        assert tags.get("NM") is None
+
+    def test_tag_only_parsed_on_access(self):
+        tags = LazyTags(["NM:i:50", "cg:Z:97M1I13M"])
+
+        assert tags._parsed == dict()
+
+        actual = tags["NM"]
+        expected = Tag("NM", "i", 50)
+
+        assert actual == expected
+        assert list(tags._parsed) == ["NM"]
+
+    def test_bytes_decoded_on_access(self):
+        tags = LazyTags([b"NM:i:50", b"cg:Z:97M1I13M"])
+
+        assert list(tags) == ["NM", "cg"]
+        assert tags.raw("cg") == "cg:Z:97M1I13M"
+        assert list(tags.raw_values()) == ["NM:i:50", "cg:Z:97M1I13M"]
+        assert tags._parsed == dict()
+        assert tags["NM"] == Tag("NM", "i", 50)
+        assert tags == LazyTags(["NM:i:50", "cg:Z:97M1I13M"])
+
+    def test_contains_does_not_parse(self):
+        tags = LazyTags(["NM:i:50"])
+
+        assert "NM" in tags
+        assert "cg" not in tags
+        assert tags._parsed == dict()
+
+    def test_missing_tag_raises_key_error(self):
+        tags = LazyTags(["NM:i:50"])
+
+        with pytest.raises(KeyError):
+            tags["cg"]
+
+    def test_duplicate_tag_keeps_last(self):
+        tags = LazyTags(["NM:i:50", "NM:i:2"])
+
+        assert len(tags) == 1
+        assert tags["NM"].value == 2
+
+    def test_invalid_tag_raises_error_on_access(self):
+        tags = LazyTags(["NM:i:foo"])
+
+        with pytest.raises(InvalidTagFormat):
+            tags["NM"]
+
+    def test_raw(self):
+        tags = LazyTags(["de:f:1e-05"])
+
+        assert tags.raw("de") == "de:f:1e-05"
+        assert tags.raw("NM") is None
+        assert list(tags.raw_values()) == ["de:f:1e-05"]
+
+    def test_equal_to_dict(self):
+        tags = LazyTags(["NM:i:50", "tp:A:P"])
+        expected = {"NM": Tag("NM", "i", 50), "tp": Tag("tp", "A", "P")}
+
+        assert tags == expected
+        assert expected == tags
@@ -1,8 +1,10 @@
+import gzip
 from tempfile import TemporaryFile
 
 import pytest
 
-from pafpy.utils import GZIP_MAGIC, first_n_bytes, is_compressed
+from pafpy.bgzf import compress_block
+from pafpy.utils import GZIP_MAGIC, first_n_bytes, is_bgzf, is_compressed
 
 
 class TestFirstNBytes:
@@ -93,3 +95,23 @@ class TestIsCompressed:
             fileobj.write(contents)
             fileobj.seek(0)
             assert is_compressed(fileobj)
+
+
+class TestIsBgzf:
+    def test_empty_file(self):
+        with TemporaryFile() as fileobj:
+            assert not is_bgzf(fileobj)
+
+    def test_gzip_is_not_bgzf(self):
+        with TemporaryFile() as fileobj:
+            fileobj.write(gzip.compress(b"compressed"))
+            fileobj.seek(0)
+            assert is_compressed(fileobj)
+            assert not is_bgzf(fileobj)
+
+    def test_bgzf(self):
+        with TemporaryFile() as fileobj:
+            fileobj.write(compress_block(b"compressed"))
+            fileobj.seek(0)
+            assert is_compressed(fileobj)
+            assert is_bgzf(fileobj)
@@ -0,0 +1,153 @@
+import gzip
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from pafpy.batch import PafBatch
+from pafpy.bgzf import BgzfReader
+from pafpy.paffile import PafFile
+from pafpy.pafrecord import PafRecord
+from pafpy.utils import is_bgzf
+from pafpy.writer import PafWriter
+
+
+@pytest.fixture
+def tmpdir():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+
+def make_records(n):
+    return [
+        PafRecord.from_str(
+            f"read{i}\t100\t{i % 50}\t90\t{'+-'[i % 2]}\tchr{i % 3}\t1000\t{i}\t"
+            f"{i + 80}\t70\t85\t{i % 61}\tNM:i:{i % 9}\ttp:A:P\tde:f:0.0{i % 10}1"
+        )
+        for i in range(n)
+    ]
+
+
+class TestPafWriter:
+    def test_uncompressed(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = make_records(1000)
+
+        with PafWriter(path, buffer_size=100) as writer:
+            for record in records:
+                writer.write(record)
+
+        assert path.read_text() == "".join(f"{r}\n" for r in records)
+
+    def test_round_trip_demo_file(self, tmpdir):
+        demo = Path(__file__).parent / "demo.paf"
+        path = tmpdir / "test.paf"
+
+        with PafFile(demo, lazy_tags=True) as paf, PafWriter(path) as writer:
+            writer.write_batch(paf)
+
+        assert path.read_text() == demo.read_text()
+
+    def test_write_batch(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = make_records(1000)
+
+        with PafWriter(path, buffer_size=1000) as writer:
+            writer.write_batch(records[:10])
+            writer.write(records[10])
+            writer.write_batch(iter(records[11:]))
+
+        assert path.read_text() == "".join(f"{r}\n" for r in records)
+
+    def test_write_paf_batch(self, tmpdir):
+        path = tmpdir / "test.paf"
+        records = [r._replace(tags=None) for r in make_records(100)]
+
+        with PafWriter(path) as writer:
+            writer.write_batch(PafBatch.from_lines(map(str, records)))
+
+        assert path.read_text() == "".join(f"{r}\n" for r in records)
+
+    def test_write_lines(self, tmpdir):
+        path = tmpdir / "test.paf"
+        lines = [f"{r}\n" for r in make_records(100)]
+
+        with PafWriter(path, buffer_size=500) as writer:
+            writer.write_lines(lines[:50])
+            writer.write_lines(line.encode() for line in lines[50:])
+
+        assert path.read_text() == "".join(lines)
+
+    def test_write_lines_does_not_decode_bytes(self, tmpdir):
+        path = tmpdir / "test.paf"
+        lines = [b"r\xff\t1\n", "r2\t2\n", b"\xfe\n"]
+
+        with PafWriter(path, buffer_size=4) as writer:
+            writer.write_lines(lines)
+
+        assert path.read_bytes() == b"r\xff\t1\nr2\t2\n\xfe\n"
+
+    @pytest.mark.parametrize("threads", [0, 2])
+    def test_gzip(self, tmpdir, threads):
+        path = tmpdir / "test.paf.gz"
+        records = make_records(5000)
+
+        with PafWriter(
+            path, compression="gzip", threads=threads, buffer_size=10_000
+        ) as writer:
+            writer.write_batch(records)
+
+        with gzip.open(path, mode="rt") as fileobj:
+            assert fileobj.read() == "".join(f"{r}\n" for r in records)
+        with PafFile(path) as paf:
+            assert list(paf) == records
+
+    @pytest.mark.parametrize("threads", [0, 2])
+    def test_bgzf(self, tmpdir, threads):
+        path = tmpdir / "test.paf.gz"
+        records = make_records(5000)
+
+        with PafWriter(path, compression="bgzf", threads=threads) as writer:
+            writer.write_batch(records)
+
+        with open(path, mode="rb") as fileobj:
+            assert is_bgzf(fileobj)
+        with BgzfReader(path) as reader:
+            assert b"".join(reader).decode() == "".join(f"{r}\n" for r in records)
+
+    def test_file_object_is_not_closed(self):
+        fileobj = io.BytesIO()
+
+        with PafWriter(fileobj) as writer:
+            writer.write(PafRecord())
+
+        assert not fileobj.closed
+        assert fileobj.getvalue() == f"{PafRecord()}\n".encode()
+
+    def test_stdout(self, capsysbinary):
+        with PafWriter("-") as writer:
+            writer.write(PafRecord())
+
+        assert capsysbinary.readouterr().out == f"{PafRecord()}\n".encode()
+
+    def test_flush_writes_buffered_records(self, tmpdir):
+        path = tmpdir / "test.paf"
+
+        with PafWriter(path) as writer:
+            writer.write(PafRecord())
+            assert path.read_text() == ""
+            writer.flush()
+            assert path.read_text() == f"{PafRecord()}\n"
+
+    def test_write_after_close_raises_error(self, tmpdir):
+        writer = PafWriter(tmpdir / "test.paf")
+        writer.close()
+
+        assert writer.closed
+        with pytest.raises(IOError):
+            writer.write(PafRecord())
+
+    def test_unknown_compression_raises_error(self, tmpdir):
+        with pytest.raises(ValueError):
+            PafWriter(tmpdir / "test.paf", compression="bz2")